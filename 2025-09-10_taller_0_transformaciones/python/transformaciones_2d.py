@@ -9,10 +9,63 @@ import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.animation as animation
 from matplotlib.patches import Polygon
+from matplotlib.colors import to_rgb
 import imageio
 import os
+import sys
+import unicodedata
+from pathlib import Path
+
+# Región del plano visible en las animaciones: [-3, 3] × [-3, 3]
+LIMITE = 3.0
+
+# Bits fraccionarios de las coordenadas para cv2.fillPoly (precisión de 1/16 de píxel)
+SUBPIXEL_BITS = 4
+
+# Utilidades compartidas del Taller 2 (escritor de GIF en streaming)
+COMUN = Path(__file__).resolve().parents[2] / '2025-10-01_taller_2_cv_3d' / 'ejercicios' / 'comun'
+
+def texto_ascii(texto):
+    """Las fuentes Hershey de cv2.putText solo dibujan ASCII: quita tildes y símbolos"""
+    texto = texto.replace('°', ' grados')
+    return unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode('ascii')
+
+class FiguraHomogenea:
+    """
+    Figura (2×P) o pila de figuras (M×2×P) registrada una vez con sus coordenadas homogéneas
+    
+    Igual que GrafoEscena guarda sus vértices, la figura se copia al registrarla
+    y la fila de unos se añade una sola vez; aplicar_transformacion y
+    aplicar_transformaciones la usan tal cual en cada llamada. La copia es de
+    solo lectura: si la figura cambia, se registra de nuevo.
+    """
+    
+    def __init__(self, figura, dtype=np.float64):
+        """
+        Args:
+            figura: Figura 2×P o pila de figuras M×2×P
+            dtype: Tipo de las coordenadas (np.float64 o np.float32)
+        """
+        puntos = np.asarray(figura)
+        self.homogenea = np.empty(puntos.shape[:-2] + (3, puntos.shape[-1]), dtype=dtype)
+        self.homogenea[..., :2, :] = puntos
+        self.homogenea[..., 2, :] = 1
+        self.homogenea.flags.writeable = False
+    
+    @property
+    def puntos(self):
+        """Coordenadas cartesianas (vista de las dos primeras filas)"""
+        return self.homogenea[..., :2, :]
 
 class TransformacionesBasicas:
+    # Figuras de la animación: (pila de matrices_animacion, color, alpha, etiqueta)
+    FIGURAS_ANIMADAS = [
+        ('traslacion', 'red', 0.8, 'Traslación circular'),
+        ('rotacion', 'green', 0.8, 'Rotación continua'),
+        ('escala', 'orange', 0.8, 'Escala oscilante'),
+        ('compuesta', 'purple', 0.9, 'Compuesta compleja'),
+    ]
+    
     def __init__(self):
         """Inicializa la clase con una figura básica (triángulo)"""
         # Definir un triángulo básico
@@ -31,35 +84,94 @@ class TransformacionesBasicas:
         
         # Lista para almacenar frames de animación
         self.frames = []
+        
+        # La figura animada se registra una vez: cada frame reutiliza sus coordenadas homogéneas
+        self.figura_registrada = FiguraHomogenea(self.figura_original)
+    
+    def _identidades(self, forma, dtype):
+        """Pila de matrices identidad 3×3 con la forma de los parámetros"""
+        matriz = np.zeros(forma + (3, 3), dtype=dtype)
+        matriz[..., [0, 1, 2], [0, 1, 2]] = 1
+        return matriz
     
     def matriz_traslacion(self, tx, ty):
-        """Crea matriz de traslación homogénea"""
-        return np.array([
-            [1, 0, tx],
-            [0, 1, ty],
-            [0, 0, 1]
-        ])
+        """
+        Crea matriz de traslación homogénea
+        
+        Con escalares devuelve una matriz 3×3; con arreglos de N valores, una pila N×3×3.
+        """
+        tx, ty = np.broadcast_arrays(tx, ty)
+        matriz = self._identidades(tx.shape, np.result_type(tx, ty))
+        matriz[..., 0, 2] = tx
+        matriz[..., 1, 2] = ty
+        return matriz
     
     def matriz_rotacion(self, angulo):
-        """Crea matriz de rotación homogénea (ángulo en radianes)"""
+        """Crea matriz de rotación homogénea (ángulo en radianes; arreglo de N ángulos -> N×3×3)"""
         cos_a = np.cos(angulo)
         sin_a = np.sin(angulo)
-        return np.array([
-            [cos_a, -sin_a, 0],
-            [sin_a, cos_a, 0],
-            [0, 0, 1]
-        ])
+        matriz = self._identidades(np.shape(cos_a), cos_a.dtype)
+        matriz[..., 0, 0] = cos_a
+        matriz[..., 0, 1] = -sin_a
+        matriz[..., 1, 0] = sin_a
+        matriz[..., 1, 1] = cos_a
+        return matriz
     
     def matriz_escala(self, sx, sy):
-        """Crea matriz de escala homogénea"""
-        return np.array([
-            [sx, 0, 0],
-            [0, sy, 0],
-            [0, 0, 1]
-        ])
+        """Crea matriz de escala homogénea (arreglos de N factores -> N×3×3)"""
+        sx, sy = np.broadcast_arrays(sx, sy)
+        matriz = self._identidades(sx.shape, np.result_type(sx, sy))
+        matriz[..., 0, 0] = sx
+        matriz[..., 1, 1] = sy
+        return matriz
+    
+    def matriz_trs(self, tx, ty, angulo, sx, sy=None):
+        """
+        Crea directamente T(tx, ty) @ R(angulo) @ S(sx, sy): escala -> rotación -> traslación
+        
+        Todos los parámetros admiten arreglos (con broadcasting) y el resultado es
+        una pila N×3×3, sin calcular los dos productos de matrices. Si sy es
+        None la escala es uniforme (sy = sx).
+        """
+        if sy is None:
+            sy = sx
+        tx, ty, angulo, sx, sy = np.broadcast_arrays(tx, ty, angulo, sx, sy)
+        cos_a = np.cos(angulo)
+        sin_a = np.sin(angulo)
+        matriz = self._identidades(tx.shape, np.result_type(cos_a, tx, ty, sx, sy))
+        matriz[..., 0, 0] = sx * cos_a
+        matriz[..., 0, 1] = -sy * sin_a
+        matriz[..., 0, 2] = tx
+        matriz[..., 1, 0] = sx * sin_a
+        matriz[..., 1, 1] = sy * cos_a
+        matriz[..., 1, 2] = ty
+        return matriz
+    
+    def coordenadas_homogeneas(self, figura, dtype=None):
+        """
+        Devuelve la figura (2×P) o pila de figuras (M×2×P) con la fila de unos añadida
+        
+        Una FiguraHomogenea ya la tiene: se devuelve sin copiar (salvo cambio de dtype).
+        """
+        if isinstance(figura, FiguraHomogenea):
+            return figura.homogenea if dtype is None else figura.homogenea.astype(dtype, copy=False)
+        puntos = np.asarray(figura)
+        dtype = np.dtype(dtype if dtype is not None else np.result_type(puntos, float))
+        homogenea = np.empty(puntos.shape[:-2] + (3, puntos.shape[-1]), dtype=dtype)
+        homogenea[..., :2, :] = puntos
+        homogenea[..., 2, :] = 1
+        return homogenea
+    
+    def registrar_figura(self, figura, dtype=np.float64):
+        """Registra una figura para transformarla muchas veces (ver FiguraHomogenea)"""
+        return FiguraHomogenea(figura, dtype)
     
     def aplicar_transformacion(self, figura, matriz):
         """Aplica una transformación a la figura usando coordenadas homogéneas"""
+        if isinstance(figura, FiguraHomogenea):
+            # Figura registrada: la fila de unos ya está añadida
+            return (matriz @ figura.homogenea)[:2, :]
+        
         # Convertir a coordenadas homogéneas
         figura_homogenea = np.vstack([figura, np.ones(figura.shape[1])])
         
@@ -69,6 +181,32 @@ class TransformacionesBasicas:
         # Retornar coordenadas cartesianas
         return figura_transformada[:2, :]
     
+    def aplicar_transformaciones(self, figuras, matrices, dtype=np.float64):
+        """
+        Aplica una pila de N matrices a M figuras en una sola llamada a einsum
+        
+        Args:
+            figuras: Una figura (2×P), M figuras con el mismo número de vértices
+                (M×2×P) o una FiguraHomogenea registrada con registrar_figura
+            matrices: Una matriz (3×3) o una pila de matrices (N×3×3, o con más
+                ejes iniciales, p. ej. figuras × frames × 3 × 3)
+            dtype: np.float64 o np.float32 (mitad de memoria para simulaciones grandes)
+        
+        Returns:
+            ndarray: Vértices transformados N×M×2×P (los ejes iniciales de las
+            matrices seguidos del eje de figuras); sin el eje N o M si se pasó
+            una sola matriz o una sola figura
+        """
+        homogeneas = self.coordenadas_homogeneas(figuras, dtype)
+        
+        # Solo las dos primeras filas: la tercera de una matriz afín siempre da 1
+        filas = np.asarray(matrices, dtype=dtype)[..., :2, :]
+        
+        # optimize=True reduce el einsum a un único producto de matrices (BLAS)
+        # de (N·2)×3 por 3×(M·P), en lugar de N·M productos diminutos
+        eje_m = 'm' if homogeneas.ndim == 3 else ''
+        return np.einsum(f'...ij,{eje_m}jp->...{eje_m}ip', filas, homogeneas, optimize=True)
+    
     def dibujar_figura(self, figura, color='blue', alpha=0.7, label=''):
         """Dibuja una figura en el plot actual"""
         # Crear polígono para visualización
@@ -113,6 +251,66 @@ class TransformacionesBasicas:
         plt.tight_layout()
         return self.fig
     
+    def parametros_animacion(self, t):
+        """
+        Parámetros de las cuatro animaciones en el tiempo normalizado t
+        
+        t puede ser un escalar (un frame) o un arreglo (toda la línea de tiempo).
+        """
+        return {
+            # Animación 1: Traslación circular
+            'tx': 1.5 * np.cos(2 * np.pi * t),
+            'ty': 1.5 * np.sin(2 * np.pi * t),
+            # Animación 2: Rotación continua (2 vueltas completas)
+            'angulo': 2 * np.pi * t * 2,
+            # Animación 3: Escala oscilante entre 0.5 y 1.5
+            'escala': 1 + 0.5 * np.sin(2 * np.pi * t * 3),
+            # Animación 4: Traslación senoidal + rotación + escala variable
+            'tx_comp': 0.8 * np.sin(2 * np.pi * t),
+            'ty_comp': 0.5 * np.cos(2 * np.pi * t * 1.5),
+            'angulo_comp': np.pi * t,
+            'escala_comp': 0.8 + 0.4 * np.sin(2 * np.pi * t * 2),
+        }
+    
+    def matrices_animacion(self, frames=100, dtype=np.float64):
+        """
+        Precalcula la línea de tiempo completa en una sola llamada vectorizada
+        
+        Returns:
+            dict: Pilas frames×3×3 para 'traslacion', 'rotacion', 'escala' y 'compuesta'
+        """
+        # Mismo tiempo normalizado que animacion_frame: t = frame / 100
+        t = np.arange(frames, dtype=dtype) / 100.0
+        p = self.parametros_animacion(t)
+        return {
+            'traslacion': self.matriz_traslacion(p['tx'], p['ty']),
+            'rotacion': self.matriz_rotacion(p['angulo']),
+            'escala': self.matriz_escala(p['escala'], p['escala']),
+            'compuesta': self.matriz_trs(p['tx_comp'], p['ty_comp'], p['angulo_comp'], p['escala_comp']),
+        }
+    
+    def linea_de_tiempo(self, frames=100, dtype=np.float64):
+        """
+        Precalcula los vértices de las figuras animadas en todos los frames
+        
+        Returns:
+            ndarray: frames × len(FIGURAS_ANIMADAS) × P × 2, listo para Polygon.set_xy
+        """
+        matrices = self.matrices_animacion(frames, dtype)
+        pila = np.stack([matrices[clave] for clave, *_ in self.FIGURAS_ANIMADAS])
+        vertices = self.aplicar_transformaciones(self.figura_registrada, pila, dtype)
+        return np.ascontiguousarray(vertices.transpose(1, 0, 3, 2))
+    
+    def texto_informacion(self, frame, frames=100):
+        """Texto con el tiempo y los parámetros de las animaciones simples en un frame"""
+        t = frame / 100.0
+        p = self.parametros_animacion(t)
+        info_text = f"Frame {frame}/{frames} (t={t:.2f})\n"
+        info_text += f"Traslación: ({p['tx']:.2f}, {p['ty']:.2f})\n"
+        info_text += f"Rotación: {np.degrees(p['angulo']):.1f}°\n"
+        info_text += f"Escala: {p['escala']:.2f}"
+        return info_text
+    
     def animacion_frame(self, frame):
         """Función para generar cada frame de la animación"""
         self.ax.clear()
@@ -123,43 +321,31 @@ class TransformacionesBasicas:
         
         # Parámetro de tiempo normalizado (0 a 1)
         t = frame / 100.0
+        p = self.parametros_animacion(t)
+        tx, ty, angulo, escala = p['tx'], p['ty'], p['angulo'], p['escala']
         
         # Figura original (siempre visible con transparencia)
         self.dibujar_figura(self.figura_original, 'lightgray', 0.2, 'Original')
         
         # Animación 1: Traslación circular
-        tx = 1.5 * np.cos(2 * np.pi * t)
-        ty = 1.5 * np.sin(2 * np.pi * t)
         matriz_t = self.matriz_traslacion(tx, ty)
-        figura_trasladada = self.aplicar_transformacion(self.figura_original, matriz_t)
+        figura_trasladada = self.aplicar_transformacion(self.figura_registrada, matriz_t)
         self.dibujar_figura(figura_trasladada, 'red', 0.8, 'Traslación circular')
         
         # Animación 2: Rotación continua
-        angulo = 2 * np.pi * t * 2  # 2 vueltas completas
         matriz_r = self.matriz_rotacion(angulo)
-        figura_rotada = self.aplicar_transformacion(self.figura_original, matriz_r)
+        figura_rotada = self.aplicar_transformacion(self.figura_registrada, matriz_r)
         self.dibujar_figura(figura_rotada, 'green', 0.8, 'Rotación continua')
         
         # Animación 3: Escala oscilante
-        escala = 1 + 0.5 * np.sin(2 * np.pi * t * 3)  # Oscila entre 0.5 y 1.5
         matriz_s = self.matriz_escala(escala, escala)
-        figura_escalada = self.aplicar_transformacion(self.figura_original, matriz_s)
+        figura_escalada = self.aplicar_transformacion(self.figura_registrada, matriz_s)
         self.dibujar_figura(figura_escalada, 'orange', 0.8, 'Escala oscilante')
         
         # Animación 4: Transformación compuesta compleja
-        # Traslación senoidal + rotación + escala variable
-        tx_comp = 0.8 * np.sin(2 * np.pi * t)
-        ty_comp = 0.5 * np.cos(2 * np.pi * t * 1.5)
-        angulo_comp = np.pi * t
-        escala_comp = 0.8 + 0.4 * np.sin(2 * np.pi * t * 2)
-        
-        matriz_t_comp = self.matriz_traslacion(tx_comp, ty_comp)
-        matriz_r_comp = self.matriz_rotacion(angulo_comp)
-        matriz_s_comp = self.matriz_escala(escala_comp, escala_comp)
-        
-        # Aplicar transformaciones en orden: escala -> rotación -> traslación
-        matriz_compuesta = matriz_t_comp @ matriz_r_comp @ matriz_s_comp
-        figura_compuesta = self.aplicar_transformacion(self.figura_original, matriz_compuesta)
+        # Traslación senoidal + rotación + escala variable, en orden: escala -> rotación -> traslación
+        matriz_compuesta = self.matriz_trs(p['tx_comp'], p['ty_comp'], p['angulo_comp'], p['escala_comp'])
+        figura_compuesta = self.aplicar_transformacion(self.figura_registrada, matriz_compuesta)
         self.dibujar_figura(figura_compuesta, 'purple', 0.9, 'Compuesta compleja')
         
         self.ax.set_title(f'Transformaciones Animadas - Frame {frame}/100 (t={t:.2f})')
@@ -174,10 +360,21 @@ class TransformacionesBasicas:
         self.ax.text(-2.8, 2.5, info_text, fontsize=9, 
                     bbox=dict(boxstyle="round,pad=0.3", facecolor="lightblue", alpha=0.8))
     
-    def crear_animacion(self, frames=100, intervalo=50):
-        """Crea y guarda la animación"""
+    def crear_animacion(self, frames=100, intervalo=50, precalculada=False):
+        """
+        Crea la animación
+        
+        Args:
+            frames (int): Número de frames
+            intervalo (int): Milisegundos entre frames
+            precalculada (bool): Precalcular la línea de tiempo y crear los artistas
+                una sola vez (con blitting) en lugar de redibujar todo cada frame
+        """
         print("Creando animación...")
         
+        if precalculada:
+            return self._crear_animacion_precalculada(frames, intervalo)
+        
         # Crear animación
         anim = animation.FuncAnimation(
             self.fig, self.animacion_frame, frames=frames, 
@@ -186,6 +383,48 @@ class TransformacionesBasicas:
         
         return anim
     
+    def _crear_animacion_precalculada(self, frames, intervalo):
+        """
+        Animación con todos los vértices precalculados y artistas creados una vez
+        
+        Cada frame solo actualiza los vértices de los polígonos y el texto
+        informativo, así que admite blitting y el coste por frame no crece
+        con el número de frames.
+        """
+        vertices = self.linea_de_tiempo(frames)
+        
+        # Escena estática: ejes, rejilla, figura original y leyenda
+        self.ax.clear()
+        self.ax.set_xlim(-3, 3)
+        self.ax.set_ylim(-3, 3)
+        self.ax.set_aspect('equal')
+        self.ax.grid(True, alpha=0.3)
+        self.ax.set_title('Transformaciones Animadas')
+        self.dibujar_figura(self.figura_original, 'lightgray', 0.2, 'Original')
+        
+        # Artistas animados, creados una sola vez
+        poligonos = []
+        for i, (_, color, alpha, etiqueta) in enumerate(self.FIGURAS_ANIMADAS):
+            poligono = Polygon(vertices[0, i], closed=True, fill=True,
+                               facecolor=color, alpha=alpha, edgecolor='black', label=etiqueta)
+            self.ax.add_patch(poligono)
+            poligonos.append(poligono)
+        self.ax.legend(loc='upper right', bbox_to_anchor=(1.15, 1))
+        info = self.ax.text(-2.8, 2.5, '', fontsize=9, va='top',
+                            bbox=dict(boxstyle="round,pad=0.3", facecolor="lightblue", alpha=0.8))
+        artistas = (*poligonos, info)
+        
+        def actualizar(frame):
+            for poligono, xy in zip(poligonos, vertices[frame]):
+                poligono.set_xy(xy)
+            info.set_text(self.texto_informacion(frame, frames))
+            return artistas
+        
+        return animation.FuncAnimation(
+            self.fig, actualizar, frames=frames, init_func=lambda: actualizar(0),
+            interval=intervalo, repeat=True, blit=True
+        )
+    
     def guardar_gif(self, anim, nombre_archivo='transformaciones_animadas.gif'):
         """Guarda la animación como GIF"""
         print(f"Guardando GIF: {nombre_archivo}")
@@ -200,6 +439,374 @@ class TransformacionesBasicas:
         print(f"GIF guardado en: {ruta_completa}")
         return ruta_completa
 
+    def _a_pixeles(self, puntos, tamano):
+        """Convierte puntos (..., 2) del plano a píxeles en punto fijo para cv2 (eje y hacia abajo)"""
+        escala = tamano / (2 * LIMITE) * (1 << SUBPIXEL_BITS)
+        pixeles = np.empty(puntos.shape, dtype=np.float64)
+        pixeles[..., 0] = (puntos[..., 0] + LIMITE) * escala
+        pixeles[..., 1] = (LIMITE - puntos[..., 1]) * escala
+        return np.round(pixeles).astype(np.int32)
+    
+    def _rellenar_poligono(self, lienzo, puntos, color, alpha):
+        """Rellena un polígono (punto fijo) con transparencia, mezclando solo su rectángulo envolvente"""
+        import cv2
+        
+        x, y, ancho, alto = cv2.boundingRect(puntos >> SUBPIXEL_BITS)
+        x0, y0 = max(x - 1, 0), max(y - 1, 0)
+        x1, y1 = min(x + ancho + 2, lienzo.shape[1]), min(y + alto + 2, lienzo.shape[0])
+        if x0 >= x1 or y0 >= y1:
+            return
+        
+        region = lienzo[y0:y1, x0:x1]
+        capa = region.copy()
+        desplazado = puntos - np.array([x0, y0], dtype=np.int32) * (1 << SUBPIXEL_BITS)
+        cv2.fillPoly(capa, [desplazado], color, cv2.LINE_AA, shift=SUBPIXEL_BITS)
+        cv2.polylines(capa, [desplazado], True, (0, 0, 0), 1, cv2.LINE_AA, shift=SUBPIXEL_BITS)
+        cv2.addWeighted(capa, alpha, region, 1 - alpha, 0, dst=region)
+    
+    def _fondo_raster(self, tamano):
+        """Fondo estático del exportador: rejilla, figura original, título y leyenda (RGB)"""
+        import cv2
+        
+        fondo = np.full((tamano, tamano, 3), 255, dtype=np.uint8)
+        fuente = cv2.FONT_HERSHEY_SIMPLEX
+        escala = tamano / 800
+        
+        # Rejilla en cada unidad y ejes en 0
+        for valor in np.arange(-LIMITE + 1, LIMITE):
+            px = int(round((valor + LIMITE) * tamano / (2 * LIMITE)))
+            gris = (180, 180, 180) if valor == 0 else (225, 225, 225)
+            cv2.line(fondo, (px, 0), (px, tamano - 1), gris, 1)
+            cv2.line(fondo, (0, px), (tamano - 1, px), gris, 1)
+        
+        self._rellenar_poligono(fondo, self._a_pixeles(self.figura_original.T, tamano),
+                                tuple(int(255 * c) for c in to_rgb('lightgray')), 0.2)
+        
+        cv2.putText(fondo, 'Transformaciones Animadas', (int(10 * escala), int(30 * escala)),
+                    fuente, 0.8 * escala, (0, 0, 0), max(int(2 * escala), 1), cv2.LINE_AA)
+        
+        # Leyenda en la esquina superior derecha
+        x = tamano - int(250 * escala)
+        for i, (_, color, _, etiqueta) in enumerate(self.FIGURAS_ANIMADAS):
+            y = int((30 + 24 * i) * escala)
+            rgb = tuple(int(255 * c) for c in to_rgb(color))
+            cv2.rectangle(fondo, (x, y - int(12 * escala)), (x + int(20 * escala), y), rgb, -1)
+            cv2.putText(fondo, texto_ascii(etiqueta), (x + int(28 * escala), y), fuente,
+                        0.5 * escala, (0, 0, 0), 1, cv2.LINE_AA)
+        return fondo
+    
+    def _dibujar_frame(self, lienzo, fondo, vertices, colores, frame, frames):
+        """Dibuja un frame del exportador sobre lienzo: fondo, polígonos y cuadro de información"""
+        import cv2
+        
+        np.copyto(lienzo, fondo)
+        for puntos, (color, alpha) in zip(vertices[frame], colores):
+            self._rellenar_poligono(lienzo, puntos, color, alpha)
+        
+        escala = lienzo.shape[0] / 800
+        lineas = texto_ascii(self.texto_informacion(frame, frames)).split('\n')
+        x, y, paso = int(20 * escala), int(60 * escala), int(20 * escala)
+        cv2.rectangle(lienzo, (x - 6, y - int(18 * escala)),
+                      (x + int(230 * escala), y + paso * len(lineas) - int(10 * escala)),
+                      (173, 216, 230), -1)
+        for i, linea in enumerate(lineas):
+            cv2.putText(lienzo, linea, (x, y + paso * i), cv2.FONT_HERSHEY_SIMPLEX,
+                        0.5 * escala, (0, 0, 0), 1, cv2.LINE_AA)
+        return lienzo
+    
+    def exportar_animacion(self, nombre_archivo='hola_mundo_transformaciones_python.gif',
+                           frames=100, fps=20, tamano=800, directorio='../resultados'):
+        """
+        Exporta la animación rasterizando los polígonos directamente con OpenCV
+        
+        No pasa por matplotlib: los vértices se precalculan con linea_de_tiempo,
+        cada frame se dibuja con cv2.fillPoly (antialiasing y coordenadas
+        subpíxel) sobre un fondo estático y se envía al escritor en cuanto está
+        listo, sin acumular frames en memoria. .gif se escribe con
+        GifStreamWriter (paleta única para todos los frames, cada frame se
+        escribe al indexarlo); .mp4 y .avi con cv2.VideoWriter.
+        
+        Args:
+            nombre_archivo (str): Archivo de salida (.gif, .mp4 o .avi)
+            frames (int): Número de frames
+            fps (int): Frames por segundo
+            tamano (int): Lado del video en píxeles
+            directorio (str): Directorio de salida
+        
+        Returns:
+            str: Ruta del archivo generado
+        """
+        import cv2  # Import diferido: solo el exportador rasterizado lo necesita
+        
+        print(f"Exportando animación: {nombre_archivo}")
+        os.makedirs(directorio, exist_ok=True)
+        ruta_completa = os.path.join(directorio, nombre_archivo)
+        
+        vertices = self._a_pixeles(self.linea_de_tiempo(frames), tamano)
+        colores = [(tuple(int(255 * c) for c in to_rgb(color)), alpha)
+                   for _, color, alpha, _ in self.FIGURAS_ANIMADAS]
+        fondo = self._fondo_raster(tamano)
+        lienzo = np.empty_like(fondo)
+        
+        extension = os.path.splitext(nombre_archivo)[1].lower()
+        if extension == '.gif':
+            # Paleta calculada una sola vez con cuatro frames de muestra repartidos en el tiempo
+            muestra = np.vstack([self._dibujar_frame(lienzo, fondo, vertices, colores, f, frames).copy()
+                                 for f in np.linspace(0, frames - 1, 4).astype(int)])
+            if str(COMUN) not in sys.path:
+                sys.path.insert(0, str(COMUN))
+            from pipeline_comun import GifStreamWriter  # Import diferido, como cv2
+            
+            escritor = GifStreamWriter(ruta_completa, fps=fps, palette_sample=muestra)
+            escribir, cerrar = escritor.add_frame, escritor.close
+        else:
+            fourcc = cv2.VideoWriter_fourcc(*('MJPG' if extension == '.avi' else 'mp4v'))
+            escritor = cv2.VideoWriter(ruta_completa, fourcc, fps, (tamano, tamano))
+            if not escritor.isOpened():
+                raise IOError(f"No se pudo abrir el video de salida: {ruta_completa}")
+            bgr = np.empty_like(fondo)
+            escribir = lambda rgb: escritor.write(cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR, dst=bgr))
+            cerrar = escritor.release
+        
+        try:
+            for frame in range(frames):
+                escribir(self._dibujar_frame(lienzo, fondo, vertices, colores, frame, frames))
+        finally:
+            cerrar()
+        
+        print(f"Animación guardada en: {ruta_completa}")
+        return ruta_completa
+
+class GrafoEscena:
+    """
+    Grafo de escena 2D: nodos con transformación local TRS y jerarquía padre/hijo
+    
+    Los nodos se guardan como estructura de arreglos (un índice por nodo) y los
+    polígonos de todos los nodos en un único arreglo contiguo 3×V de
+    coordenadas homogéneas, con un offset por nodo. Las matrices de mundo se
+    memorizan: cambiar la TRS de un nodo lo marca sucio y actualizar() solo
+    recalcula ese nodo y sus descendientes, nivel por nivel y en lote.
+    transformar() multiplica el bloque contiguo de vértices de cada nodo por
+    su matriz de mundo; los nodos consecutivos con el mismo número de vértices
+    se multiplican juntos en un solo producto por lotes.
+    """
+    
+    # Columnas de la tabla de parámetros locales
+    TX, TY, ANGULO, SX, SY = range(5)
+    
+    def __init__(self, dtype=np.float64, capacidad=64):
+        """
+        Args:
+            dtype: np.float64 o np.float32
+            capacidad (int): Nodos y vértices reservados inicialmente (crecen al doble)
+        """
+        self.dtype = np.dtype(dtype)
+        self.nodos = 0
+        self.nombres = []
+        self.recalculados = 0
+        
+        self.padre = np.empty(capacidad, dtype=np.intp)
+        self.nivel = np.empty(capacidad, dtype=np.intp)
+        self.trs = np.empty((capacidad, 5), dtype=self.dtype)
+        self.local = np.empty((capacidad, 3, 3), dtype=self.dtype)
+        self.mundo = np.empty((capacidad, 3, 3), dtype=self.dtype)
+        self._local_sucio = np.zeros(capacidad, dtype=bool)
+        
+        # Vértices de todos los nodos: columnas offsets[i]:offsets[i + 1] del nodo i
+        self.offsets = [0]
+        self._vertices = np.empty((3, capacidad), dtype=self.dtype)
+        self._niveles = None
+        self._bloques = None
+        self._salida = None
+    
+    @property
+    def vertices(self):
+        """Número total de vértices de la escena"""
+        return self.offsets[-1]
+    
+    def _crecer(self, arreglo, necesario, eje=0):
+        """Duplica la capacidad de un arreglo a lo largo de eje hasta que quepan necesario elementos"""
+        capacidad = arreglo.shape[eje]
+        if necesario <= capacidad:
+            return arreglo
+        while capacidad < necesario:
+            capacidad *= 2
+        forma = list(arreglo.shape)
+        forma[eje] = capacidad
+        nuevo = np.zeros(forma, dtype=arreglo.dtype)
+        nuevo[(slice(None),) * eje + (slice(0, arreglo.shape[eje]),)] = arreglo
+        return nuevo
+    
+    def agregar_nodo(self, vertices=None, padre=None, tx=0.0, ty=0.0, angulo=0.0,
+                     sx=1.0, sy=None, nombre=None):
+        """
+        Añade un nodo a la escena
+        
+        Args:
+            vertices: Polígono en coordenadas locales (2×P), o None para un nodo
+                de agrupación sin geometría
+            padre (int): Índice del nodo padre (None = raíz); debe existir ya
+            tx, ty, angulo, sx, sy: Transformación local T(tx, ty) · R(angulo) · S(sx, sy)
+            nombre (str): Nombre opcional del nodo
+        
+        Returns:
+            int: Índice del nodo
+        """
+        if padre is not None and not 0 <= padre < self.nodos:
+            raise IndexError(f"Nodo padre inexistente: {padre}")
+        
+        i = self.nodos
+        self.padre = self._crecer(self.padre, i + 1)
+        self.nivel = self._crecer(self.nivel, i + 1)
+        self.trs = self._crecer(self.trs, i + 1)
+        self.local = self._crecer(self.local, i + 1)
+        self.mundo = self._crecer(self.mundo, i + 1)
+        self._local_sucio = self._crecer(self._local_sucio, i + 1)
+        
+        self.padre[i] = -1 if padre is None else padre
+        self.nivel[i] = 0 if padre is None else self.nivel[padre] + 1
+        self.trs[i] = (tx, ty, angulo, sx, sx if sy is None else sy)
+        self._local_sucio[i] = True
+        self.nombres.append(nombre if nombre is not None else f"nodo_{i}")
+        self.nodos += 1
+        self._niveles = None
+        self._bloques = None
+        
+        # Geometría: se copia al final del arreglo contiguo de vértices
+        inicio = self.offsets[-1]
+        puntos = np.zeros((2, 0)) if vertices is None else np.asarray(vertices)
+        fin = inicio + puntos.shape[1]
+        self._vertices = self._crecer(self._vertices, fin, eje=1)
+        self._vertices[:2, inicio:fin] = puntos
+        self._vertices[2, inicio:fin] = 1
+        self.offsets.append(fin)
+        return i
+    
+    def fijar_trs(self, nodos, tx=None, ty=None, angulo=None, sx=None, sy=None):
+        """
+        Cambia la transformación local de uno o varios nodos y los marca sucios
+        
+        Args:
+            nodos: Índice o arreglo de índices
+            tx, ty, angulo, sx, sy: Nuevos valores (escalares o un valor por nodo);
+                los que se dejan en None no cambian
+        """
+        nodos = np.asarray(nodos, dtype=np.intp)
+        for columna, valor in ((self.TX, tx), (self.TY, ty), (self.ANGULO, angulo),
+                               (self.SX, sx), (self.SY, sy)):
+            if valor is not None:
+                self.trs[nodos, columna] = valor
+        self._local_sucio[nodos] = True
+    
+    def _indices_por_nivel(self):
+        """Índices de los nodos agrupados por profundidad (memorizado hasta añadir un nodo)"""
+        if self._niveles is None:
+            nivel = self.nivel[:self.nodos]
+            orden = np.argsort(nivel, kind='stable')
+            cortes = np.flatnonzero(np.diff(nivel[orden])) + 1
+            self._niveles = np.split(orden, cortes)
+        return self._niveles
+    
+    def _bloques_de_vertices(self):
+        """
+        Tramos de nodos consecutivos con geometría y el mismo número de vértices
+        
+        Los vértices de un tramo ocupan columnas contiguas (los nodos sin
+        geometría no ocupan ninguna). Memorizado hasta añadir un nodo.
+        
+        Returns:
+            list: Tuplas (índices de los nodos, primera columna, vértices por nodo)
+        """
+        if self._bloques is None:
+            conteos = np.diff(self.offsets)
+            con_geometria = np.flatnonzero(conteos)
+            cortes = np.flatnonzero(np.diff(conteos[con_geometria])) + 1
+            self._bloques = [(nodos, self.offsets[nodos[0]], int(conteos[nodos[0]]))
+                             for nodos in np.split(con_geometria, cortes) if len(nodos)]
+        return self._bloques
+    
+    def actualizar(self):
+        """
+        Recalcula las matrices de mundo de los nodos sucios y de sus descendientes
+        
+        Returns:
+            int: Número de matrices de mundo recalculadas
+        """
+        n = self.nodos
+        local_sucio = self._local_sucio[:n]
+        if not local_sucio.any():
+            return 0
+        
+        # Matrices locales de los nodos cuya TRS cambió: T · R · S escrita en su lugar
+        cambiados = np.flatnonzero(local_sucio)
+        tx, ty, angulo, sx, sy = self.trs[cambiados].T
+        cos_a, sin_a = np.cos(angulo), np.sin(angulo)
+        local = self.local[cambiados]
+        local[:, 0, 0] = sx * cos_a
+        local[:, 0, 1] = -sy * sin_a
+        local[:, 0, 2] = tx
+        local[:, 1, 0] = sx * sin_a
+        local[:, 1, 1] = sy * cos_a
+        local[:, 1, 2] = ty
+        local[:, 2] = (0, 0, 1)
+        self.local[cambiados] = local
+        
+        # La suciedad baja por la jerarquía; cada nivel se recalcula en lote con su padre
+        sucio = local_sucio.copy()
+        recalculados = 0
+        for nivel, indices in enumerate(self._indices_por_nivel()):
+            if nivel > 0:
+                sucio[indices] |= sucio[self.padre[indices]]
+            indices = indices[sucio[indices]]
+            if len(indices) == 0:
+                continue
+            if nivel == 0:
+                self.mundo[indices] = self.local[indices]
+            else:
+                self.mundo[indices] = self.mundo[self.padre[indices]] @ self.local[indices]
+            recalculados += len(indices)
+        
+        local_sucio[:] = False
+        self.recalculados += recalculados
+        return recalculados
+    
+    def transformar(self):
+        """
+        Lleva todos los vértices de la escena a coordenadas de mundo
+        
+        Returns:
+            ndarray: Vértices 2×V en el orden de los offsets; el arreglo se
+            reutiliza en la siguiente llamada (copiarlo si hay que conservarlo,
+            no modificarlo)
+        """
+        v = self.vertices
+        if self.actualizar() == 0 and self._salida is not None and self._salida.shape[1] == v:
+            return self._salida  # Ninguna matriz cambió: los vértices de la última pasada siguen valiendo
+        if self._salida is None or self._salida.shape[1] != v:
+            self._salida = np.empty((2, v), dtype=self.dtype)
+        
+        # Cada tramo es un producto por lotes K×2×3 @ K×3×P: vértices y salida se ven
+        # como K bloques de P columnas (vistas, sin copiar vértices)
+        for nodos, inicio, p in self._bloques_de_vertices():
+            k = len(nodos)
+            fin = inicio + k * p
+            bloques = self._vertices[:, inicio:fin].reshape(3, k, p).transpose(1, 0, 2)
+            salida = self._salida[:, inicio:fin].reshape(2, k, p).transpose(1, 0, 2)
+            np.matmul(self.mundo[nodos, :2, :], bloques, out=salida)
+        return self._salida
+    
+    def poligonos(self, transformados=None):
+        """
+        Lista de polígonos 2×P (vistas, sin copia) de los nodos con geometría
+        
+        Args:
+            transformados: Resultado de transformar() (None = lo calcula)
+        """
+        if transformados is None:
+            transformados = self.transformar()
+        return [transformados[:, inicio:fin]
+                for inicio, fin in zip(self.offsets[:-1], self.offsets[1:]) if fin > inicio]
+
 def main():
     """Función principal que ejecuta todas las demostraciones"""
     print("=== Taller 0: Transformaciones Básicas en Python ===")
@@ -216,11 +823,11 @@ def main():
     
     # 2. Crear y mostrar animación
     print("\n2. Creando animación de transformaciones...")
-    anim = transformaciones.crear_animacion(frames=100, intervalo=50)
+    anim = transformaciones.crear_animacion(frames=100, intervalo=50, precalculada=True)
     
-    # 3. Guardar como GIF
+    # 3. Guardar como GIF (rasterizado directo con OpenCV, sin volver a renderizar con matplotlib)
     print("\n3. Guardando animación como GIF...")
-    ruta_gif = transformaciones.guardar_gif(anim, 'hola_mundo_transformaciones_python.gif')
+    ruta_gif = transformaciones.exportar_animacion('hola_mundo_transformaciones_python.gif', frames=100)
     
     # Mostrar la animación (opcional - comentar si no se quiere mostrar)
     print("\n4. Mostrando animación...")
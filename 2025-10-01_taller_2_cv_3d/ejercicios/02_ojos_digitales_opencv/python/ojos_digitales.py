@@ -8,23 +8,311 @@ Implementa conversión a gris, blur/sharpen, Sobel X/Y, Laplaciano, y comparaci
 
 import cv2
 import numpy as np
-import matplotlib.pyplot as plt
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from collections import Counter
+import argparse
+import glob
 import os
+import queue
+import sys
+import threading
+import time
+
+# Utilidades compartidas con los demás ejercicios del taller (ejercicios/comun)
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'comun'))
+from pipeline_comun import (BufferPool, ResultContainer, ResultWriter, StageProfiler,
+                            compose_grid, open_image_memmap, process_tiled, profiled_stage)
+
+# matplotlib se importa dentro de los métodos que dibujan figuras: las ejecuciones
+# solo de procesamiento (lote, streaming, teselas, --headless) arrancan sin él
+
+# Extensiones reconocidas al recorrer un directorio en modo lote
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff')
+
+# Kernel de enfoque
+SHARPEN_KERNEL = np.array([[-1, -1, -1],
+                           [-1,  9, -1],
+                           [-1, -1, -1]])
+
+def gradient_magnitude(gx, gy, dst=None):
+    """
+    Magnitud del gradiente sqrt(gx² + gy²) saturada a uint8
+    
+    Args:
+        gx, gy (ndarray): Derivadas CV_16S (p. ej. de cv2.spatialGradient)
+        dst (ndarray): Buffer uint8 de salida preasignado (opcional)
+    """
+    fx = gx.astype(np.float32)
+    cv2.magnitude(fx, gy.astype(np.float32), fx)
+    return cv2.convertScaleAbs(fx, dst=dst)
+
+def gradient_orientation(gx, gy, dst=None):
+    """
+    Orientación del gradiente (0-360°) reescalada a 0-255 en uint8
+    
+    Args:
+        gx, gy (ndarray): Derivadas CV_16S (p. ej. de cv2.spatialGradient)
+        dst (ndarray): Buffer uint8 de salida preasignado (opcional)
+    """
+    angle = cv2.phase(gx.astype(np.float32), gy.astype(np.float32), angleInDegrees=True)
+    return cv2.convertScaleAbs(angle, dst=dst, alpha=255.0 / 360.0)
+
+def _absolute_uint8(values, dst=None):
+    """np.uint8(np.absolute(values)) escribiendo en dst si se proporciona"""
+    np.absolute(values, out=values)
+    if dst is None:
+        return values.astype(np.uint8)
+    np.copyto(dst, values, casting='unsafe')
+    return dst
+
+GRADIENT_OUTPUTS = ('sobel_x', 'sobel_y', 'gradient_magnitude', 'gradient_orientation')
+
+def compute_gradients(gray, outputs=('sobel_x', 'sobel_y'), out=None):
+    """
+    Gradiente Sobel 3x3 fusionado: X e Y en una sola pasada (CV_16S)
+    
+    Evita los temporales float64 de cv2.Sobel(CV_64F) + np.absolute: las
+    derivadas se calculan en int16 con cv2.spatialGradient y se convierten a
+    uint8 (|valor| saturado) directamente en los buffers de salida.
+    
+    Args:
+        gray (ndarray): Imagen en escala de grises (uint8)
+        outputs (tuple): Subconjunto de GRADIENT_OUTPUTS a calcular
+        out (dict): Buffers uint8 preasignados por nombre; los que falten se
+            crean y se añaden al diccionario para poder reutilizarlos
+    
+    Returns:
+        dict: nombre -> imagen uint8 para cada salida pedida
+    """
+    out = {} if out is None else out
+    for name in outputs:
+        if name not in GRADIENT_OUTPUTS:
+            raise KeyError(f"Salida de gradiente desconocida: {name}")
+        if out.get(name) is None:
+            out[name] = np.empty(gray.shape, dtype=np.uint8)
+    
+    gx, gy = cv2.spatialGradient(gray)
+    
+    if 'sobel_x' in outputs:
+        cv2.convertScaleAbs(gx, dst=out['sobel_x'])
+    if 'sobel_y' in outputs:
+        cv2.convertScaleAbs(gy, dst=out['sobel_y'])
+    if 'gradient_magnitude' in outputs:
+        gradient_magnitude(gx, gy, dst=out['gradient_magnitude'])
+    if 'gradient_orientation' in outputs:
+        gradient_orientation(gx, gy, dst=out['gradient_orientation'])
+    
+    return {name: out[name] for name in outputs}
+
+# Grafo de filtros: nombre -> (entradas, función, usa_pool). 'original' es la imagen
+# BGR de entrada; los nodos sin grupo (p. ej. 'unsharp_gaussian') son intermedios.
+# Las funciones con usa_pool=True reciben dst=, un buffer uint8 del tamaño de la
+# primera entrada (o de su primer elemento, si es una tupla) tomado del BufferPool.
+FILTER_GRAPH = {
+    'grayscale': (('original',),
+                  lambda original, dst=None: cv2.cvtColor(original, cv2.COLOR_BGR2GRAY, dst=dst),
+                  True),
+    
+    # Desenfoque
+    'gaussian_blur': (('grayscale',),
+                      lambda gray, dst=None: cv2.GaussianBlur(gray, (15, 15), 0, dst=dst), True),
+    'average_blur': (('grayscale',),
+                     lambda gray, dst=None: cv2.blur(gray, (15, 15), dst=dst), True),
+    'bilateral_blur': (('grayscale',),
+                       lambda gray, dst=None: cv2.bilateralFilter(gray, 15, 80, 80, dst=dst), True),
+    
+    # Enfoque
+    'sharpen': (('grayscale',),
+                lambda gray, dst=None: cv2.filter2D(gray, -1, SHARPEN_KERNEL, dst=dst), True),
+    'unsharp_gaussian': (('grayscale',),
+                         lambda gray, dst=None: cv2.GaussianBlur(gray, (0, 0), 2.0, dst=dst), True),
+    'unsharp_masking': (('grayscale', 'unsharp_gaussian'),
+                        lambda gray, gaussian, dst=None:
+                            cv2.addWeighted(gray, 1.5, gaussian, -0.5, 0, dst=dst),
+                        True),
+    
+    # Bordes: Sobel X/Y en una sola pasada CV_16S (ver compute_gradients)
+    'gradients': (('grayscale',), cv2.spatialGradient, False),
+    'sobel_x': (('gradients',),
+                lambda gradients, dst=None: cv2.convertScaleAbs(gradients[0], dst=dst), True),
+    'sobel_y': (('gradients',),
+                lambda gradients, dst=None: cv2.convertScaleAbs(gradients[1], dst=dst), True),
+    'gradient_magnitude': (('gradients',),
+                           lambda gradients, dst=None: gradient_magnitude(*gradients, dst=dst),
+                           True),
+    'gradient_orientation': (('gradients',),
+                             lambda gradients, dst=None: gradient_orientation(*gradients, dst=dst),
+                             True),
+    'sobel_combined': (('sobel_x', 'sobel_y'),
+                       lambda sobel_x, sobel_y, dst=None:
+                           cv2.addWeighted(sobel_x, 0.5, sobel_y, 0.5, 0, dst=dst),
+                       True),
+    'laplacian': (('grayscale',),
+                  lambda gray, dst=None: _absolute_uint8(cv2.Laplacian(gray, cv2.CV_64F), dst),
+                  True),
+    'canny': (('grayscale',), lambda gray, dst=None: cv2.Canny(gray, 50, 150, edges=dst), True),
+}
+
+# Radio de cada nodo (píxeles de vecindad que necesita) para el modo por teselas.
+# Canny no aparece: su histéresis no es local y no se puede calcular por teselas.
+FILTER_RADIUS = {
+    'grayscale': 0,
+    'gaussian_blur': 7,
+    'average_blur': 7,
+    'bilateral_blur': 7,
+    'sharpen': 1,
+    'unsharp_gaussian': 6,
+    'unsharp_masking': 0,
+    'gradients': 1,
+    'sobel_x': 0,
+    'sobel_y': 0,
+    'gradient_magnitude': 0,
+    'gradient_orientation': 0,
+    'sobel_combined': 0,
+    'laplacian': 1,
+}
+
+COLLAGE_TITLE = 'Ojos Digitales - Comparación de Filtros y Bordes'
+
+BLUR_OUTPUTS = ['gaussian_blur', 'average_blur', 'bilateral_blur']
+SHARPEN_OUTPUTS = ['sharpen', 'unsharp_masking']
+EDGE_OUTPUTS = ['sobel_x', 'sobel_y', 'sobel_combined', 'laplacian', 'canny']
+ALL_OUTPUTS = ['grayscale'] + BLUR_OUTPUTS + SHARPEN_OUTPUTS + EDGE_OUTPUTS
+TILED_OUTPUTS = [name for name in ALL_OUTPUTS if name in FILTER_RADIUS]
+
+class FilterGraph:
+    """
+    Motor de evaluación perezosa de un grafo de filtros (DAG)
+    
+    Solo se calculan los ancestros de las salidas pedidas, cada nodo una única
+    vez, y cada intermedio se libera en cuanto su último consumidor terminó
+    (devolviendo su buffer al pool, si lo hay).
+    """
+    
+    def __init__(self, nodes=None, pool=None):
+        """
+        Args:
+            nodes (dict): nombre -> (entradas, función, usa_pool); por defecto FILTER_GRAPH
+            pool (BufferPool): Pool del que se toman los buffers de salida
+        """
+        self.nodes = FILTER_GRAPH if nodes is None else nodes
+        self.pool = pool
+        
+    def _call(self, name, args):
+        """Ejecuta un nodo, con un buffer dst= del pool si corresponde"""
+        _, func, pooled = self.nodes[name]
+        if self.pool is None or not pooled:
+            return func(*args)
+        first = args[0][0] if isinstance(args[0], tuple) else args[0]
+        return func(*args, dst=self.pool.acquire(first.shape[:2], np.uint8))
+        
+    def plan(self, outputs, available=()):
+        """Devuelve en orden topológico los nodos a calcular para obtener outputs"""
+        order = []
+        done = set(available)
+        visiting = set()
+        
+        def visit(name):
+            if name in done:
+                return
+            if name not in self.nodes:
+                raise KeyError(f"Filtro desconocido: {name}")
+            if name in visiting:
+                raise ValueError(f"Ciclo en el grafo de filtros en: {name}")
+            visiting.add(name)
+            for dep in self.nodes[name][0]:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+            order.append(name)
+        
+        for name in outputs:
+            visit(name)
+        return order
+        
+    def iter_outputs(self, values, outputs):
+        """
+        Genera (nombre, imagen) para cada salida pedida en cuanto está lista
+        
+        Args:
+            values (dict): Valores ya disponibles, como mínimo {'original': img}
+            outputs (list): Nombres de los nodos que se quieren obtener
+        """
+        values = dict(values)
+        outputs = list(dict.fromkeys(outputs))
+        order = self.plan(outputs, values)
+        
+        # Consumidores pendientes de cada valor dentro del plan
+        pending = Counter(dep for name in order for dep in self.nodes[name][0])
+        requested = set(outputs)
+        
+        for name in outputs:
+            if name not in order:
+                yield name, values[name]
+        
+        for name in order:
+            inputs = self.nodes[name][0]
+            values[name] = self._call(name, [values[dep] for dep in inputs])
+            
+            # Liberar las entradas que ya no tienen consumidores; los intermedios
+            # calculados aquí (no pedidos) devuelven su buffer al pool
+            for dep in inputs:
+                pending[dep] -= 1
+                if pending[dep] == 0:
+                    value = values.pop(dep)
+                    if self.pool is not None and dep in order and dep not in requested \
+                            and isinstance(value, np.ndarray):
+                        self.pool.release(value)
+            
+            if name in requested:
+                yield name, values[name]
+                if pending[name] == 0:
+                    del values[name]
+        
+    def evaluate(self, values, outputs):
+        """Calcula las salidas pedidas y las devuelve en un diccionario"""
+        return dict(self.iter_outputs(values, outputs))
+        
+    def halo(self, outputs):
+        """Radio acumulado (halo) necesario para calcular outputs por teselas"""
+        def radius(name):
+            if name not in self.nodes:
+                return 0
+            if name not in FILTER_RADIUS:
+                raise ValueError(f"El filtro '{name}' no se puede calcular por teselas")
+            return FILTER_RADIUS[name] + max((radius(dep) for dep in self.nodes[name][0]), default=0)
+        return max((radius(name) for name in outputs), default=0)
 
 class OjosDigitales:
-    def __init__(self, image_path):
+    def __init__(self, image_path, verbose=True, pool=None, profiler=None, writer=None):
         """
         Inicializa el procesador de imágenes con OpenCV
         
         Args:
             image_path (str): Ruta a la imagen de entrada
+            verbose (bool): Si es False no se imprime el progreso de cada etapa
+            pool (BufferPool): Pool de buffers compartido (por defecto, uno propio)
+            profiler (StageProfiler): Instrumentación por etapas (None = desactivada)
+            writer (ResultWriter): Escritor asíncrono compartido (None = uno temporal
+                por llamada a save_individual_results)
         """
         self.image_path = image_path
+        self.profiler = profiler
+        self.writer = writer
+        self.verbose = verbose
         self.original = None
         self.gray = None
         self.results = {}
+        self.pool = pool if pool is not None else BufferPool()
+        self.graph = FilterGraph(pool=self.pool)
         
+    def _log(self, message):
+        """Imprime un mensaje de progreso si el modo verbose está activo"""
+        if self.verbose:
+            print(message)
+        
+    @profiled_stage
     def load_image(self):
         """Carga la imagen original"""
         self.original = cv2.imread(self.image_path)
@@ -33,81 +321,73 @@ class OjosDigitales:
         
         # Convertir BGR a RGB para matplotlib
         self.original_rgb = cv2.cvtColor(self.original, cv2.COLOR_BGR2RGB)
-        print(f"Imagen cargada: {self.original.shape}")
+        self._log(f"Imagen cargada: {self.original.shape}")
+        
+    def compute_outputs(self, outputs):
+        """
+        Calcula solo los resultados pedidos (y sus ancestros) con el grafo de filtros
+        
+        Args:
+            outputs (list): Nombres de nodos de FILTER_GRAPH, p. ej. ['canny']
+        """
+        values = {'original': self.original}
+        if self.gray is not None:
+            values['grayscale'] = self.gray
+        
+        for name, img in self.graph.iter_outputs(values, outputs):
+            self.results[name] = img
+        
+        if 'grayscale' in self.results:
+            self.gray = self.results['grayscale']
+        return {name: self.results[name] for name in outputs}
+        
+    def release_results(self):
+        """
+        Devuelve al pool los buffers de todos los resultados y vacía self.results
         
+        Tras llamarlo, los arreglos entregados antes (p. ej. a un sink) pueden
+        sobrescribirse: quien necesite conservarlos debe copiarlos. Antes se
+        espera a las escrituras pendientes de self.writer, que leen esos buffers.
+        """
+        if self.writer is not None:
+            self.writer.flush()
+        for img in self.results.values():
+            self.pool.release(img)
+        self.results = {}
+        self.gray = None
+        
+    @profiled_stage
     def convert_to_grayscale(self):
         """Convierte la imagen a escala de grises"""
-        self.gray = cv2.cvtColor(self.original, cv2.COLOR_BGR2GRAY)
-        self.results['grayscale'] = self.gray
-        print("✓ Conversión a escala de grises completada")
+        # Siempre desde self.original (en streaming cambia en cada frame)
+        self.gray = None
+        self.compute_outputs(['grayscale'])
+        self._log("✓ Conversión a escala de grises completada")
         
+    @profiled_stage
     def apply_blur_filters(self):
         """Aplica diferentes tipos de filtros de desenfoque"""
-        # Blur gaussiano
-        gaussian_blur = cv2.GaussianBlur(self.gray, (15, 15), 0)
-        self.results['gaussian_blur'] = gaussian_blur
-        
-        # Blur promedio
-        average_blur = cv2.blur(self.gray, (15, 15))
-        self.results['average_blur'] = average_blur
-        
-        # Blur bilateral (preserva bordes)
-        bilateral_blur = cv2.bilateralFilter(self.gray, 15, 80, 80)
-        self.results['bilateral_blur'] = bilateral_blur
-        
-        print("✓ Filtros de desenfoque aplicados")
+        # Gaussiano, promedio y bilateral (preserva bordes)
+        self.compute_outputs(BLUR_OUTPUTS)
+        self._log("✓ Filtros de desenfoque aplicados")
         
+    @profiled_stage
     def apply_sharpen_filters(self):
         """Aplica filtros de enfoque/realce"""
-        # Kernel de enfoque
-        sharpen_kernel = np.array([[-1, -1, -1],
-                                   [-1,  9, -1],
-                                   [-1, -1, -1]])
-        sharpen = cv2.filter2D(self.gray, -1, sharpen_kernel)
-        self.results['sharpen'] = sharpen
-        
-        # Unsharp masking
-        gaussian = cv2.GaussianBlur(self.gray, (0, 0), 2.0)
-        unsharp = cv2.addWeighted(self.gray, 1.5, gaussian, -0.5, 0)
-        self.results['unsharp_masking'] = unsharp
-        
-        print("✓ Filtros de enfoque aplicados")
+        # Kernel de enfoque y unsharp masking
+        self.compute_outputs(SHARPEN_OUTPUTS)
+        self._log("✓ Filtros de enfoque aplicados")
         
+    @profiled_stage
     def apply_edge_detection(self):
         """Aplica diferentes métodos de detección de bordes"""
-        # Sobel X
-        sobel_x = cv2.Sobel(self.gray, cv2.CV_64F, 1, 0, ksize=3)
-        sobel_x = np.uint8(np.absolute(sobel_x))
-        self.results['sobel_x'] = sobel_x
-        
-        # Sobel Y
-        sobel_y = cv2.Sobel(self.gray, cv2.CV_64F, 0, 1, ksize=3)
-        sobel_y = np.uint8(np.absolute(sobel_y))
-        self.results['sobel_y'] = sobel_y
-        
-        # Sobel combinado
-        sobel_combined = cv2.addWeighted(sobel_x, 0.5, sobel_y, 0.5, 0)
-        self.results['sobel_combined'] = sobel_combined
-        
-        # Laplaciano
-        laplacian = cv2.Laplacian(self.gray, cv2.CV_64F)
-        laplacian = np.uint8(np.absolute(laplacian))
-        self.results['laplacian'] = laplacian
-        
-        # Canny
-        canny = cv2.Canny(self.gray, 50, 150)
-        self.results['canny'] = canny
+        # Sobel X/Y/combinado, Laplaciano y Canny
+        self.compute_outputs(EDGE_OUTPUTS)
+        self._log("✓ Detección de bordes completada")
         
-        print("✓ Detección de bordes completada")
-        
-    def create_comparison_collage(self, save_path=None):
-        """Crea un collage comparativo de todos los resultados"""
-        # Configurar la figura
-        fig, axes = plt.subplots(3, 4, figsize=(20, 15))
-        fig.suptitle('Ojos Digitales - Comparación de Filtros y Bordes', fontsize=20, fontweight='bold')
-        
-        # Lista de imágenes y títulos
-        images = [
+    def _collage_panels(self):
+        """Lista de (imagen, título) del collage comparativo"""
+        return [
             (self.original_rgb, 'Original'),
             (self.results['grayscale'], 'Escala de Grises'),
             (self.results['gaussian_blur'], 'Blur Gaussiano'),
@@ -122,6 +402,18 @@ class OjosDigitales:
             (self.results['average_blur'], 'Blur Promedio')
         ]
         
+    @profiled_stage
+    def create_comparison_collage(self, save_path=None):
+        """Crea un collage comparativo de todos los resultados"""
+        import matplotlib.pyplot as plt  # Import diferido: solo las figuras lo necesitan
+        
+        # Configurar la figura
+        fig, axes = plt.subplots(3, 4, figsize=(20, 15))
+        fig.suptitle(COLLAGE_TITLE, fontsize=20, fontweight='bold')
+        
+        # Lista de imágenes y títulos
+        images = self._collage_panels()
+        
         # Mostrar cada imagen
         for i, (img, title) in enumerate(images):
             row = i // 4
@@ -144,6 +436,17 @@ class OjosDigitales:
         
         plt.show()
         
+    @profiled_stage
+    def create_headless_collage(self, save_path=None):
+        """Crea el collage componiendo los arreglos con OpenCV (sin matplotlib)"""
+        canvas = compose_grid(self._collage_panels(), cols=4, title=COLLAGE_TITLE)
+        
+        if save_path:
+            cv2.imwrite(str(save_path), canvas)
+            self._log(f"✓ Collage guardado en: {save_path}")
+        
+        return canvas
+        
     def analyze_differences(self):
         """Analiza las diferencias entre los métodos de filtrado"""
         print("\n" + "="*60)
@@ -175,19 +478,75 @@ class OjosDigitales:
         print("   • Laplaciano: Sensible al ruido, detecta detalles finos")
         print("   • Canny: Más lento pero más preciso y robusto")
         
+    @profiled_stage
     def save_individual_results(self, output_dir):
-        """Guarda cada resultado individualmente"""
+        """
+        Guarda cada resultado individualmente
+        
+        Las escrituras se reparten entre los hilos de self.writer y continúan en
+        segundo plano hasta self.writer.flush(). Sin writer propio se usa uno
+        temporal y se espera a que termine antes de volver.
+        """
         output_path = Path(output_dir)
         output_path.mkdir(exist_ok=True)
         
+        writer = self.writer if self.writer is not None else ResultWriter()
         for name, img in self.results.items():
-            filename = f"{name}.png"
-            filepath = output_path / filename
-            cv2.imwrite(str(filepath), img)
-            print(f"✓ Guardado: {filepath}")
+            filepath = writer.submit(output_path / name, img)
+            self._log(f"✓ Guardado: {filepath}")
+        
+        if self.writer is None:
+            writer.close()
             
-    def run_complete_analysis(self, output_dir="resultados"):
-        """Ejecuta el análisis completo"""
+    @profiled_stage
+    def save_results_container(self, path, compress=True):
+        """
+        Guarda todos los resultados en un único contenedor .npz con índice
+        
+        Alternativa a save_individual_results que evita un archivo por
+        resultado; ver ResultContainer para leer capas sueltas.
+        
+        Args:
+            path (str): Ruta del .npz de salida
+            compress (bool): Deflate por capa (False = capas mapeables en memoria)
+        """
+        container = ResultContainer.write(path, self.results, compress)
+        self._log(f"✓ Contenedor guardado: {path} ({len(container.index)} capas)")
+        return container
+        
+    def run_processing(self, output_dir=None, outputs=None):
+        """
+        Ejecuta solo la cadena de procesamiento (sin collage ni análisis)
+        
+        Args:
+            output_dir (str): Directorio donde guardar los resultados; si es None
+                solo se calculan en memoria
+            outputs (list): Resultados a calcular; por defecto todos (ALL_OUTPUTS)
+        """
+        self.load_image()
+        if outputs is None:
+            self.convert_to_grayscale()
+            self.apply_blur_filters()
+            self.apply_sharpen_filters()
+            self.apply_edge_detection()
+        else:
+            self.compute_outputs(outputs)
+        
+        if output_dir is not None:
+            self.save_individual_results(output_dir)
+        
+        return self.results
+            
+    def run_complete_analysis(self, output_dir="resultados", headless=False, container=None):
+        """
+        Ejecuta el análisis completo
+        
+        Args:
+            output_dir (str): Directorio de resultados
+            headless (bool): Componer el collage con OpenCV, sin matplotlib ni ventanas
+            container (str): 'deflate' o 'stored' para guardar un único
+                resultados.npz en lugar de un PNG por resultado (None = PNGs)
+        """
         print("Iniciando análisis de Ojos Digitales...")
         print("="*50)
         
@@ -202,10 +561,17 @@ class OjosDigitales:
         
         # Crear collage
         collage_path = Path(output_dir) / "comparison_collage.png"
-        self.create_comparison_collage(str(collage_path))
-        
-        # Guardar resultados individuales
-        self.save_individual_results(output_dir)
+        if headless:
+            self.create_headless_collage(str(collage_path))
+        else:
+            self.create_comparison_collage(str(collage_path))
+        
+        # Guardar resultados: un archivo por resultado o un único contenedor
+        if container:
+            self.save_results_container(Path(output_dir) / "resultados.npz",
+                                        compress=container == 'deflate')
+        else:
+            self.save_individual_results(output_dir)
         
         # Análisis
         self.analyze_differences()
@@ -213,10 +579,389 @@ class OjosDigitales:
         print("\n" + "="*50)
         print("✓ Análisis completo finalizado!")
 
+def find_images(source):
+    """
+    Resuelve un directorio o un patrón glob a la lista ordenada de imágenes
+    
+    Args:
+        source (str): Directorio (se toman las imágenes de primer nivel) o patrón
+            glob, p. ej. "frames/**/*.png"
+    """
+    path = Path(source)
+    if path.is_dir():
+        candidates = [p for p in path.iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS]
+    else:
+        candidates = [Path(p) for p in glob.glob(str(source), recursive=True)]
+    return sorted(p for p in candidates if p.is_file())
+
+def batch_targets(images, output_dir):
+    """
+    Destino de los resultados de cada imagen del lote
+    
+    Se conserva la ruta relativa al directorio común de las imágenes (sin la
+    extensión), así que frames/a/0.png y frames/b/0.png van a <salida>/a/0 y
+    <salida>/b/0 en lugar de pisarse en <salida>/0.
+    
+    Raises:
+        ValueError: Si dos imágenes comparten destino (p. ej. 0.png y 0.jpg)
+    """
+    root = os.path.commonpath([str(Path(p).parent.resolve()) for p in images])
+    targets = {}
+    for image_path in images:
+        relative = Path(image_path).resolve().relative_to(root).with_suffix('')
+        target = Path(output_dir) / relative
+        if target in targets:
+            raise ValueError(f"Destino duplicado {target}: {targets[target]} y {image_path}")
+        targets[target] = image_path
+    return [(image_path, target) for target, image_path in targets.items()]
+
+# Pool de buffers y escritor de cada proceso del modo lote (se reutilizan entre imágenes)
+_batch_buffers = None
+_batch_writer = None
+
+def _init_batch_worker(writer_options):
+    """Inicializa cada proceso del pool"""
+    global _batch_buffers, _batch_writer
+    # Un solo hilo de OpenCV por proceso: el paralelismo lo aporta el pool,
+    # así se evita la sobresuscripción de núcleos
+    cv2.setNumThreads(1)
+    _batch_buffers = BufferPool()
+    # Dos hilos de escritura por proceso: codifican mientras el proceso sigue
+    _batch_writer = ResultWriter(workers=2, **writer_options)
+
+def _process_batch_image(task):
+    """Procesa una imagen dentro de un proceso del pool"""
+    image_path, target, outputs, container = task
+    ojos = OjosDigitales(str(image_path), verbose=False, pool=_batch_buffers, writer=_batch_writer)
+    try:
+        if container:
+            ojos.run_processing(None, outputs)
+            ojos.save_results_container(f"{target}.npz", compress=container == 'deflate')
+        else:
+            ojos.run_processing(str(target), outputs)
+            _batch_writer.flush()
+    except (ValueError, OSError, cv2.error) as e:
+        return image_path, str(e)
+    finally:
+        ojos.release_results()
+    return image_path, None
+
+def run_batch(source, output_dir, workers=None, outputs=None, writer_options=None, container=None):
+    """
+    Procesa en paralelo todas las imágenes de un directorio o patrón glob
+    
+    Cada imagen se procesa en un proceso del pool y sus resultados se guardan en
+    output_dir/<ruta_relativa>/ (o en output_dir/<ruta_relativa>.npz si se pide
+    contenedor) sin generar el collage de matplotlib. La ruta relativa se toma
+    desde el directorio común de las imágenes (ver batch_targets).
+    
+    Args:
+        source (str): Directorio o patrón glob con las imágenes de entrada
+        output_dir (str): Directorio raíz para los resultados
+        workers (int): Número de procesos (por defecto, uno por núcleo)
+        outputs (list): Resultados a calcular y guardar (por defecto, todos)
+        writer_options (dict): Argumentos de ResultWriter (formato, compresión)
+        container (str): 'deflate' o 'stored' para un .npz por imagen (None = PNGs)
+    
+    Returns:
+        dict: Estadísticas del lote (imágenes, errores, segundos, imágenes/seg)
+    """
+    images = find_images(source)
+    if not images:
+        raise ValueError(f"No se encontraron imágenes en: {source}")
+    targets = batch_targets(images, output_dir)
+    
+    workers = workers or os.cpu_count() or 1
+    for parent in {target.parent for _, target in targets}:
+        parent.mkdir(parents=True, exist_ok=True)
+    
+    print(f"Procesando {len(images)} imágenes con {workers} procesos...")
+    
+    # Bloques de varias imágenes por tarea para amortizar el coste de IPC
+    chunksize = max(1, len(images) // (workers * 4))
+    tasks = [(str(p), str(target), outputs, container) for p, target in targets]
+    errors = []
+    
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker,
+                             initargs=(writer_options or {},)) as executor:
+        for image_path, error in executor.map(_process_batch_image, tasks, chunksize=chunksize):
+            if error is not None:
+                errors.append((image_path, error))
+                print(f"✗ Error en {image_path}: {error}")
+    elapsed = time.perf_counter() - start
+    
+    processed = len(images) - len(errors)
+    stats = {
+        'images': processed,
+        'errors': errors,
+        'seconds': elapsed,
+        'images_per_sec': processed / elapsed if elapsed > 0 else 0.0,
+    }
+    
+    print(f"✓ Lote completado: {processed} imágenes en {elapsed:.2f} s "
+          f"({stats['images_per_sec']:.1f} imágenes/seg)")
+    return stats
+
+# Etapas por frame del modo streaming, en orden
+STREAM_STAGES = [
+    ('grayscale', 'convert_to_grayscale'),
+    ('blur', 'apply_blur_filters'),
+    ('sharpen', 'apply_sharpen_filters'),
+    ('edges', 'apply_edge_detection'),
+]
+
+def _put_frame(frames, item, stop):
+    """Encola un elemento sin bloquearse si el consumidor ya se detuvo"""
+    while not stop.is_set():
+        try:
+            frames.put(item, timeout=0.1)
+            return
+        except queue.Full:
+            continue
+
+def _read_frames(capture, frames, decode_times, max_frames, stop):
+    """Hilo decodificador: lee frames de la captura y los encola (None = fin)"""
+    count = 0
+    try:
+        while not stop.is_set() and (max_frames is None or count < max_frames):
+            start = time.perf_counter()
+            ok, frame = capture.read()
+            if not ok:
+                break
+            decode_times.append(time.perf_counter() - start)
+            _put_frame(frames, frame, stop)
+            count += 1
+    finally:
+        _put_frame(frames, None, stop)
+
+def _latency_summary(times):
+    """Resume una lista de tiempos (s) en milisegundos: media y p95"""
+    if not times:
+        return {'mean_ms': 0.0, 'p95_ms': 0.0}
+    ms = np.asarray(times) * 1000.0
+    return {'mean_ms': float(ms.mean()), 'p95_ms': float(np.percentile(ms, 95))}
+
+def run_stream(source, output_path=None, output_key='canny', sink=None,
+               fps=None, max_frames=None, queue_size=8, pool=None):
+    """
+    Procesa un video o una cámara frame a frame con la cadena de filtros
+    
+    La decodificación corre en un hilo propio (OpenCV libera el GIL), de modo que
+    el frame N+1 se decodifica mientras se filtra el frame N.
+    
+    Args:
+        source (str | int): Ruta de video, URL o índice de cámara de cv2.VideoCapture
+        output_path (str): Video de salida (cv2.VideoWriter) con el resultado output_key
+        output_key (str): Resultado que se escribe en el video, p. ej. 'canny'
+        sink (callable): Se llama como sink(indice_frame, results) tras cada frame
+        fps (float): FPS del video de salida (por defecto, los de la fuente o 30)
+        max_frames (int): Número máximo de frames a procesar
+        queue_size (int): Frames decodificados que pueden esperar en cola
+        pool (BufferPool): Pool de buffers para los intermedios de cada frame
+    
+    Los buffers de cada frame vuelven al pool tras escribirlo y llamar a sink;
+    si sink necesita conservar un resultado, debe copiarlo.
+    
+    Returns:
+        dict: Frames procesados, segundos, FPS sostenidos, latencia por etapa y
+            métricas del pool de buffers
+    """
+    capture = cv2.VideoCapture(source)
+    if not capture.isOpened():
+        raise ValueError(f"No se pudo abrir la fuente de video: {source}")
+    
+    fps = fps or capture.get(cv2.CAP_PROP_FPS) or 30.0
+    ojos = OjosDigitales(None, verbose=False, pool=pool)
+    writer = None
+    
+    frames = queue.Queue(maxsize=queue_size)
+    decode_times = []
+    stage_times = {name: [] for name, _ in STREAM_STAGES}
+    stage_times['write'] = []
+    stop = threading.Event()
+    reader = threading.Thread(
+        target=_read_frames, args=(capture, frames, decode_times, max_frames, stop), daemon=True
+    )
+    
+    print(f"Procesando video: {source}")
+    processed = 0
+    start = time.perf_counter()
+    reader.start()
+    try:
+        while True:
+            frame = frames.get()
+            if frame is None:
+                break
+            
+            ojos.original = frame
+            for name, method in STREAM_STAGES:
+                t0 = time.perf_counter()
+                getattr(ojos, method)()
+                stage_times[name].append(time.perf_counter() - t0)
+            
+            t0 = time.perf_counter()
+            if output_path is not None:
+                out = ojos.results[output_key]
+                if writer is None:
+                    height, width = out.shape[:2]
+                    writer = cv2.VideoWriter(
+                        str(output_path), cv2.VideoWriter_fourcc(*'mp4v'), fps,
+                        (width, height), out.ndim == 3
+                    )
+                writer.write(out)
+            if sink is not None:
+                sink(processed, ojos.results)
+            ojos.release_results()
+            stage_times['write'].append(time.perf_counter() - t0)
+            processed += 1
+    finally:
+        stop.set()
+        reader.join()
+        capture.release()
+        if writer is not None:
+            writer.release()
+    elapsed = time.perf_counter() - start
+    
+    stats = {
+        'frames': processed,
+        'seconds': elapsed,
+        'fps': processed / elapsed if elapsed > 0 else 0.0,
+        'stages': {'decode': _latency_summary(decode_times)},
+        'pool': ojos.pool.metrics(),
+    }
+    for name, times in stage_times.items():
+        stats['stages'][name] = _latency_summary(times)
+    
+    print(f"✓ Video procesado: {processed} frames en {elapsed:.2f} s ({stats['fps']:.1f} FPS)")
+    for name, summary in stats['stages'].items():
+        print(f"   • {name:10} media {summary['mean_ms']:7.2f} ms | p95 {summary['p95_ms']:7.2f} ms")
+    print(f"   • pool de buffers: {stats['pool']['hit_rate']:.0%} aciertos, "
+          f"pico {stats['pool']['peak_bytes_held'] / 1e6:.1f} MB retenidos")
+    return stats
+
+def run_tiled(source, output_dir, outputs=None, tile_size=1024, shape=None):
+    """
+    Aplica el grafo de filtros a una imagen enorme por teselas, fuera de memoria
+    
+    La entrada se abre como memmap (.npy o raw) y cada resultado se escribe en un
+    .npy mapeado en memoria, así la memoria residente depende del tamaño de la
+    tesela y no del de la imagen.
+    
+    Args:
+        source (str): Imagen .npy o raw (BGR de 3 canales o escala de grises)
+        output_dir (str): Directorio donde se crean <resultado>.npy
+        outputs (list): Resultados a calcular (por defecto TILED_OUTPUTS)
+        tile_size (int): Lado del núcleo de cada tesela
+        shape (tuple): Forma de la imagen si source es raw
+    
+    Returns:
+        dict: nombre -> memmap con el resultado completo
+    """
+    outputs = list(TILED_OUTPUTS if outputs is None else outputs)
+    src = open_image_memmap(source, shape)
+    pool = BufferPool()
+    graph = FilterGraph(pool=pool)
+    halo = graph.halo(outputs)
+    
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+    height, width = src.shape[:2]
+    results = {
+        name: np.lib.format.open_memmap(str(output_path / f"{name}.npy"), mode='w+',
+                                        dtype=np.uint8, shape=(height, width))
+        for name in outputs
+    }
+    
+    # Las entradas de un canal se toman directamente como escala de grises
+    source_key = 'original' if src.ndim == 3 else 'grayscale'
+    
+    print(f"Procesando {height}x{width} por teselas de {tile_size} px (halo {halo} px)...")
+    start = time.perf_counter()
+    
+    tile_results = {}
+    
+    def tile_func(tile):
+        # Los resultados de la tesela anterior ya se copiaron a la salida:
+        # sus buffers vuelven al pool para la siguiente
+        for img in tile_results.values():
+            pool.release(img)
+        tile_results.clear()
+        tile_results.update(graph.evaluate({source_key: tile}, outputs))
+        return tile_results
+    
+    process_tiled(src, tile_func, halo, results, tile_size)
+    elapsed = time.perf_counter() - start
+    
+    print(f"✓ Procesamiento por teselas completado en {elapsed:.2f} s "
+          f"({height * width / elapsed / 1e6:.1f} Mpx/s)")
+    return results
+
+def parse_args():
+    """Lee los argumentos de línea de comandos"""
+    parser = argparse.ArgumentParser(description="Ojos Digitales - Filtros y Bordes con OpenCV")
+    parser.add_argument('--batch', metavar='ORIGEN',
+                        help="Directorio o patrón glob de imágenes a procesar en lote")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Número de procesos para el modo lote (por defecto, uno por núcleo)")
+    parser.add_argument('--outputs', type=lambda value: value.split(','), default=None,
+                        help="Resultados a calcular en modo lote o por teselas, separados por comas "
+                             "(p. ej. canny,sobel_combined)")
+    parser.add_argument('--stream', metavar='FUENTE',
+                        help="Video o índice de cámara a procesar frame a frame")
+    parser.add_argument('--stream-output', metavar='VIDEO',
+                        help="Video de salida del modo streaming (p. ej. bordes.mp4)")
+    parser.add_argument('--stream-key', default='canny',
+                        help="Resultado que se escribe en el video de salida")
+    parser.add_argument('--tiled', metavar='IMAGEN',
+                        help="Imagen .npy o raw enorme a procesar por teselas fuera de memoria")
+    parser.add_argument('--raw-shape', metavar='ALTO,ANCHO[,CANALES]',
+                        help="Forma de la imagen raw del modo por teselas")
+    parser.add_argument('--tile-size', type=int, default=1024,
+                        help="Lado de cada tesela en píxeles")
+    parser.add_argument('--output', default="../resultados",
+                        help="Directorio de resultados")
+    parser.add_argument('--format', choices=ResultWriter.FORMATS, default='png',
+                        help="Formato de los resultados individuales")
+    parser.add_argument('--png-compression', type=int, choices=range(10), default=None,
+                        metavar='0-9', help="Nivel de compresión PNG (0-1 rápido, 9 compacto)")
+    parser.add_argument('--writer-threads', type=int, default=None,
+                        help="Hilos de escritura de resultados (por defecto, hasta 4)")
+    parser.add_argument('--container', nargs='?', const='deflate', choices=('deflate', 'stored'),
+                        help="Guarda todos los resultados en un único .npz con índice "
+                             "(deflate por capa o stored, mapeable en memoria)")
+    parser.add_argument('--headless', action='store_true',
+                        help="Compone el collage con OpenCV (sin matplotlib ni ventanas)")
+    parser.add_argument('--profile', action='store_true',
+                        help="Mide tiempo y memoria de cada etapa e imprime el perfil")
+    parser.add_argument('--profile-output', metavar='JSON',
+                        help="Guarda el perfil por etapas en un archivo JSON")
+    return parser.parse_args()
+
 def main():
     """Función principal"""
+    args = parse_args()
+    writer_options = {'fmt': args.format, 'png_compression': args.png_compression}
+    
+    # Modo lote: sin collage ni análisis, solo resultados por imagen
+    if args.batch:
+        run_batch(args.batch, args.output, args.workers, args.outputs, writer_options, args.container)
+        return
+    
+    # Modo por teselas: imágenes enormes en .npy/raw, resultados en .npy mapeados
+    if args.tiled:
+        shape = tuple(int(v) for v in args.raw_shape.split(',')) if args.raw_shape else None
+        run_tiled(args.tiled, args.output, args.outputs, args.tile_size, shape)
+        return
+    
+    # Modo streaming: video o cámara (un número se interpreta como índice de cámara)
+    if args.stream:
+        source = int(args.stream) if args.stream.isdigit() else args.stream
+        run_stream(source, args.stream_output, args.stream_key)
+        return
+    
     # Crear directorio de resultados
-    output_dir = Path("../resultados")
+    output_dir = Path(args.output)
     output_dir.mkdir(exist_ok=True)
     
     # Ruta de imagen de ejemplo (se puede cambiar)
@@ -243,8 +988,15 @@ def main():
         print(f"✓ Imagen de ejemplo creada: {image_path}")
     
     # Ejecutar análisis
-    ojos = OjosDigitales(image_path)
-    ojos.run_complete_analysis(str(output_dir))
+    profiler = StageProfiler(track_allocations=True) if args.profile or args.profile_output else None
+    with ResultWriter(workers=args.writer_threads, **writer_options) as writer:
+        ojos = OjosDigitales(image_path, profiler=profiler, writer=writer)
+        ojos.run_complete_analysis(str(output_dir), headless=args.headless, container=args.container)
+    
+    if profiler is not None:
+        profiler.print_report()
+        if args.profile_output:
+            profiler.save_report(args.profile_output)
 
 if __name__ == "__main__":
     main()
@@ -9,26 +9,465 @@ calcular centroides (momentos), área, perímetro, y clasificar por vértices.
 
 import cv2
 import numpy as np
-import matplotlib.pyplot as plt
 from pathlib import Path
+from collections import OrderedDict
+import argparse
 import os
-import imageio
+import sys
+import time
+
+# Utilidades compartidas con los demás ejercicios del taller (ejercicios/comun)
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'comun'))
+from pipeline_comun import (BufferPool, GifStreamWriter, ResultContainer, ResultWriter,
+                            StageProfiler, compose_grid, open_image_memmap, process_tiled,
+                            profiled_stage)
+
+# matplotlib y Pillow se importan dentro de los métodos que los usan: las
+# ejecuciones que no dibujan figuras ni GIF (p. ej. --tiled) arrancan sin ellos
+
+# Métodos de umbralización comparados en las visualizaciones y el análisis
+THRESHOLD_METHODS = [
+    ('thresh_fixed', 'Threshold Fijo'),
+    ('thresh_adaptive_mean', 'Adaptativo (Media)'),
+    ('thresh_adaptive_gaussian', 'Adaptativo (Gaussiano)'),
+    ('thresh_otsu', 'Otsu'),
+]
+
+COMPARISON_TITLE = 'Segmentando el Mundo - Binarización y Contornos'
+
+# Colores RGB de las anotaciones (contornos, centroides, cajas y etiquetas)
+ANNOTATION_COLORS = [(0, 255, 0), (255, 0, 0), (0, 0, 255), (255, 255, 255)]
+
+# Formatos de la animación del proceso
+ANIMATION_FORMATS = ('gif', 'mp4', 'webm')
+
+# Códigos de forma usados en la columna 'shape' de ContourTable
+SHAPE_TRIANGLE, SHAPE_RECTANGLE, SHAPE_CIRCLE, SHAPE_POLYGON = range(4)
+SHAPE_NAMES = ["Triángulo", "Cuadrado/Rectángulo", "Círculo/Óvalo", "Polígono"]
+
+# Una fila por contorno; las columnas se calculan de forma vectorizada
+CONTOUR_DTYPE = np.dtype([
+    ('area', np.float64),
+    ('perimeter', np.float64),
+    ('cx', np.int32),
+    ('cy', np.int32),
+    ('x', np.int32),
+    ('y', np.int32),
+    ('w', np.int32),
+    ('h', np.int32),
+    ('vertices', np.int32),
+    ('shape', np.uint8),
+])
+
+class ContourTable:
+    """
+    Tabla columnar de propiedades de contornos
+    
+    Los puntos de todos los contornos viven en un único buffer (P, 2) y el
+    contorno i ocupa points[offsets[i]:offsets[i + 1]]. Las propiedades se
+    guardan en un arreglo estructurado (CONTOUR_DTYPE), una fila por contorno.
+    """
+    
+    def __init__(self, points, offsets, props):
+        self.points = points
+        self.offsets = offsets
+        self.props = props
+        
+    def __len__(self):
+        return len(self.props)
+        
+    def __getitem__(self, column):
+        """Devuelve una columna completa, p. ej. table['area']"""
+        return self.props[column]
+        
+    def contour(self, i):
+        """Vista (sin copia) del contorno i con la forma (N, 1, 2) de OpenCV"""
+        return self.points[self.offsets[i]:self.offsets[i + 1]].reshape(-1, 1, 2)
+        
+    def contours(self):
+        """Lista de vistas de todos los contornos, apta para cv2.drawContours"""
+        return [self.contour(i) for i in range(len(self))]
+        
+    def shape_label(self, i):
+        """Nombre legible de la forma del contorno i"""
+        row = self.props[i]
+        if row['shape'] == SHAPE_POLYGON:
+            return f"Polígono ({row['vertices']} lados)"
+        return SHAPE_NAMES[row['shape']]
+        
+    @classmethod
+    def from_contours(cls, contours, epsilon_factor=0.02):
+        """
+        Construye la tabla a partir de la salida de cv2.findContours
+        
+        Área, perímetro, centroide y caja delimitadora se calculan con
+        reducciones por segmento sobre el buffer concatenado; solo la
+        aproximación de polígonos (approxPolyDP) recorre los contornos uno a uno.
+        """
+        n = len(contours)
+        props = np.zeros(n, dtype=CONTOUR_DTYPE)
+        if n == 0:
+            return cls(np.empty((0, 2), np.int32), np.zeros(1, np.int64), props)
+        
+        counts = np.fromiter((len(c) for c in contours), dtype=np.int64, count=n)
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        points = np.concatenate(contours).reshape(-1, 2).astype(np.int32, copy=False)
+        starts = offsets[:-1]
+        
+        # Punto siguiente de cada vértice, cerrando cada contorno sobre sí mismo
+        next_idx = np.arange(1, len(points) + 1)
+        next_idx[offsets[1:] - 1] = starts
+        p = points.astype(np.float64)
+        q = p[next_idx]
+        
+        # Área y momentos de primer orden (fórmula de Green, como cv2.moments)
+        cross = p[:, 0] * q[:, 1] - q[:, 0] * p[:, 1]
+        m00 = np.add.reduceat(cross, starts) / 2.0
+        m10 = np.add.reduceat((p[:, 0] + q[:, 0]) * cross, starts) / 6.0
+        m01 = np.add.reduceat((p[:, 1] + q[:, 1]) * cross, starts) / 6.0
+        props['area'] = np.abs(m00)
+        
+        # Centroide (0, 0 si el área es nula)
+        nonzero = m00 != 0
+        safe_m00 = np.where(nonzero, m00, 1.0)
+        props['cx'] = np.where(nonzero, np.trunc(m10 / safe_m00), 0)
+        props['cy'] = np.where(nonzero, np.trunc(m01 / safe_m00), 0)
+        
+        # Perímetro cerrado
+        segment = np.hypot(q[:, 0] - p[:, 0], q[:, 1] - p[:, 1])
+        props['perimeter'] = np.add.reduceat(segment, starts)
+        
+        # Caja delimitadora (mismo convenio que cv2.boundingRect)
+        mins = np.minimum.reduceat(points, starts)
+        maxs = np.maximum.reduceat(points, starts)
+        props['x'], props['y'] = mins[:, 0], mins[:, 1]
+        props['w'] = maxs[:, 0] - mins[:, 0] + 1
+        props['h'] = maxs[:, 1] - mins[:, 1] + 1
+        
+        # Número de vértices de la aproximación poligonal
+        epsilons = epsilon_factor * props['perimeter']
+        props['vertices'] = [len(cv2.approxPolyDP(c, eps, True))
+                             for c, eps in zip(contours, epsilons)]
+        
+        # Clasificación por forma
+        vertices = props['vertices']
+        props['shape'] = np.select(
+            [vertices == 3, vertices == 4, vertices > 8],
+            [SHAPE_TRIANGLE, SHAPE_RECTANGLE, SHAPE_CIRCLE],
+            default=SHAPE_POLYGON,
+        )
+        
+        return cls(points, offsets, props)
+
+class AnimationEncoder:
+    """
+    Codificador de animaciones: GIF, MP4 o WebM según la extensión
+    
+    Los frames pueden reducirse antes de codificar (scale / max_width) y se
+    escriben en cuanto se añaden, así que la memoria no crece con el número de
+    frames. GIF usa GifStreamWriter: la paleta se calcula una sola vez con el
+    primer frame (o con palette_sample) y cada frame se cuantiza a ella;
+    reuse_palette=False calcula una paleta local por frame. MP4 y WebM usan
+    cv2.VideoWriter.
+    """
+    
+    # FourCC de cv2.VideoWriter por extensión de video
+    VIDEO_CODECS = {'.mp4': 'mp4v', '.webm': 'VP80', '.avi': 'MJPG'}
+    
+    def __init__(self, path, fps=10.0, scale=1.0, max_width=None, loop=0,
+                 reuse_palette=True, palette_sample=None, reserved_colors=()):
+        """
+        Args:
+            path (str): Archivo de salida (.gif, .mp4, .webm o .avi)
+            fps (float): Frames por segundo
+            scale (float): Factor de reducción de los frames (1.0 = tamaño original)
+            max_width (int): Ancho máximo en píxeles, además de scale (None = sin límite)
+            loop (int): Repeticiones del GIF (0 = infinitas)
+            reuse_palette (bool): GIF con una paleta global en lugar de una por frame
+            palette_sample (ndarray): Imagen RGB para calcular la paleta global
+                (None = el primer frame)
+            reserved_colors (list): Colores RGB que siempre entran en la paleta
+                global (p. ej. los de las anotaciones dibujadas después)
+        """
+        self.path = str(path)
+        self.extension = Path(self.path).suffix.lower()
+        if self.extension != '.gif' and self.extension not in self.VIDEO_CODECS:
+            raise ValueError(f"Formato de animación no soportado: {self.extension} "
+                             f"(opciones: .gif, {', '.join(self.VIDEO_CODECS)})")
+        
+        self.fps = fps
+        self.scale = scale
+        self.max_width = max_width
+        self.loop = loop
+        self.reuse_palette = reuse_palette
+        self.reserved_colors = [tuple(int(v) for v in color) for color in reserved_colors]
+        self.frames = 0
+        self.size = None
+        self._palette_sample = palette_sample
+        self._gif = None
+        self._video = None
+        self._bgr = None
+        
+    def _target_size(self, width, height):
+        """Tamaño (ancho, alto) de salida tras aplicar scale y max_width"""
+        factor = self.scale
+        if self.max_width is not None:
+            factor = min(factor, self.max_width / width)
+        size = (max(int(round(width * factor)), 1), max(int(round(height * factor)), 1))
+        if self.extension != '.gif':
+            # Los códecs de video con submuestreo 4:2:0 requieren lados pares
+            size = (max(size[0] - size[0] % 2, 2), max(size[1] - size[1] % 2, 2))
+        return size
+        
+    def _resize(self, frame):
+        """Lleva el frame al tamaño de salida (INTER_AREA al reducir)"""
+        if (frame.shape[1], frame.shape[0]) == self.size:
+            return frame
+        return cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        
+    def add_frame(self, frame):
+        """
+        Codifica un frame RGB (uint8, alto × ancho × 3)
+        
+        El frame no se conserva: el llamador puede reutilizar su buffer.
+        """
+        if self.size is None:
+            self.size = self._target_size(frame.shape[1], frame.shape[0])
+            self._open(frame)
+        frame = self._resize(frame)
+        if self._video is not None:
+            self._video.write(cv2.cvtColor(frame, cv2.COLOR_RGB2BGR, dst=self._bgr))
+        else:
+            self._gif.add_frame(frame)
+        self.frames += 1
+        
+    def _open(self, first_frame):
+        """Abre el video de salida o el escritor de GIF (paleta calculada con el primer frame)"""
+        if self.extension != '.gif':
+            fourcc = cv2.VideoWriter_fourcc(*self.VIDEO_CODECS[self.extension])
+            self._video = cv2.VideoWriter(self.path, fourcc, self.fps, self.size)
+            if not self._video.isOpened():
+                raise OSError(f"No se pudo abrir el video de salida: {self.path}")
+            self._bgr = np.empty((self.size[1], self.size[0], 3), dtype=np.uint8)
+            return
+        
+        sample = self._palette_sample if self._palette_sample is not None else self._resize(first_frame)
+        self._gif = GifStreamWriter(self.path, fps=self.fps, loop=self.loop, palette_sample=sample,
+                                    reserved_colors=self.reserved_colors,
+                                    global_palette=self.reuse_palette)
+        
+    def close(self):
+        """Termina el archivo y libera el codificador"""
+        if self._video is not None:
+            self._video.release()
+            self._video = None
+        if self._gif is not None:
+            self._gif.close()
+            self._gif = None
+        
+    def __enter__(self):
+        return self
+        
+    def __exit__(self, *exc_info):
+        self.close()
+
+class ThresholdEngine:
+    """
+    Umbralizaciones de una imagen en gris que comparten sus pasadas sobre la imagen
+    
+    El histograma se calcula una vez y da el umbral de Otsu sin volver a leer
+    la imagen.
+    La imagen integral (con borde replicado de max_block_size // 2 píxeles)
+    también se calcula una vez: la media local de cualquier tamaño de bloque
+    sale de cuatro lecturas de la integral por píxel. Las medias locales (y
+    las gaussianas) se memorizan por tamaño de bloque, así que barrer C solo
+    cuesta la comparación final. Los resultados coinciden bit a bit con
+    cv2.threshold y cv2.adaptiveThreshold.
+    """
+    
+    METHODS = ('mean', 'gaussian')
+    
+    def __init__(self, gray, max_block_size=51, band_rows=64, cache_size=4):
+        """
+        Args:
+            gray (ndarray): Imagen en escala de grises (uint8)
+            max_block_size (int): Mayor bloque adaptativo por media admitido
+                (fija el borde de la imagen integral)
+            band_rows (int): Filas por banda al calcular medias desde la integral
+            cache_size (int): Mapas de media local memorizados
+        """
+        self.gray = gray
+        self.max_block_size = max_block_size
+        self.band_rows = band_rows
+        self.cache_size = cache_size
+        self._hist = None
+        self._integral = None
+        self._local = OrderedDict()
+        
+    @property
+    def hist(self):
+        """Histograma de 256 bins (una pasada, memorizado)"""
+        if self._hist is None:
+            self._hist = cv2.calcHist([self.gray], [0], None, [256], [0, 256]).ravel()
+        return self._hist
+        
+    def otsu(self):
+        """Umbral de Otsu desde el histograma memorizado"""
+        return otsu_threshold(self.hist)
+        
+    def fixed(self, thresh, inverse=False, dst=None):
+        """Umbral fijo (p. ej. el de otsu()): 255 donde gray > thresh"""
+        mode = cv2.THRESH_BINARY_INV if inverse else cv2.THRESH_BINARY
+        return cv2.threshold(self.gray, thresh, 255, mode, dst=dst)[1]
+        
+    @property
+    def integral(self):
+        """
+        Imagen integral int32 de la imagen con borde replicado (una pasada, memorizada)
+        
+        Si la suma total no cabe en int32 se parte en franjas horizontales que se
+        solapan max_block_size - 1 filas. Devuelve una lista de (primera fila,
+        última fila + 1, integral de la franja). Si ni una franja de una fila
+        cabe (anchos de más de ~160k píxeles), la integral es float64 y única.
+        """
+        if self._integral is None:
+            radius = self.max_block_size // 2
+            padded = cv2.copyMakeBorder(self.gray, radius, radius, radius, radius, cv2.BORDER_REPLICATE)
+            height = self.gray.shape[0]
+            # Filas de salida por franja para que la suma de la franja (con sus
+            # 2 * radius filas de borde) no desborde int32
+            rows = (2 ** 31 - 1) // (255 * padded.shape[1]) - 2 * radius
+            if rows < 1:
+                self._integral = [(0, height, cv2.integral(padded, sdepth=cv2.CV_64F))]
+            else:
+                self._integral = [
+                    (top, min(top + rows, height),
+                     cv2.integral(padded[top:min(top + rows, height) + 2 * radius], sdepth=cv2.CV_32S))
+                    for top in range(0, height, rows)
+                ]
+        return self._integral
+        
+    def _cached(self, key, compute):
+        """Mapa de media local memorizado por (método, bloque)"""
+        local = self._local.get(key)
+        if local is None:
+            local = compute()
+            self._local[key] = local
+            if len(self._local) > self.cache_size:
+                self._local.popitem(last=False)
+        else:
+            self._local.move_to_end(key)
+        return local
+        
+    def local_mean(self, block_size):
+        """
+        Media local uint8 de cada píxel en un bloque block_size × block_size
+        
+        Se calcula por bandas desde la integral y se redondea como cv2.boxFilter.
+        """
+        if block_size % 2 == 0 or not 3 <= block_size <= self.max_block_size:
+            raise ValueError(f"block_size debe ser impar entre 3 y {self.max_block_size}: {block_size}")
+        
+        def compute():
+            width = self.gray.shape[1]
+            r = block_size // 2
+            lo = self.max_block_size // 2 - r  # Fila/columna de la integral en la esquina del bloque
+            hi = lo + block_size
+            scale = 1.0 / (block_size * block_size)
+            mean = np.empty(self.gray.shape, dtype=np.uint8)
+            for start, end, integral in self.integral:
+                for top in range(start, end, self.band_rows):
+                    bottom = min(top + self.band_rows, end)
+                    rows_hi = integral[top - start + hi:bottom - start + hi]
+                    rows_lo = integral[top - start + lo:bottom - start + lo]
+                    window = cv2.subtract(rows_hi[:, hi:hi + width], rows_lo[:, hi:hi + width])
+                    cv2.subtract(window, rows_hi[:, lo:lo + width], dst=window)
+                    cv2.add(window, rows_lo[:, lo:lo + width], dst=window)
+                    # block_size² es impar: la media nunca cae justo en .5, así que
+                    # el redondeo coincide con el de cv2.boxFilter
+                    cv2.convertScaleAbs(window, dst=mean[top:bottom], alpha=scale)
+            return mean
+        
+        return self._cached(('mean', block_size), compute)
+        
+    def local_gaussian(self, block_size):
+        """Media local ponderada (gaussiana) uint8, como ADAPTIVE_THRESH_GAUSSIAN_C"""
+        def compute():
+            # Desenfoque en float32 y redondeo, como cv2.adaptiveThreshold
+            # (GaussianBlur en uint8 usa punto fijo y no coincide bit a bit)
+            blurred = cv2.GaussianBlur(self.gray.astype(np.float32), (block_size, block_size), 0,
+                                       borderType=cv2.BORDER_REPLICATE | cv2.BORDER_ISOLATED)
+            return cv2.convertScaleAbs(blurred)
+        
+        return self._cached(('gaussian', block_size), compute)
+        
+    def adaptive(self, block_size, c, method='mean', inverse=False, dst=None):
+        """
+        Umbral adaptativo: 255 donde gray > media_local - c (o <= con inverse)
+        
+        Args:
+            block_size (int): Lado impar de la vecindad
+            c (float): Constante restada a la media local
+            method (str): 'mean' (desde la integral) o 'gaussian'
+            inverse (bool): Equivalente a cv2.THRESH_BINARY_INV
+            dst (ndarray): Buffer uint8 de salida (None = uno nuevo)
+        """
+        if method == 'mean':
+            local = self.local_mean(block_size)
+        elif method == 'gaussian':
+            local = self.local_gaussian(block_size)
+        else:
+            raise ValueError(f"Método adaptativo no soportado: {method} (opciones: {', '.join(self.METHODS)})")
+        
+        # gray - media > -c (o <= con inverse), con el mismo redondeo de c que cv2.adaptiveThreshold
+        delta = int(np.floor(c)) if inverse else int(np.ceil(c))
+        difference = cv2.subtract(self.gray, local, dtype=cv2.CV_16S)
+        return cv2.compare(difference, float(-delta), cv2.CMP_LE if inverse else cv2.CMP_GT, dst=dst)
+        
+    def sweep(self, block_sizes, cs, method='mean', inverse=False):
+        """
+        Barrido de parámetros del umbral adaptativo sin volver a recorrer la imagen de origen
+        
+        Yields:
+            tuple: (block_size, c, imagen binaria) para cada combinación
+        """
+        for block_size in block_sizes:
+            for c in cs:
+                yield block_size, c, self.adaptive(block_size, c, method, inverse)
 
 class SegmentacionContornos:
-    def __init__(self, image_path):
+    def __init__(self, image_path, contour_cache_size=8, pool=None, profiler=None, writer=None):
         """
         Inicializa el procesador de segmentación con OpenCV
         
         Args:
             image_path (str): Ruta a la imagen de entrada
+            contour_cache_size (int): Máximo de análisis de contornos memorizados (LRU)
+            pool (BufferPool): Pool de buffers compartido (por defecto, uno propio)
+            profiler (StageProfiler): Instrumentación por etapas (None = desactivada)
+            writer (ResultWriter): Escritor asíncrono compartido (None = uno temporal
+                por llamada a save_individual_results)
         """
         self.image_path = image_path
+        self.profiler = profiler
+        self.writer = writer
+        self.pool = pool if pool is not None else BufferPool()
         self.original = None
         self.gray = None
         self.results = {}
+        self._thresholds = None
         self.contours = []
         self.hierarchy = None
         
+        # Caché LRU de análisis de contornos:
+        # (método, min_area, modo, epsilon) -> (versión, contornos, jerarquía, total, propiedades)
+        # La versión de los umbrales sube cada vez que cambian las imágenes umbralizadas
+        self.contour_cache_size = contour_cache_size
+        self._contour_cache = OrderedDict()
+        self.thresholds_version = 0
+        
+    @profiled_stage
     def load_image(self):
         """Carga la imagen original"""
         self.original = cv2.imread(self.image_path)
@@ -39,98 +478,172 @@ class SegmentacionContornos:
         self.original_rgb = cv2.cvtColor(self.original, cv2.COLOR_BGR2RGB)
         print(f"Imagen cargada: {self.original.shape}")
         
+    @profiled_stage
     def convert_to_grayscale(self):
         """Convierte la imagen a escala de grises"""
-        self.gray = cv2.cvtColor(self.original, cv2.COLOR_BGR2GRAY)
+        self.gray = cv2.cvtColor(self.original, cv2.COLOR_BGR2GRAY,
+                                 dst=self.pool.acquire(self.original.shape[:2]))
         self.results['grayscale'] = self.gray
+        self._thresholds = None
         print("✓ Conversión a escala de grises completada")
         
+    def release_results(self):
+        """
+        Devuelve al pool los buffers de todos los resultados y vacía self.results
+        
+        Los contornos memorizados se descartan, porque sus imágenes de origen
+        pueden reutilizarse para otra imagen. Antes se espera a las escrituras
+        pendientes de self.writer, que leen esos buffers.
+        """
+        if self.writer is not None:
+            self.writer.flush()
+        for img in self.results.values():
+            self.pool.release(img)
+        self.results = {}
+        self.gray = None
+        self._thresholds = None
+        self.invalidate_contour_cache()
+        
+    @profiled_stage
     def apply_thresholding(self):
         """Aplica diferentes métodos de umbralización"""
+        shape = self.gray.shape
+        
         # Threshold fijo
-        _, thresh_fixed = cv2.threshold(self.gray, 127, 255, cv2.THRESH_BINARY)
+        _, thresh_fixed = cv2.threshold(self.gray, 127, 255, cv2.THRESH_BINARY,
+                                        dst=self.pool.acquire(shape))
         self.results['thresh_fixed'] = thresh_fixed
         
         # Threshold adaptativo - Media (con parámetros más pequeños y THRESH_BINARY_INV)
         thresh_adaptive_mean = cv2.adaptiveThreshold(
-            self.gray, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV, 11, 2
+            self.gray, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV, 11, 2,
+            dst=self.pool.acquire(shape)
         )
         self.results['thresh_adaptive_mean'] = thresh_adaptive_mean
         
         # Threshold adaptativo - Gaussiano (con parámetros más pequeños y THRESH_BINARY_INV)
         thresh_adaptive_gaussian = cv2.adaptiveThreshold(
-            self.gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY_INV, 11, 2
+            self.gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY_INV, 11, 2,
+            dst=self.pool.acquire(shape)
         )
         self.results['thresh_adaptive_gaussian'] = thresh_adaptive_gaussian
         
-        # Otsu's thresholding
-        _, thresh_otsu = cv2.threshold(self.gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        # Otsu's thresholding: si el motor de umbrales ya existe, el umbral sale de su
+        # histograma compartido; si no, cv2 calcula el histograma en la misma llamada
+        if self._thresholds is not None:
+            thresh_otsu = self._thresholds.fixed(self._thresholds.otsu(), dst=self.pool.acquire(shape))
+        else:
+            _, thresh_otsu = cv2.threshold(self.gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU,
+                                           dst=self.pool.acquire(shape))
         self.results['thresh_otsu'] = thresh_otsu
         
+        # Las imágenes umbralizadas cambiaron: los contornos memorizados ya no valen
+        self.thresholds_version += 1
+        
         print("✓ Umbralización completada")
         
-    def find_contours(self, thresh_image):
-        """Encuentra contornos en la imagen umbralizada"""
+    @property
+    def thresholds(self):
+        """
+        ThresholdEngine de la imagen en gris actual (se crea al pedirlo y se memoriza)
+        
+        apply_thresholding usa cv2 directamente, que es más rápido para una sola
+        pasada, salvo Otsu, que toma el histograma del motor si ya existe; el
+        motor compensa en barridos de block_size/C, p. ej.
+        seg.thresholds.sweep((11, 21, 31), (0, 2, 4)), porque reutiliza su
+        histograma, su imagen integral y sus medias locales.
+        """
+        if self._thresholds is None:
+            self._thresholds = ThresholdEngine(self.gray)
+        return self._thresholds
+        
+    @profiled_stage
+    def find_contours(self, thresh_image, min_area=500, mode=cv2.RETR_EXTERNAL):
+        """
+        Encuentra contornos en la imagen umbralizada
+        
+        Args:
+            thresh_image (ndarray): Imagen binaria
+            min_area (float): Área mínima para considerar un contorno
+                (elimina el ruido pequeño)
+            mode (int): Modo de recuperación de cv2.findContours
+        """
         # Encontrar contornos
         contours, hierarchy = cv2.findContours(
-            thresh_image, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE
+            thresh_image, mode, cv2.CHAIN_APPROX_SIMPLE
         )
         
-        # Filtrar contornos por área mínima (eliminar contornos muy grandes que son el fondo)
-        min_area = 500  # Área mínima para considerar un contorno
+        # Filtrar contornos por área mínima
         filtered_contours = [cnt for cnt in contours if cv2.contourArea(cnt) > min_area]
         
         self.contours = filtered_contours
         self.hierarchy = hierarchy
-        
-        print(f"✓ Encontrados {len(filtered_contours)} contornos (filtrados de {len(contours)})")
+        self._report_contours(filtered_contours, len(contours))
         return filtered_contours
         
-    def calculate_contour_properties(self, contours):
-        """Calcula propiedades de los contornos"""
-        properties = []
+    @staticmethod
+    def _report_contours(contours, total):
+        """Resumen de una búsqueda de contornos"""
+        print(f"✓ Encontrados {len(contours)} contornos (filtrados de {total})")
         
-        for i, contour in enumerate(contours):
-            # Área
-            area = cv2.contourArea(contour)
-            
-            # Perímetro
-            perimeter = cv2.arcLength(contour, True)
-            
-            # Centroide (momentos)
-            M = cv2.moments(contour)
-            if M["m00"] != 0:
-                cx = int(M["m10"] / M["m00"])
-                cy = int(M["m01"] / M["m00"])
-            else:
-                cx, cy = 0, 0
-            
-            # Aproximación de polígono
-            epsilon = 0.02 * cv2.arcLength(contour, True)
-            approx = cv2.approxPolyDP(contour, epsilon, True)
-            vertices = len(approx)
-            
-            # Clasificación por forma
-            if vertices == 3:
-                shape = "Triángulo"
-            elif vertices == 4:
-                shape = "Cuadrado/Rectángulo"
-            elif vertices > 8:
-                shape = "Círculo/Óvalo"
-            else:
-                shape = f"Polígono ({vertices} lados)"
-            
-            properties.append({
-                'index': i,
-                'area': area,
-                'perimeter': perimeter,
-                'centroid': (cx, cy),
-                'vertices': vertices,
-                'shape': shape,
-                'contour': contour
-            })
-        
-        return properties
+    @profiled_stage
+    def calculate_contour_properties(self, contours, epsilon_factor=0.02):
+        """
+        Calcula propiedades de los contornos como una tabla columnar (ContourTable)
+        
+        Args:
+            contours (list): Contornos a analizar
+            epsilon_factor (float): Fracción del perímetro usada como tolerancia
+                en la aproximación de polígonos
+        """
+        return ContourTable.from_contours(contours, epsilon_factor)
+        
+    def analyze_contours(self, method_key, min_area=500, mode=cv2.RETR_EXTERNAL,
+                         epsilon_factor=0.02):
+        """
+        Devuelve (contornos, propiedades) de un método de umbralización, memorizados
+        
+        El resultado se reutiliza mientras no cambien los umbrales: la entrada
+        guarda la versión de los umbrales (thresholds_version), que
+        apply_thresholding incrementa. Quien reemplace o modifique en su lugar
+        una imagen umbralizada debe llamar a invalidate_contour_cache(). Un
+        acierto restaura también self.contours y self.hierarchy e imprime el
+        mismo resumen que find_contours.
+        
+        Args:
+            method_key (str): Clave del resultado umbralizado en self.results
+            min_area (float): Área mínima de contorno
+            mode (int): Modo de recuperación de cv2.findContours
+            epsilon_factor (float): Tolerancia relativa de approxPolyDP
+        """
+        thresh_image = self.results[method_key]
+        key = (method_key, min_area, mode, epsilon_factor)
+        
+        entry = self._contour_cache.get(key)
+        if entry is not None and entry[0] == self.thresholds_version:
+            self._contour_cache.move_to_end(key)
+            _, contours, hierarchy, total, properties = entry
+            self.contours = contours
+            self.hierarchy = hierarchy
+            self._report_contours(contours, total)
+            return contours, properties
+        
+        contours = self.find_contours(thresh_image, min_area, mode)
+        properties = self.calculate_contour_properties(contours, epsilon_factor)
+        total = len(self.hierarchy[0]) if self.hierarchy is not None else 0
+        
+        self._contour_cache[key] = (self.thresholds_version, contours, self.hierarchy,
+                                    total, properties)
+        self._contour_cache.move_to_end(key)
+        while len(self._contour_cache) > self.contour_cache_size:
+            self._contour_cache.popitem(last=False)
+        
+        return contours, properties
+        
+    def invalidate_contour_cache(self):
+        """Descarta todos los análisis de contornos memorizados"""
+        self._contour_cache.clear()
+        self.thresholds_version += 1
         
     def draw_contours_and_properties(self, thresh_image, properties, title_suffix=""):
         """Dibuja contornos y sus propiedades"""
@@ -138,99 +651,98 @@ class SegmentacionContornos:
         result_image = self.original_rgb.copy()
         
         # Dibujar contornos
-        cv2.drawContours(result_image, [prop['contour'] for prop in properties], -1, (0, 255, 0), 2)
+        cv2.drawContours(result_image, properties.contours(), -1, (0, 255, 0), 2)
         
         # Dibujar centroides y etiquetas
-        for prop in properties:
-            cx, cy = prop['centroid']
+        for i, prop in enumerate(properties.props.tolist()):
+            area, _, cx, cy, x, y, w, h = prop[:8]
             
             # Dibujar centroide
             cv2.circle(result_image, (cx, cy), 5, (255, 0, 0), -1)
             
             # Dibujar caja delimitadora
-            x, y, w, h = cv2.boundingRect(prop['contour'])
             cv2.rectangle(result_image, (x, y), (x + w, y + h), (0, 0, 255), 2)
             
             # Etiqueta con información
-            label = f"{prop['shape']} A:{int(prop['area'])}"
+            label = f"{properties.shape_label(i)} A:{int(area)}"
             cv2.putText(result_image, label, (x, y - 10), 
                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
         
         return result_image
         
+    def _comparison_panels(self):
+        """Lista de (imagen, título) de la comparación: un panel por método, más la original"""
+        panels = []
+        for method_key, method_name in THRESHOLD_METHODS:
+            if method_key not in self.results:
+                panels.append((None, method_name))
+                continue
+            
+            # Contornos y propiedades (memorizados por método)
+            contours, properties = self.analyze_contours(method_key)
+            
+            # Dibujar resultado
+            result_image = self.draw_contours_and_properties(self.results[method_key], properties)
+            panels.append((result_image, f'{method_name}\nContornos: {len(contours)}'))
+        
+        panels.append((self.original_rgb, 'Imagen Original'))
+        return panels
+        
+    @profiled_stage
     def create_comparison_visualization(self):
         """Crea visualización comparativa de todos los métodos"""
+        import matplotlib.pyplot as plt  # Import diferido: solo las figuras lo necesitan
+        
         # Configurar la figura
         fig, axes = plt.subplots(2, 3, figsize=(18, 12))
-        fig.suptitle('Segmentando el Mundo - Binarización y Contornos', fontsize=20, fontweight='bold')
-        
-        # Lista de métodos a comparar
-        methods = [
-            ('thresh_fixed', 'Threshold Fijo'),
-            ('thresh_adaptive_mean', 'Adaptativo (Media)'),
-            ('thresh_adaptive_gaussian', 'Adaptativo (Gaussiano)'),
-            ('thresh_otsu', 'Otsu'),
-        ]
-        
-        # Mostrar cada método
-        for i, (method_key, method_name) in enumerate(methods):
-            row = i // 3
-            col = i % 3
-            
-            if method_key in self.results:
-                thresh_image = self.results[method_key]
-                
-                # Encontrar contornos
-                contours = self.find_contours(thresh_image)
-                
-                # Calcular propiedades
-                properties = self.calculate_contour_properties(contours)
-                
-                # Dibujar resultado
-                result_image = self.draw_contours_and_properties(thresh_image, properties)
-                
-                # Mostrar imagen
-                axes[row, col].imshow(result_image)
-                axes[row, col].set_title(f'{method_name}\nContornos: {len(contours)}', fontsize=12, fontweight='bold')
-                axes[row, col].axis('off')
-        
-        # Mostrar imagen original en la posición (1,1)
-        axes[1, 1].imshow(self.original_rgb)
-        axes[1, 1].set_title('Imagen Original', fontsize=12, fontweight='bold')
-        axes[1, 1].axis('off')
+        fig.suptitle(COMPARISON_TITLE, fontsize=20, fontweight='bold')
         
-        # Ocultar el subplot vacío en (1,2)
-        axes[1, 2].axis('off')
+        # Mostrar cada panel; el subplot sobrante queda vacío
+        for ax in axes.flat:
+            ax.axis('off')
+        for ax, (image, title) in zip(axes.flat, self._comparison_panels()):
+            if image is None:
+                continue
+            ax.imshow(image)
+            ax.set_title(title, fontsize=12, fontweight='bold')
         
         plt.tight_layout()
         return fig
         
-    def create_animated_gif(self, output_path):
-        """Crea un GIF animado mostrando el proceso"""
-        frames = []
+    @profiled_stage
+    def create_headless_comparison(self):
+        """Compone la comparación con OpenCV en un lienzo BGR (sin matplotlib)"""
+        return compose_grid(self._comparison_panels(), cols=3, title=COMPARISON_TITLE)
         
-        # Imagen original
-        frames.append(self.original_rgb)
+    @profiled_stage
+    def create_animated_gif(self, output_path, frame_duration=1.5, scale=1.0, max_width=None):
+        """
+        Crea una animación del proceso: la original y el resultado de cada método
         
-        # Para cada método de umbralización
-        methods = [
-            ('thresh_fixed', 'Threshold Fijo'),
-            ('thresh_adaptive_mean', 'Adaptativo (Media)'),
-            ('thresh_adaptive_gaussian', 'Adaptativo (Gaussiano)'),
-            ('thresh_otsu', 'Otsu'),
-        ]
+        Cada frame se dibuja y se pasa a AnimationEncoder, que lo escribe en
+        cuanto está listo. El formato sale de la extensión: .gif, .mp4 o .webm.
         
-        for method_key, method_name in methods:
-            if method_key in self.results:
-                thresh_image = self.results[method_key]
-                contours = self.find_contours(thresh_image)
-                properties = self.calculate_contour_properties(contours)
-                result_image = self.draw_contours_and_properties(thresh_image, properties)
-                frames.append(result_image)
+        Args:
+            output_path (str): Archivo de salida
+            frame_duration (float): Segundos por frame
+            scale (float): Factor de reducción de los frames
+            max_width (int): Ancho máximo de los frames (None = sin límite)
+        """
+        # La paleta del GIF sale de la original; los colores de las anotaciones se reservan
+        with AnimationEncoder(output_path, fps=1.0 / frame_duration, scale=scale, max_width=max_width,
+                              reserved_colors=ANNOTATION_COLORS) as encoder:
+            # Imagen original
+            encoder.add_frame(self.original_rgb)
+            
+            # Para cada método de umbralización
+            for method_key, method_name in THRESHOLD_METHODS:
+                if method_key in self.results:
+                    thresh_image = self.results[method_key]
+                    contours, properties = self.analyze_contours(method_key)
+                    encoder.add_frame(self.draw_contours_and_properties(thresh_image, properties))
         
-        # Guardar GIF
-        imageio.mimsave(output_path, frames, duration=1.5)
-        print(f"✓ GIF animado guardado en: {output_path}")
+        print(f"✓ Animación guardada en: {output_path} ({encoder.frames} frames, "
+              f"{encoder.size[0]}x{encoder.size[1]})")
         
     def analyze_thresholding_methods(self):
         """Analiza las diferencias entre métodos de umbralización"""
@@ -238,24 +750,15 @@ class SegmentacionContornos:
         print("ANÁLISIS DE MÉTODOS DE UMBRALIZACIÓN")
         print("="*60)
         
-        methods = [
-            ('thresh_fixed', 'Threshold Fijo'),
-            ('thresh_adaptive_mean', 'Adaptativo (Media)'),
-            ('thresh_adaptive_gaussian', 'Adaptativo (Gaussiano)'),
-            ('thresh_otsu', 'Otsu'),
-        ]
-        
         print("\nComparación de métodos:")
         print("-" * 50)
         
-        for method_key, method_name in methods:
+        for method_key, method_name in THRESHOLD_METHODS:
             if method_key in self.results:
-                thresh_image = self.results[method_key]
-                contours = self.find_contours(thresh_image)
-                properties = self.calculate_contour_properties(contours)
+                contours, properties = self.analyze_contours(method_key)
                 
-                total_area = sum(prop['area'] for prop in properties)
-                avg_area = total_area / len(properties) if properties else 0
+                total_area = properties['area'].sum()
+                avg_area = total_area / len(properties) if len(properties) else 0
                 
                 print(f"{method_name:20} | Contornos: {len(contours):3d} | Área total: {total_area:8.0f} | Área promedio: {avg_area:6.0f}")
         
@@ -265,20 +768,56 @@ class SegmentacionContornos:
         print("• Adaptativo (Gaussiano): Similar al anterior pero con peso gaussiano, más suave")
         print("• Otsu: Automático, encuentra el umbral óptimo basado en histograma")
         
+    @profiled_stage
     def save_individual_results(self, output_dir):
-        """Guarda cada resultado individualmente"""
+        """
+        Guarda cada resultado individualmente
+        
+        Las escrituras se reparten entre los hilos de self.writer y continúan en
+        segundo plano hasta self.writer.flush(). Sin writer propio se usa uno
+        temporal y se espera a que termine antes de volver.
+        """
         output_path = Path(output_dir)
         output_path.mkdir(exist_ok=True)
         
         # Guardar imágenes umbralizadas
+        writer = self.writer if self.writer is not None else ResultWriter()
         for name, img in self.results.items():
-            filename = f"{name}.png"
-            filepath = output_path / filename
-            cv2.imwrite(str(filepath), img)
+            filepath = writer.submit(output_path / name, img)
             print(f"✓ Guardado: {filepath}")
+        
+        if self.writer is None:
+            writer.close()
             
-    def run_complete_analysis(self, output_dir="../resultados"):
-        """Ejecuta el análisis completo"""
+    @profiled_stage
+    def save_results_container(self, path, compress=True):
+        """
+        Guarda todos los resultados en un único contenedor .npz con índice
+        
+        Alternativa a save_individual_results que evita un archivo por
+        resultado; ver ResultContainer para leer capas sueltas.
+        
+        Args:
+            path (str): Ruta del .npz de salida
+            compress (bool): Deflate por capa (False = capas mapeables en memoria)
+        """
+        container = ResultContainer.write(path, self.results, compress)
+        print(f"✓ Contenedor guardado: {path} ({len(container.index)} capas)")
+        return container
+        
+    def run_complete_analysis(self, output_dir="../resultados", headless=False, container=None,
+                              animation_format='gif', animation_scale=1.0):
+        """
+        Ejecuta el análisis completo
+        
+        Args:
+            output_dir (str): Directorio de resultados
+            headless (bool): Componer la comparación con OpenCV, sin matplotlib ni ventanas
+            container (str): 'deflate' o 'stored' para guardar un único
+                resultados.npz en lugar de un PNG por resultado (None = PNGs)
+            animation_format (str): Formato de la animación del proceso (ANIMATION_FORMATS)
+            animation_scale (float): Factor de reducción de los frames de la animación
+        """
         print("Iniciando análisis de Segmentación y Contornos...")
         print("="*50)
         
@@ -290,18 +829,27 @@ class SegmentacionContornos:
         self.apply_thresholding()
         
         # Crear visualización comparativa
-        fig = self.create_comparison_visualization()
         comparison_path = Path(output_dir) / "comparison_segmentation.png"
-        fig.savefig(str(comparison_path), dpi=300, bbox_inches='tight')
+        if headless:
+            cv2.imwrite(str(comparison_path), self.create_headless_comparison())
+        else:
+            fig = self.create_comparison_visualization()
+            fig.savefig(str(comparison_path), dpi=300, bbox_inches='tight')
         print(f"✓ Comparación guardada en: {comparison_path}")
-        plt.show()
+        if not headless:
+            import matplotlib.pyplot as plt
+            plt.show()
         
-        # Crear GIF animado
-        gif_path = Path(output_dir) / "segmentacion_proceso.gif"
-        self.create_animated_gif(str(gif_path))
+        # Crear animación del proceso (GIF por defecto)
+        animation_path = Path(output_dir) / f"segmentacion_proceso.{animation_format}"
+        self.create_animated_gif(str(animation_path), scale=animation_scale)
         
-        # Guardar resultados individuales
-        self.save_individual_results(output_dir)
+        # Guardar resultados: un archivo por resultado o un único contenedor
+        if container:
+            self.save_results_container(Path(output_dir) / "resultados.npz",
+                                        compress=container == 'deflate')
+        else:
+            self.save_individual_results(output_dir)
         
         # Análisis
         self.analyze_thresholding_methods()
@@ -309,10 +857,128 @@ class SegmentacionContornos:
         print("\n" + "="*50)
         print("✓ Análisis completo finalizado!")
 
+def otsu_threshold(hist):
+    """
+    Umbral de Otsu a partir de un histograma de 256 bins (mismo criterio que
+    cv2.THRESH_OTSU: maximiza la varianza entre clases)
+    """
+    p = np.asarray(hist, dtype=np.float64).ravel()
+    p = p / p.sum()
+    levels = np.arange(len(p))
+    omega = np.cumsum(p)
+    mu = np.cumsum(p * levels)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sigma_b = (mu[-1] * omega - mu) ** 2 / (omega * (1.0 - omega))
+    eps = np.finfo(np.float32).eps
+    sigma_b[(omega < eps) | (omega > 1.0 - eps) | ~np.isfinite(sigma_b)] = 0.0
+    return int(np.argmax(sigma_b))
+
+def _to_gray(tile):
+    """Convierte una tesela BGR a gris (las de un canal se devuelven tal cual)"""
+    return cv2.cvtColor(tile, cv2.COLOR_BGR2GRAY) if tile.ndim == 3 else tile
+
+def run_tiled_thresholds(source, output_dir, tile_size=1024, shape=None, block_size=11, c=2):
+    """
+    Umbraliza una imagen enorme por teselas, fuera de memoria
+    
+    Los umbrales fijo y adaptativos se calculan tesela a tesela con un halo de
+    block_size // 2 píxeles. Otsu necesita el histograma global: una primera
+    pasada por franjas lo acumula y la segunda aplica el umbral resultante.
+    
+    Args:
+        source (str): Imagen .npy o raw (BGR o escala de grises)
+        output_dir (str): Directorio donde se crean <metodo>.npy
+        tile_size (int): Lado del núcleo de cada tesela
+        shape (tuple): Forma de la imagen si source es raw
+        block_size (int): Tamaño de vecindad de los umbrales adaptativos
+        c (int): Constante restada a la media local
+    
+    Returns:
+        dict: método -> memmap con la imagen binaria completa
+    """
+    src = open_image_memmap(source, shape)
+    height, width = src.shape[:2]
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+    
+    print(f"Umbralizando {height}x{width} por teselas de {tile_size} px...")
+    start = time.perf_counter()
+    
+    # Primera pasada: histograma global para Otsu
+    hist = np.zeros(256, dtype=np.float64)
+    for y in range(0, height, tile_size):
+        strip = _to_gray(np.ascontiguousarray(src[y:y + tile_size]))
+        hist += cv2.calcHist([strip], [0], None, [256], [0, 256]).ravel()
+    otsu = otsu_threshold(hist)
+    
+    results = {
+        key: np.lib.format.open_memmap(str(output_path / f"{key}.npy"), mode='w+',
+                                       dtype=np.uint8, shape=(height, width))
+        for key, _ in THRESHOLD_METHODS
+    }
+    
+    def threshold_tile(tile):
+        gray = _to_gray(tile)
+        return {
+            'thresh_fixed': cv2.threshold(gray, 127, 255, cv2.THRESH_BINARY)[1],
+            'thresh_adaptive_mean': cv2.adaptiveThreshold(
+                gray, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV, block_size, c),
+            'thresh_adaptive_gaussian': cv2.adaptiveThreshold(
+                gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY_INV, block_size, c),
+            'thresh_otsu': cv2.threshold(gray, otsu, 255, cv2.THRESH_BINARY)[1],
+        }
+    
+    # Segunda pasada: umbrales por teselas
+    process_tiled(src, threshold_tile, block_size // 2, results, tile_size)
+    elapsed = time.perf_counter() - start
+    
+    print(f"✓ Umbralización por teselas completada en {elapsed:.2f} s (Otsu = {otsu})")
+    return results
+
+def parse_args():
+    """Lee los argumentos de línea de comandos"""
+    parser = argparse.ArgumentParser(description="Segmentando el Mundo - Binarización y Contornos")
+    parser.add_argument('--tiled', metavar='IMAGEN',
+                        help="Imagen .npy o raw enorme a umbralizar por teselas fuera de memoria")
+    parser.add_argument('--raw-shape', metavar='ALTO,ANCHO[,CANALES]',
+                        help="Forma de la imagen raw del modo por teselas")
+    parser.add_argument('--tile-size', type=int, default=1024,
+                        help="Lado de cada tesela en píxeles")
+    parser.add_argument('--output', default="../resultados",
+                        help="Directorio de resultados")
+    parser.add_argument('--format', choices=ResultWriter.FORMATS, default='png',
+                        help="Formato de los resultados individuales")
+    parser.add_argument('--png-compression', type=int, choices=range(10), default=None,
+                        metavar='0-9', help="Nivel de compresión PNG (0-1 rápido, 9 compacto)")
+    parser.add_argument('--writer-threads', type=int, default=None,
+                        help="Hilos de escritura de resultados (por defecto, hasta 4)")
+    parser.add_argument('--container', nargs='?', const='deflate', choices=('deflate', 'stored'),
+                        help="Guarda todos los resultados en un único .npz con índice "
+                             "(deflate por capa o stored, mapeable en memoria)")
+    parser.add_argument('--animation-format', choices=ANIMATION_FORMATS, default='gif',
+                        help="Formato de la animación del proceso (mp4/webm para secuencias largas)")
+    parser.add_argument('--animation-scale', type=float, default=1.0,
+                        help="Factor de reducción de los frames de la animación (p. ej. 0.5)")
+    parser.add_argument('--headless', action='store_true',
+                        help="Compone la comparación con OpenCV (sin matplotlib ni ventanas)")
+    parser.add_argument('--profile', action='store_true',
+                        help="Mide tiempo y memoria de cada etapa e imprime el perfil")
+    parser.add_argument('--profile-output', metavar='JSON',
+                        help="Guarda el perfil por etapas en un archivo JSON")
+    return parser.parse_args()
+
 def main():
     """Función principal"""
+    args = parse_args()
+    
+    # Modo por teselas: imágenes enormes en .npy/raw, resultados en .npy mapeados
+    if args.tiled:
+        shape = tuple(int(v) for v in args.raw_shape.split(',')) if args.raw_shape else None
+        run_tiled_thresholds(args.tiled, args.output, args.tile_size, shape)
+        return
+    
     # Crear directorio de resultados
-    output_dir = Path("../resultados")
+    output_dir = Path(args.output)
     output_dir.mkdir(exist_ok=True)
     
     # Ruta de imagen de ejemplo (se puede cambiar)
@@ -356,8 +1022,19 @@ def main():
         print(f"✓ Imagen de ejemplo creada: {image_path}")
     
     # Ejecutar análisis
-    segmentador = SegmentacionContornos(image_path)
-    segmentador.run_complete_analysis(str(output_dir))
+    profiler = StageProfiler(track_allocations=True) if args.profile or args.profile_output else None
+    with ResultWriter(workers=args.writer_threads, fmt=args.format,
+                      png_compression=args.png_compression) as writer:
+        segmentador = SegmentacionContornos(image_path, profiler=profiler, writer=writer)
+        segmentador.run_complete_analysis(str(output_dir), headless=args.headless,
+                                          container=args.container,
+                                          animation_format=args.animation_format,
+                                          animation_scale=args.animation_scale)
+    
+    if profiler is not None:
+        profiler.print_report()
+        if args.profile_output:
+            profiler.save_report(args.profile_output)
 
 if __name__ == "__main__":
     main()
@@ -9,23 +9,611 @@ brillo/contraste, y operaciones de matriz directas.
 
 import cv2
 import numpy as np
-import matplotlib.pyplot as plt
 from pathlib import Path
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import argparse
 import os
+import sys
+
+# Utilidades compartidas con los demás ejercicios del taller (ejercicios/comun)
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'comun'))
+from pipeline_comun import (BufferPool, ResultContainer, ResultWriter, StageProfiler,
+                            _ascii_title, compose_grid, profiled_stage)
+
+# matplotlib se importa dentro de los métodos que dibujan figuras: las ejecuciones
+# solo de procesamiento (--headless) arrancan sin él
+
+COMPARISON_TITLE = 'Imagen = Matriz - Operaciones de Píxeles y Canales'
+HISTOGRAM_TITLE = 'Histogramas de Intensidades'
+
+# Canales accesibles como vistas: nombre -> (buffer, índice del canal); OpenCV guarda BGR
+CHANNEL_VIEWS = {
+    'blue': ('bgr', 0),
+    'green': ('bgr', 1),
+    'red': ('bgr', 2),
+    'hue': ('hsv', 0),
+    'saturation': ('hsv', 1),
+    'value': ('hsv', 2),
+}
+
+# Operaciones de región de la comparación: resultado -> [(roi, operación)] (ver RegionEngine)
+REGION_OPERATIONS = {
+    'region_red': [(('rect', 150, 100, 150, 100), ('fill', (255, 0, 0)))],
+    'region_copy_paste': [(('rect', 50, 50, 100, 100), ('copy', (250, 250)))],
+    'region_blur': [(('rect', 200, 200, 200, 100), ('blur', 15))],
+    'region_masked': [(('circle', 300, 200, 80), ('fill', (0, 255, 0)))],
+}
+
+class HistogramEngine:
+    """
+    Histogramas de gris, B, G, R, H, S y V en una sola pasada por la imagen
+    
+    La imagen se recorre por bandas de filas: cada banda se convierte a gris
+    y HSV mientras está en caché y de ella salen los siete histogramas, sin
+    crear copias de la imagen completa. Cada canal usa su rango real (el Hue
+    de OpenCV va de 0 a 179: 180 bins). Los conteos se acumulan en int64, así
+    que varias imágenes pueden sumarse en un mismo motor (accumulate,
+    accumulate_many, merge). Las estadísticas derivadas (media, desviación,
+    percentiles, CDF) se calculan a partir de los conteos y se memorizan
+    hasta la siguiente acumulación.
+    """
+    
+    # Canales y número de bins (rango [0, bins))
+    CHANNELS = {'gray': 256, 'b': 256, 'g': 256, 'r': 256, 'h': 180, 's': 256, 'v': 256}
+    
+    # Percentiles incluidos en stats()
+    PERCENTILES = (1, 5, 25, 50, 75, 95, 99)
+    
+    def __init__(self, channels=None, band_rows=128):
+        """
+        Args:
+            channels (list): Canales a calcular (por defecto, todos los de CHANNELS)
+            band_rows (int): Filas por banda al recorrer la imagen
+        """
+        channels = list(channels) if channels is not None else list(self.CHANNELS)
+        unknown = set(channels) - set(self.CHANNELS)
+        if unknown:
+            raise ValueError(f"Canales no soportados: {', '.join(sorted(unknown))}")
+        
+        self.band_rows = band_rows
+        self.counts = {name: np.zeros(self.CHANNELS[name], dtype=np.int64) for name in channels}
+        self.images = 0
+        self.pixels = 0
+        self._stats = {}
+        
+    def accumulate(self, image, rgb=False):
+        """
+        Suma los histogramas de una imagen a los conteos del motor
+        
+        Args:
+            image (ndarray): Imagen BGR (o RGB con rgb=True) de 8 bits; una
+                imagen de un canal solo admite el canal 'gray'
+            rgb (bool): La imagen está en orden RGB
+        
+        Returns:
+            HistogramEngine: self, para encadenar llamadas
+        """
+        image = np.asarray(image)
+        if image.ndim == 2:
+            if set(self.counts) != {'gray'}:
+                raise ValueError("Una imagen de un canal solo admite el histograma 'gray'")
+        
+        # Índice de cada canal de color en la imagen de entrada
+        color_index = {'r': 0, 'g': 1, 'b': 2} if rgb else {'b': 0, 'g': 1, 'r': 2}
+        need_hsv = any(name in self.counts for name in 'hsv')
+        to_gray = cv2.COLOR_RGB2GRAY if rgb else cv2.COLOR_BGR2GRAY
+        to_hsv = cv2.COLOR_RGB2HSV if rgb else cv2.COLOR_BGR2HSV
+        
+        for top in range(0, image.shape[0], self.band_rows):
+            band = image[top:top + self.band_rows]
+            if 'gray' in self.counts:
+                gray = band if band.ndim == 2 else cv2.cvtColor(band, to_gray)
+                self._add('gray', gray, 0)
+            if band.ndim == 2:
+                continue
+            for name, index in color_index.items():
+                if name in self.counts:
+                    self._add(name, band, index)
+            if need_hsv:
+                hsv = cv2.cvtColor(band, to_hsv)
+                for index, name in enumerate('hsv'):
+                    if name in self.counts:
+                        self._add(name, hsv, index)
+        
+        self.images += 1
+        self.pixels += image.shape[0] * image.shape[1]
+        self._stats.clear()
+        return self
+        
+    def _add(self, name, band, index):
+        """Suma el histograma de un canal de una banda (exacto en float32 dentro de la banda)"""
+        bins = self.CHANNELS[name]
+        self.counts[name] += cv2.calcHist([band], [index], None, [bins], [0, bins]).ravel().astype(np.int64)
+        
+    def accumulate_many(self, images, rgb=False, workers=None):
+        """
+        Acumula un lote de imágenes (arreglos o rutas)
+        
+        Con workers > 1 cada hilo acumula en su propio motor (cv2 libera el GIL)
+        y al final los conteos se suman; las rutas se leen dentro del hilo.
+        
+        Returns:
+            HistogramEngine: self
+        """
+        def histogram(image):
+            engine = HistogramEngine(self.counts, self.band_rows)
+            if isinstance(image, (str, Path)):
+                path, image = image, cv2.imread(str(image))
+                if image is None:
+                    raise ValueError(f"No se pudo cargar la imagen: {path}")
+            return engine.accumulate(image, rgb)
+        
+        if workers is None or workers <= 1:
+            for image in images:
+                self.merge(histogram(image))
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for engine in executor.map(histogram, images):
+                    self.merge(engine)
+        return self
+        
+    def merge(self, other):
+        """Suma los conteos de otro motor con los mismos canales"""
+        if set(other.counts) != set(self.counts):
+            raise ValueError("Los motores de histogramas tienen canales distintos")
+        for name, counts in other.counts.items():
+            self.counts[name] += counts
+        self.images += other.images
+        self.pixels += other.pixels
+        self._stats.clear()
+        return self
+        
+    def histogram(self, name):
+        """Histograma de un canal como columna float32 (mismo formato que cv2.calcHist)"""
+        return self.counts[name].astype(np.float32).reshape(-1, 1)
+        
+    def cdf(self, name):
+        """Función de distribución acumulada normalizada (0-1) de un canal"""
+        return self.stats(name)['cdf']
+        
+    def percentile(self, name, q):
+        """Valor del canal por debajo del cual queda el q% de los píxeles (q escalar o arreglo)"""
+        cdf = self.cdf(name)
+        values = np.searchsorted(cdf, np.asarray(q) / 100.0).clip(0, cdf.size - 1)
+        return int(values) if values.ndim == 0 else values
+        
+    def stats(self, name):
+        """
+        Estadísticas de un canal calculadas desde los conteos (memorizadas)
+        
+        Returns:
+            dict: count, mean, std, min, max, percentiles {q: valor} y cdf
+        """
+        cached = self._stats.get(name)
+        if cached is not None:
+            return cached
+        
+        counts = self.counts[name]
+        total = int(counts.sum())
+        if total == 0:
+            raise ValueError(f"Histograma '{name}' vacío: no se ha acumulado ninguna imagen")
+        
+        values = np.arange(counts.size, dtype=np.float64)
+        mean = float(counts @ values) / total
+        variance = float(counts @ (values - mean) ** 2) / total
+        nonzero = np.flatnonzero(counts)
+        cdf = np.cumsum(counts) / total
+        quantiles = np.searchsorted(cdf, np.asarray(self.PERCENTILES) / 100.0).clip(0, counts.size - 1)
+        
+        stats = {
+            'count': total,
+            'mean': mean,
+            'std': variance ** 0.5,
+            'min': int(nonzero[0]),
+            'max': int(nonzero[-1]),
+            'percentiles': dict(zip(self.PERCENTILES, quantiles.tolist())),
+            'cdf': cdf,
+        }
+        self._stats[name] = stats
+        return stats
+
+class ToneMapper:
+    """
+    Operaciones de punto (tono) como tablas de 256 entradas, compuestas en una sola LUT
+    
+    Una cadena es una lista de operaciones, cada una una tupla:
+    ('linear', alpha, beta[, redondeo]), ('gamma', gamma), ('equalize',) o
+    ('clahe', clip_limit).
+    Las tablas se construyen de forma vectorizada y la cadena se compone en
+    una sola LUT (lut = op_n[... op_1[identidad]]), así que la imagen se
+    recorre una única vez con cv2.LUT. Las LUT compuestas se memorizan por
+    la tupla de la cadena (LRU). 'equalize' y 'clahe' dependen de la imagen:
+    necesitan su histograma, que se lleva a través de las operaciones
+    anteriores de la cadena y forma parte de la clave de la caché.
+    """
+    
+    OPERATIONS = ('linear', 'gamma', 'equalize', 'clahe')
+    
+    def __init__(self, cache_size=32):
+        """
+        Args:
+            cache_size (int): LUT compuestas memorizadas
+        """
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        
+    ROUNDING = ('nearest', 'trunc')
+    
+    @staticmethod
+    def linear_lut(alpha, beta, rounding='nearest'):
+        """
+        LUT de saturate(alpha * x + beta)
+        
+        Con rounding='nearest' es igual que cv2.convertScaleAbs, salvo que satura
+        a 0 en vez de tomar el valor absoluto; con 'trunc' se trunca la parte
+        decimal, como al convertir el resultado en float a uint8.
+        """
+        values = alpha * np.arange(256.0) + beta
+        if rounding == 'nearest':
+            values = np.rint(values)
+        elif rounding != 'trunc':
+            raise ValueError(f"Redondeo no soportado: {rounding} (opciones: {', '.join(ToneMapper.ROUNDING)})")
+        return np.clip(values, 0, 255).astype(np.uint8)
+        
+    @staticmethod
+    def gamma_lut(gamma):
+        """LUT de 255 * (x / 255) ** gamma (gamma < 1 aclara, > 1 oscurece)"""
+        return np.rint(255.0 * (np.arange(256.0) / 255.0) ** gamma).astype(np.uint8)
+        
+    @staticmethod
+    def equalize_lut(hist, clip_limit=None):
+        """
+        LUT de ecualización a partir de un histograma de 256 bins
+        
+        Con clip_limit se recorta cada bin a clip_limit veces la media y el
+        exceso se reparte entre todos los bins, como en cada tesela de CLAHE
+        (aquí con una sola tesela: la curva es global).
+        """
+        hist = np.asarray(hist, dtype=np.float64).ravel()
+        if clip_limit is not None:
+            limit = clip_limit * hist.sum() / hist.size
+            excess = np.clip(hist - limit, 0, None).sum()
+            hist = np.minimum(hist, limit) + excess / hist.size
+        
+        cdf = np.cumsum(hist)
+        nonzero = np.flatnonzero(hist)
+        if nonzero.size == 0:
+            return np.arange(256, dtype=np.uint8)
+        cdf_min = cdf[nonzero[0]]
+        if cdf[-1] <= cdf_min:
+            return np.arange(256, dtype=np.uint8)  # Imagen de un solo nivel: nada que ecualizar
+        return np.clip(np.rint((cdf - cdf_min) / (cdf[-1] - cdf_min) * 255.0), 0, 255).astype(np.uint8)
+        
+    def _operation_lut(self, operation, hist):
+        """LUT de una operación; hist es el histograma a la entrada de la operación"""
+        name, *params = operation
+        if name == 'linear':
+            return self.linear_lut(*params)
+        if name == 'gamma':
+            return self.gamma_lut(*params)
+        if name in ('equalize', 'clahe'):
+            if hist is None:
+                raise ValueError(f"La operación '{name}' necesita el histograma de la imagen (hist)")
+            return self.equalize_lut(hist, *(params if name == 'clahe' else ()))
+        raise ValueError(f"Operación de tono no soportada: {name} (opciones: {', '.join(self.OPERATIONS)})")
+        
+    def lut(self, chain, hist=None):
+        """
+        LUT compuesta (256 entradas uint8) de una cadena de operaciones
+        
+        Args:
+            chain (list): Operaciones en orden de aplicación
+            hist: Histograma de 256 bins de la imagen (solo si la cadena usa
+                'equalize' o 'clahe')
+        """
+        chain = tuple(tuple(operation) for operation in chain)
+        if not any(operation[0] in ('equalize', 'clahe') for operation in chain):
+            hist = None  # La LUT no depende de la imagen: la clave es solo la cadena
+        elif hist is not None:
+            hist = np.asarray(hist, dtype=np.int64).ravel()
+        key = (chain, hist.tobytes() if hist is not None else None)
+        
+        lut = self._cache.get(key)
+        if lut is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return lut
+        
+        self.misses += 1
+        lut = np.arange(256, dtype=np.uint8)
+        for operation in chain:
+            # Histograma a la entrada de esta operación: el original llevado por la LUT acumulada
+            stage_hist = np.bincount(lut, weights=hist, minlength=256) if hist is not None else None
+            lut = self._operation_lut(operation, stage_hist)[lut]
+        
+        self._cache[key] = lut
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return lut
+        
+    def apply(self, image, chain, hist=None, dst=None):
+        """
+        Aplica una cadena de operaciones con una sola pasada de cv2.LUT
+        
+        La misma LUT se aplica a todos los canales, así que el orden de los
+        canales (BGR o RGB) no importa.
+        """
+        return cv2.LUT(image, self.lut(chain, hist), dst=dst)
+        
+    def metrics(self):
+        """Aciertos de la caché de LUT compuestas"""
+        requests = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / requests if requests else 0.0,
+            'cached': len(self._cache),
+        }
+
+class RegionEngine:
+    """
+    Operaciones sobre regiones de interés (ROI), aplicadas en el lugar sobre un buffer
+    
+    Una ROI es una tupla ('rect', x, y, ancho, alto), ('circle', cx, cy, radio)
+    o ('polygon', puntos). Cada operación es ('fill', color), ('blur', ksize),
+    ('copy', (x, y)) o ('mask',). Todo se limita a la caja envolvente de la
+    ROI: la máscara de círculos y polígonos tiene el tamaño de esa caja (y se
+    memoriza por ROI), el blur solo lee la caja más un margen de ksize // 2 y
+    'mask' solo escribe la caja en la máscara de salida, así que el coste
+    crece con el área de las ROI y no con la de la imagen.
+    """
+    
+    SHAPES = ('rect', 'circle', 'polygon')
+    OPERATIONS = ('fill', 'blur', 'copy', 'mask')
+    
+    def __init__(self, cache_size=64):
+        """
+        Args:
+            cache_size (int): Máscaras locales de ROI memorizadas
+        """
+        self.cache_size = cache_size
+        self._masks = OrderedDict()
+        
+    @staticmethod
+    def _key(roi):
+        """Clave hashable de una ROI (los puntos de un polígono pasan a tuplas)"""
+        shape, *params = roi
+        if shape == 'polygon':
+            params = [tuple(map(tuple, np.asarray(params[0]).reshape(-1, 2).tolist()))]
+        return (shape, *params)
+        
+    def region(self, roi):
+        """
+        Caja envolvente y máscara local de una ROI, sin recortar a la imagen
+        
+        Returns:
+            tuple: ((x0, y0, x1, y1), máscara bool del tamaño de la caja o None si
+            la ROI es un rectángulo)
+        """
+        key = self._key(roi)
+        cached = self._masks.get(key)
+        if cached is not None:
+            self._masks.move_to_end(key)
+            return cached
+        
+        shape, *params = key
+        if shape == 'rect':
+            x, y, w, h = (int(v) for v in params)
+            region = ((x, y, x + w, y + h), None)
+        elif shape == 'circle':
+            cx, cy, r = (int(v) for v in params)
+            mask = np.zeros((2 * r + 1, 2 * r + 1), dtype=np.uint8)
+            cv2.circle(mask, (r, r), r, 255, -1)
+            region = ((cx - r, cy - r, cx + r + 1, cy + r + 1), mask.astype(bool))
+        elif shape == 'polygon':
+            points = np.asarray(params[0], dtype=np.int32)
+            x0, y0 = points.min(axis=0)
+            x1, y1 = points.max(axis=0) + 1
+            mask = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+            cv2.fillPoly(mask, [points - (x0, y0)], 255)
+            region = ((int(x0), int(y0), int(x1), int(y1)), mask.astype(bool))
+        else:
+            raise ValueError(f"ROI no soportada: {shape} (opciones: {', '.join(self.SHAPES)})")
+        
+        self._masks[key] = region
+        if len(self._masks) > self.cache_size:
+            self._masks.popitem(last=False)
+        return region
+        
+    @staticmethod
+    def _clip(bounds, mask, shape):
+        """Recorta caja y máscara a los límites de la imagen (None si no se solapan)"""
+        x0, y0, x1, y1 = bounds
+        cx0, cy0 = max(x0, 0), max(y0, 0)
+        cx1, cy1 = min(x1, shape[1]), min(y1, shape[0])
+        if cx0 >= cx1 or cy0 >= cy1:
+            return None
+        if mask is not None:
+            mask = mask[cy0 - y0:cy1 - y0, cx0 - x0:cx1 - x0]
+        return (cx0, cy0, cx1, cy1), mask
+        
+    @staticmethod
+    def _paste(target, values, mask):
+        """Escribe values en target (vistas del mismo tamaño) solo donde mask es True"""
+        if mask is None:
+            target[...] = values
+        else:
+            np.copyto(target, values, where=mask[..., None] if target.ndim == 3 else mask)
+        
+    def apply(self, image, operations, mask=None):
+        """
+        Aplica una lista de operaciones sobre ROI en el lugar, en orden
+        
+        Args:
+            image (ndarray): Buffer de trabajo (se modifica)
+            operations (list): Pares (roi, operación)
+            mask (ndarray): Máscara uint8 de salida para las operaciones 'mask'
+                (None = se crea, a cero, solo si alguna operación la usa)
+        
+        Returns:
+            ndarray: La máscara de salida (None si ninguna operación es 'mask')
+        """
+        for roi, operation in operations:
+            bounds, local = self.region(roi)
+            clipped = self._clip(bounds, local, image.shape)
+            if clipped is None:
+                continue
+            (x0, y0, x1, y1), local = clipped
+            target = image[y0:y1, x0:x1]
+            name, *params = operation
+            
+            if name == 'fill':
+                self._paste(target, np.asarray(params[0], dtype=image.dtype), local)
+            elif name == 'blur':
+                # El blur lee un margen alrededor de la caja para que el borde no cambie de vecinos
+                ksize = int(params[0])
+                halo = ksize // 2
+                px0, py0 = max(x0 - halo, 0), max(y0 - halo, 0)
+                px1, py1 = min(x1 + halo, image.shape[1]), min(y1 + halo, image.shape[0])
+                blurred = cv2.GaussianBlur(image[py0:py1, px0:px1], (ksize, ksize), 0)
+                self._paste(target, blurred[y0 - py0:y1 - py0, x0 - px0:x1 - px0], local)
+            elif name == 'copy':
+                # (x, y) es el destino de la esquina de la ROI sin recortar: si la fuente
+                # se recortó por arriba o por la izquierda, el destino se desplaza igual.
+                # Destino recortado a la imagen; la fuente se copia antes por si se solapan
+                dx, dy = (int(v) for v in params[0])
+                dx += x0 - bounds[0]
+                dy += y0 - bounds[1]
+                destination = self._clip((dx, dy, dx + (x1 - x0), dy + (y1 - y0)), local, image.shape)
+                if destination is None:
+                    continue
+                (dx0, dy0, dx1, dy1), dest_mask = destination
+                source = target[dy0 - dy:dy1 - dy, dx0 - dx:dx1 - dx].copy()
+                self._paste(image[dy0:dy1, dx0:dx1], source, dest_mask)
+            elif name == 'mask':
+                if mask is None:
+                    mask = np.zeros(image.shape[:2], dtype=np.uint8)
+                self._paste(mask[y0:y1, x0:x1], 255, local)
+            else:
+                raise ValueError(f"Operación de ROI no soportada: {name} "
+                                 f"(opciones: {', '.join(self.OPERATIONS)})")
+        return mask
+
+# Colores (RGB) de las curvas, con los mismos nombres que usa matplotlib
+CURVE_COLORS = {
+    'black': (0, 0, 0),
+    'red': (214, 39, 40),
+    'green': (44, 160, 44),
+    'blue': (31, 119, 180),
+    'orange': (255, 127, 14),
+    'purple': (128, 0, 128),
+    'brown': (140, 86, 75),
+}
+
+def plot_curves(curves, size=(640, 400)):
+    """
+    Dibuja curvas (p. ej. histogramas) sobre un panel RGB con OpenCV, sin matplotlib
+    
+    Args:
+        curves (list): Tuplas (valores, nombre de color, etiqueta o None)
+        size (tuple): (ancho, alto) del panel en píxeles
+    
+    Returns:
+        ndarray: Panel RGB con rejilla, curvas y leyenda
+    """
+    font = cv2.FONT_HERSHEY_SIMPLEX
+    width, height = size
+    x0, y0, x1, y1 = 60, 12, width - 12, height - 40
+    panel = np.full((height, width, 3), 255, np.uint8)
+    
+    for k in range(1, 4):
+        y = y0 + (y1 - y0) * k // 4
+        x = x0 + (x1 - x0) * k // 4
+        cv2.line(panel, (x0, y), (x1, y), (225, 225, 225), 1)
+        cv2.line(panel, (x, y0), (x, y1), (225, 225, 225), 1)
+    cv2.rectangle(panel, (x0, y0), (x1, y1), (0, 0, 0), 1)
+    
+    # Escala común: todas las curvas se normalizan al máximo global; el eje x
+    # va de 0 al mayor número de bins (el Hue tiene 180, el resto 256)
+    series = [np.asarray(values, dtype=np.float64).ravel() for values, _, _ in curves]
+    peak = max(float(values.max()) for values in series) or 1.0
+    n_bins = max(values.size for values in series)
+    for values, (_, color, _) in zip(series, curves):
+        xs = x0 + np.arange(values.size) * (x1 - x0) / max(n_bins - 1, 1)
+        ys = y1 - values / peak * (y1 - y0)
+        points = np.round(np.column_stack([xs, ys])).astype(np.int32)
+        cv2.polylines(panel, [points], False, CURVE_COLORS[color], 1, cv2.LINE_AA)
+    
+    # Ejes: extremos de intensidad y escala vertical
+    cv2.putText(panel, '0', (x0 - 4, y1 + 16), font, 0.4, (0, 0, 0), 1, cv2.LINE_AA)
+    cv2.putText(panel, str(n_bins - 1), (x1 - 20, y1 + 16), font, 0.4, (0, 0, 0), 1, cv2.LINE_AA)
+    cv2.putText(panel, 'Intensidad', ((x0 + x1) // 2 - 36, height - 8), font, 0.45, (0, 0, 0), 1, cv2.LINE_AA)
+    cv2.putText(panel, f'{peak:.0f}', (2, y0 + 10), font, 0.35, (0, 0, 0), 1, cv2.LINE_AA)
+    
+    # Leyenda
+    labeled = [(color, label) for _, color, label in curves if label]
+    for i, (color, label) in enumerate(labeled):
+        y = y0 + 20 + i * 18
+        cv2.line(panel, (x1 - 130, y - 4), (x1 - 105, y - 4), CURVE_COLORS[color], 2, cv2.LINE_AA)
+        cv2.putText(panel, _ascii_title(label), (x1 - 98, y), font, 0.45, (0, 0, 0), 1, cv2.LINE_AA)
+    
+    return panel
 
 class ImagenMatriz:
-    def __init__(self, image_path):
+    def __init__(self, image_path, pool=None, profiler=None, writer=None, tone_mapper=None,
+                 regions=None):
         """
         Inicializa el procesador de matrices de imagen con OpenCV
         
         Args:
             image_path (str): Ruta a la imagen de entrada
+            pool (BufferPool): Pool de buffers compartido (por defecto, uno propio)
+            profiler (StageProfiler): Instrumentación por etapas (None = desactivada)
+            writer (ResultWriter): Escritor asíncrono compartido (None = uno temporal
+                por llamada a save_individual_results)
+            tone_mapper (ToneMapper): Caché de LUT compartida (por defecto, una propia)
+            regions (RegionEngine): Motor de ROI compartido (por defecto, uno propio)
         """
         self.image_path = image_path
+        self.profiler = profiler
+        self.writer = writer
         self.original = None
         self.original_rgb = None
         self.results = {}
+        self.pool = pool if pool is not None else BufferPool()
+        self.tone_mapper = tone_mapper if tone_mapper is not None else ToneMapper()
+        self.regions = regions if regions is not None else RegionEngine()
+        # Resultados cuyo buffer proviene del pool (los únicos que se le devuelven)
+        self._pooled_results = set()
+        self._histograms = None
+        self._hsv = None
+        
+    def _store_pooled(self, name, img):
+        """Guarda un resultado cuyo buffer se tomó del pool"""
+        self.results[name] = img
+        self._pooled_results.add(name)
+        
+    def release_results(self):
+        """
+        Devuelve al pool los buffers de los resultados y vacía self.results
+        
+        Antes se espera a las escrituras pendientes de self.writer, que leen esos buffers.
+        """
+        if self.writer is not None:
+            self.writer.flush()
+        for name in self._pooled_results:
+            self.pool.release(self.results.get(name))
+        self._pooled_results.clear()
+        self.results = {}
+        
+        # Las vistas de canales HSV ya no se usan: su buffer vuelve al pool
+        self.pool.release(self._hsv)
+        self._hsv = None
         
+    @profiled_stage
     def load_image(self):
         """Carga la imagen original"""
         self.original = cv2.imread(self.image_path)
@@ -34,108 +622,132 @@ class ImagenMatriz:
         
         # Convertir BGR a RGB para matplotlib
         self.original_rgb = cv2.cvtColor(self.original, cv2.COLOR_BGR2RGB)
+        self._histograms = None
+        if self._hsv is not None:
+            self._release_hsv()
         print(f"Imagen cargada: {self.original.shape}")
         
+    @property
+    def histograms(self):
+        """Histogramas de la imagen original (HistogramEngine, calculados una vez en una pasada)"""
+        if self._histograms is None:
+            self._histograms = HistogramEngine().accumulate(self.original)
+        return self._histograms
+        
+    def _release_hsv(self):
+        """
+        Devuelve al pool el buffer HSV de la imagen anterior
+        
+        Sus vistas en self.results ('hue', 'saturation', 'value') quedarían
+        obsoletas, así que se quitan; antes se espera a las escrituras
+        pendientes, que pueden estar leyéndolas.
+        """
+        if self.writer is not None:
+            self.writer.flush()
+        for name, (source, _) in CHANNEL_VIEWS.items():
+            view = self.results.get(name)
+            if source == 'hsv' and view is not None and view.base is self._hsv:
+                del self.results[name]
+        self.pool.release(self._hsv)
+        self._hsv = None
+        
+    @property
+    def hsv(self):
+        """Imagen en HSV (un buffer del pool, convertido una sola vez)"""
+        if self._hsv is None:
+            self._hsv = cv2.cvtColor(self.original, cv2.COLOR_BGR2HSV,
+                                     dst=self.pool.acquire(self.original.shape))
+        return self._hsv
+        
+    def channel(self, name, contiguous=False):
+        """
+        Canal de la imagen BGR o HSV como vista de NumPy, sin copiar datos
+        
+        La vista recorre el buffer entrelazado con paso de 3 bytes; quien
+        necesite memoria contigua (p. ej. una función de C que no acepte
+        pasos) pide contiguous=True y solo entonces se copia el plano.
+        
+        Args:
+            name (str): Uno de CHANNEL_VIEWS ('blue', 'green', 'red', 'hue',
+                'saturation', 'value')
+            contiguous (bool): Devolver una copia contigua del plano
+        """
+        source, index = CHANNEL_VIEWS[name]
+        buffer = self.original if source == 'bgr' else self.hsv
+        view = buffer[..., index]
+        return np.ascontiguousarray(view) if contiguous else view
+        
+    @profiled_stage
     def separate_channels(self):
-        """Separa los canales RGB y HSV"""
-        # Separar canales RGB
-        r, g, b = cv2.split(self.original)
-        self.results['red'] = r
-        self.results['green'] = g
-        self.results['blue'] = b
-        
-        # Convertir a HSV y separar canales
-        hsv = cv2.cvtColor(self.original, cv2.COLOR_BGR2HSV)
-        h, s, v = cv2.split(hsv)
-        self.results['hue'] = h
-        self.results['saturation'] = s
-        self.results['value'] = v
+        """Separa los canales RGB y HSV como vistas (sin copiar los planos)"""
+        # Los canales BGR son vistas de la original; los HSV, de un único buffer HSV
+        for name in CHANNEL_VIEWS:
+            self.results[name] = self.channel(name)
         
         print("✓ Separación de canales RGB y HSV completada")
         
+    @profiled_stage
     def create_region_operations(self):
         """Crea operaciones de slicing y edición de regiones"""
-        # Crear copias para edición
-        img_copy1 = self.original_rgb.copy()
-        img_copy2 = self.original_rgb.copy()
-        img_copy3 = self.original_rgb.copy()
-        
-        # Operación 1: Cambiar color de una región específica
-        # Seleccionar región (x1, y1, x2, y2)
-        region1 = img_copy1[100:200, 150:300]  # Slicing de región
-        region1[:, :] = [255, 0, 0]  # Cambiar a rojo
-        self.results['region_red'] = img_copy1
-        
-        # Operación 2: Copiar y pegar región
-        # Copiar región de una parte a otra
-        source_region = img_copy2[50:150, 50:150]
-        img_copy2[250:350, 250:350] = source_region  # Pegar en nueva ubicación
-        self.results['region_copy_paste'] = img_copy2
-        
-        # Operación 3: Aplicar filtro a región específica
-        # Aplicar blur gaussiano solo a una región
-        region3 = img_copy3[200:300, 200:400]
-        region3_blurred = cv2.GaussianBlur(region3, (15, 15), 0)
-        img_copy3[200:300, 200:400] = region3_blurred
-        self.results['region_blur'] = img_copy3
-        
-        # Operación 4: Crear máscara y aplicar operación
-        mask = np.zeros(img_copy1.shape[:2], dtype=np.uint8)
-        cv2.circle(mask, (300, 200), 80, 255, -1)  # Círculo blanco
-        img_masked = self.original_rgb.copy()
-        img_masked[mask == 255] = [0, 255, 0]  # Verde donde hay máscara
-        self.results['region_masked'] = img_masked
+        # Cada resultado es una imagen completa e independiente (se muestra, se guarda
+        # y se empaqueta por separado), así que necesita su propia copia de la original:
+        # una escritura completa por resultado es el mínimo. Esa copia va a un buffer
+        # del pool (sin asignar memoria en la siguiente imagen) y es el buffer de
+        # trabajo de todas las operaciones del resultado, que se aplican en el lugar
+        # y solo tocan la caja de cada ROI. Quien solo necesite un resultado con todas
+        # las ROI puede pasar las listas concatenadas a self.regions.apply
+        for name, operations in REGION_OPERATIONS.items():
+            result = self.pool.acquire(self.original_rgb.shape)
+            np.copyto(result, self.original_rgb)
+            self.regions.apply(result, operations)
+            self._store_pooled(name, result)
         
         print("✓ Operaciones de slicing y edición de regiones completadas")
         
+    @profiled_stage
     def create_histograms(self):
         """Crea histogramas de intensidades para diferentes canales"""
-        # Histograma de imagen en escala de grises
-        gray = cv2.cvtColor(self.original, cv2.COLOR_BGR2GRAY)
-        hist_gray = cv2.calcHist([gray], [0], None, [256], [0, 256])
-        
-        # Histogramas de canales RGB
-        hist_r = cv2.calcHist([self.original], [2], None, [256], [0, 256])  # Red (BGR)
-        hist_g = cv2.calcHist([self.original], [1], None, [256], [0, 256])  # Green
-        hist_b = cv2.calcHist([self.original], [0], None, [256], [0, 256])  # Blue
-        
-        # Guardar histogramas como imágenes
-        self.results['histogram_gray'] = hist_gray
-        self.results['histogram_r'] = hist_r
-        self.results['histogram_g'] = hist_g
-        self.results['histogram_b'] = hist_b
+        # Gris, B, G, R, H (180 bins), S y V salen de una sola pasada por la imagen
+        for name in HistogramEngine.CHANNELS:
+            self.results[f'histogram_{name}'] = self.histograms.histogram(name)
         
         print("✓ Histogramas de intensidades calculados")
         
+    @profiled_stage
     def apply_brightness_contrast(self):
         """Aplica operaciones de brillo y contraste"""
-        # Brillo y contraste manual
         alpha = 1.5  # Contraste (1.0 = sin cambio)
         beta = 50    # Brillo (0 = sin cambio)
         
-        # Aplicar transformación: new_pixel = alpha * pixel + beta
-        bright_contrast = cv2.convertScaleAbs(self.original, alpha=alpha, beta=beta)
-        bright_contrast_rgb = cv2.cvtColor(bright_contrast, cv2.COLOR_BGR2RGB)
-        self.results['bright_contrast'] = bright_contrast_rgb
+        # new_pixel = alpha * pixel + beta como LUT, en una pasada de cv2.LUT; la LUT
+        # es la misma para los tres canales, así que se aplica directamente sobre RGB
+        bright_contrast = self.tone_mapper.apply(self.original_rgb, [('linear', alpha, beta)],
+                                                 dst=self.pool.acquire(self.original_rgb.shape))
+        self._store_pooled('bright_contrast', bright_contrast)
         
-        # Usar OpenCV para brillo y contraste
-        # Crear lookup table para transformación
-        lut = np.zeros((1, 256), dtype=np.uint8)
-        for i in range(256):
-            lut[0, i] = np.clip(alpha * i + beta, 0, 255)
+        # Misma transformación con la LUT truncada de la versión original (al convertir
+        # alpha * x + beta a uint8 se descarta la parte decimal)
+        enhanced = self.tone_mapper.apply(self.original_rgb, [('linear', alpha, beta, 'trunc')],
+                                          dst=self.pool.acquire(self.original_rgb.shape))
+        self._store_pooled('enhanced', enhanced)
         
-        # Aplicar lookup table
-        enhanced = cv2.LUT(self.original, lut)
-        enhanced_rgb = cv2.cvtColor(enhanced, cv2.COLOR_BGR2RGB)
-        self.results['enhanced'] = enhanced_rgb
+        # Curva de tono automática: ecualización tipo CLAHE (sobre el histograma de
+        # grises) seguida de una gamma suave, compuestas en una sola LUT
+        tone_curve = self.tone_mapper.apply(self.original_rgb, [('clahe', 2.0), ('gamma', 0.9)],
+                                            hist=self.histograms.counts['gray'],
+                                            dst=self.pool.acquire(self.original_rgb.shape))
+        self._store_pooled('tone_curve', tone_curve)
         
         print("✓ Operaciones de brillo y contraste aplicadas")
         
+    @profiled_stage
     def create_matrix_operations(self):
         """Crea operaciones de matriz directas"""
-        # Operación 1: Inversión de colores
-        inverted = 255 - self.original_rgb
-        self.results['inverted'] = inverted
+        rgb_shape = self.original_rgb.shape
+        
+        # Operación 1: Inversión de colores (255 - pixel)
+        inverted = cv2.bitwise_not(self.original_rgb, dst=self.pool.acquire(rgb_shape))
+        self._store_pooled('inverted', inverted)
         
         # Operación 2: Escala de grises manual (promedio de canales)
         gray_manual = np.mean(self.original_rgb, axis=2).astype(np.uint8)
@@ -143,31 +755,33 @@ class ImagenMatriz:
         
         # Operación 3: Operaciones bitwise
         # Crear máscara binaria
-        gray = cv2.cvtColor(self.original, cv2.COLOR_BGR2GRAY)
-        _, mask = cv2.threshold(gray, 127, 255, cv2.THRESH_BINARY)
+        gray = cv2.cvtColor(self.original, cv2.COLOR_BGR2GRAY,
+                            dst=self.pool.acquire(rgb_shape[:2]))
+        _, mask = cv2.threshold(gray, 127, 255, cv2.THRESH_BINARY,
+                                dst=self.pool.acquire(rgb_shape[:2]))
         
-        # Aplicar operaciones bitwise
-        bitwise_and = cv2.bitwise_and(self.original_rgb, self.original_rgb, mask=mask)
-        self.results['bitwise_and'] = bitwise_and
+        # Aplicar operaciones bitwise (dst a cero: fuera de la máscara queda negro)
+        bitwise_and = self.pool.acquire(rgb_shape)
+        bitwise_and.fill(0)
+        cv2.bitwise_and(self.original_rgb, self.original_rgb, dst=bitwise_and, mask=mask)
+        self._store_pooled('bitwise_and', bitwise_and)
+        self.pool.release(gray)
+        self.pool.release(mask)
         
         # Operación 4: Transformaciones geométricas con matrices
         # Rotación usando matriz de transformación
         height, width = self.original_rgb.shape[:2]
         center = (width // 2, height // 2)
         rotation_matrix = cv2.getRotationMatrix2D(center, 45, 1.0)  # 45 grados
-        rotated = cv2.warpAffine(self.original_rgb, rotation_matrix, (width, height))
-        self.results['rotated'] = rotated
+        rotated = cv2.warpAffine(self.original_rgb, rotation_matrix, (width, height),
+                                 dst=self.pool.acquire(rgb_shape))
+        self._store_pooled('rotated', rotated)
         
         print("✓ Operaciones de matriz directas completadas")
         
-    def create_comparison_visualization(self):
-        """Crea visualización comparativa de todas las operaciones"""
-        # Configurar la figura
-        fig, axes = plt.subplots(4, 4, figsize=(20, 16))
-        fig.suptitle('Imagen = Matriz - Operaciones de Píxeles y Canales', fontsize=20, fontweight='bold')
-        
-        # Lista de operaciones a mostrar
-        operations = [
+    def _operation_panels(self):
+        """Lista de (imagen, título) de la comparación de operaciones"""
+        return [
             (self.original_rgb, 'Original'),
             (self.results['red'], 'Canal Rojo'),
             (self.results['green'], 'Canal Verde'),
@@ -186,6 +800,18 @@ class ImagenMatriz:
             (self.results['rotated'], 'Rotado 45°')
         ]
         
+    @profiled_stage
+    def create_comparison_visualization(self):
+        """Crea visualización comparativa de todas las operaciones"""
+        import matplotlib.pyplot as plt  # Import diferido: solo las figuras lo necesitan
+        
+        # Configurar la figura
+        fig, axes = plt.subplots(4, 4, figsize=(20, 16))
+        fig.suptitle(COMPARISON_TITLE, fontsize=20, fontweight='bold')
+        
+        # Lista de operaciones a mostrar
+        operations = self._operation_panels()
+        
         # Mostrar cada operación
         for i, (img, title) in enumerate(operations):
             row = i // 4
@@ -203,65 +829,67 @@ class ImagenMatriz:
         plt.tight_layout()
         return fig
         
+    def _histogram_panels(self):
+        """
+        Histogramas a dibujar, por panel
+        
+        Returns:
+            list: Tuplas (título, curvas, alpha); cada curva es (valores, color, etiqueta o None)
+        """
+        # Histogramas de la original (memorizados en el motor)
+        hist_gray, hist_r, hist_g, hist_b, hist_h, hist_s, hist_v = (
+            self.histograms.histogram(name) for name in ('gray', 'r', 'g', 'b', 'h', 's', 'v'))
+        
+        # Comparación antes/después (el resultado de brillo/contraste está en RGB)
+        enhanced = HistogramEngine(['gray']).accumulate(self.results['bright_contrast'], rgb=True)
+        hist_enhanced = enhanced.histogram('gray')
+        
+        return [
+            ('Escala de Grises', [(hist_gray, 'black', None)], 1.0),
+            ('Canales RGB', [(hist_r, 'red', 'Rojo'),
+                             (hist_g, 'green', 'Verde'),
+                             (hist_b, 'blue', 'Azul')], 1.0),
+            ('Canales HSV', [(hist_h, 'orange', 'Hue'),
+                             (hist_s, 'purple', 'Saturación'),
+                             (hist_v, 'brown', 'Valor')], 1.0),
+            ('Antes vs Después (Brillo/Contraste)', [(hist_gray, 'blue', 'Original'),
+                                                     (hist_enhanced, 'red', 'Mejorado')], 0.7),
+        ]
+        
+    @profiled_stage
     def create_histogram_visualization(self):
         """Crea visualización de histogramas"""
+        import matplotlib.pyplot as plt  # Import diferido: solo las figuras lo necesitan
+        
         fig, axes = plt.subplots(2, 2, figsize=(15, 10))
-        fig.suptitle('Histogramas de Intensidades', fontsize=16, fontweight='bold')
-        
-        # Histograma de escala de grises
-        gray = cv2.cvtColor(self.original, cv2.COLOR_BGR2GRAY)
-        hist_gray = cv2.calcHist([gray], [0], None, [256], [0, 256])
-        axes[0, 0].plot(hist_gray, color='black')
-        axes[0, 0].set_title('Escala de Grises')
-        axes[0, 0].set_xlabel('Intensidad')
-        axes[0, 0].set_ylabel('Frecuencia')
-        axes[0, 0].grid(True)
-        
-        # Histogramas RGB
-        hist_r = cv2.calcHist([self.original], [2], None, [256], [0, 256])  # Red
-        hist_g = cv2.calcHist([self.original], [1], None, [256], [0, 256])  # Green
-        hist_b = cv2.calcHist([self.original], [0], None, [256], [0, 256])  # Blue
-        
-        axes[0, 1].plot(hist_r, color='red', label='Rojo')
-        axes[0, 1].plot(hist_g, color='green', label='Verde')
-        axes[0, 1].plot(hist_b, color='blue', label='Azul')
-        axes[0, 1].set_title('Canales RGB')
-        axes[0, 1].set_xlabel('Intensidad')
-        axes[0, 1].set_ylabel('Frecuencia')
-        axes[0, 1].legend()
-        axes[0, 1].grid(True)
-        
-        # Histograma HSV
-        hsv = cv2.cvtColor(self.original, cv2.COLOR_BGR2HSV)
-        hist_h = cv2.calcHist([hsv], [0], None, [256], [0, 256])  # Hue
-        hist_s = cv2.calcHist([hsv], [1], None, [256], [0, 256])  # Saturation
-        hist_v = cv2.calcHist([hsv], [2], None, [256], [0, 256])  # Value
-        
-        axes[1, 0].plot(hist_h, color='orange', label='Hue')
-        axes[1, 0].plot(hist_s, color='purple', label='Saturación')
-        axes[1, 0].plot(hist_v, color='brown', label='Valor')
-        axes[1, 0].set_title('Canales HSV')
-        axes[1, 0].set_xlabel('Intensidad')
-        axes[1, 0].set_ylabel('Frecuencia')
-        axes[1, 0].legend()
-        axes[1, 0].grid(True)
-        
-        # Comparación antes/después
-        hist_original = cv2.calcHist([gray], [0], None, [256], [0, 256])
-        enhanced_gray = cv2.cvtColor(self.results['bright_contrast'], cv2.COLOR_RGB2GRAY)
-        hist_enhanced = cv2.calcHist([enhanced_gray], [0], None, [256], [0, 256])
-        
-        axes[1, 1].plot(hist_original, color='blue', label='Original', alpha=0.7)
-        axes[1, 1].plot(hist_enhanced, color='red', label='Mejorado', alpha=0.7)
-        axes[1, 1].set_title('Antes vs Después (Brillo/Contraste)')
-        axes[1, 1].set_xlabel('Intensidad')
-        axes[1, 1].set_ylabel('Frecuencia')
-        axes[1, 1].legend()
-        axes[1, 1].grid(True)
+        fig.suptitle(HISTOGRAM_TITLE, fontsize=16, fontweight='bold')
+        
+        for ax, (title, curves, alpha) in zip(axes.flat, self._histogram_panels()):
+            for values, color, label in curves:
+                ax.plot(values, color=color, label=label, alpha=alpha)
+            ax.set_title(title)
+            ax.set_xlabel('Intensidad')
+            ax.set_ylabel('Frecuencia')
+            if any(label for _, _, label in curves):
+                ax.legend()
+            ax.grid(True)
         
         plt.tight_layout()
         return fig
         
+    @profiled_stage
+    def create_headless_visualizations(self):
+        """
+        Compone la comparación y los histogramas con OpenCV (sin matplotlib)
+        
+        Returns:
+            tuple: (lienzo de operaciones, lienzo de histogramas), ambos BGR
+        """
+        comparison = compose_grid(self._operation_panels(), cols=4, title=COMPARISON_TITLE, cell_width=400)
+        panels = [(plot_curves(curves), title) for title, curves, _ in self._histogram_panels()]
+        histograms = compose_grid(panels, cols=2, title=HISTOGRAM_TITLE, cell_width=640)
+        return comparison, histograms
+        
     def analyze_matrix_operations(self):
         """Analiza las operaciones de matriz realizadas"""
         print("\n" + "="*60)
@@ -282,50 +910,76 @@ class ImagenMatriz:
         
         # Análisis de histogramas
         print("\n3. ANÁLISIS DE HISTOGRAMAS:")
-        gray = cv2.cvtColor(self.original, cv2.COLOR_BGR2GRAY)
-        hist = cv2.calcHist([gray], [0], None, [256], [0, 256])
+        # Estadísticas derivadas del histograma de grises (sin recorrer la imagen otra vez)
+        stats = self.histograms.stats('gray')
+        percentiles = stats['percentiles']
         
-        # Calcular estadísticas del histograma
-        mean_intensity = np.mean(gray)
-        std_intensity = np.std(gray)
-        min_intensity = np.min(gray)
-        max_intensity = np.max(gray)
-        
-        print(f"   • Intensidad promedio: {mean_intensity:.1f}")
-        print(f"   • Desviación estándar: {std_intensity:.1f}")
-        print(f"   • Rango de intensidades: {min_intensity} - {max_intensity}")
+        print(f"   • Intensidad promedio: {stats['mean']:.1f}")
+        print(f"   • Desviación estándar: {stats['std']:.1f}")
+        print(f"   • Rango de intensidades: {stats['min']} - {stats['max']}")
+        print(f"   • Percentiles 5/50/95: {percentiles[5]} / {percentiles[50]} / {percentiles[95]}")
         
         # Análisis de operaciones
         print("\n4. OPERACIONES DE MATRIZ:")
         print("   • Inversión: 255 - pixel (operación elemento a elemento)")
         print("   • Brillo/Contraste: alpha * pixel + beta")
+        print("   • Curvas de tono: cadenas de operaciones de punto compuestas en una sola LUT")
         print("   • Transformaciones geométricas: Matrices de rotación/traslación")
         print("   • Operaciones bitwise: AND, OR, XOR a nivel de bits")
         
+    @profiled_stage
     def save_individual_results(self, output_dir):
-        """Guarda cada resultado individualmente"""
+        """
+        Guarda cada resultado individualmente
+        
+        Las escrituras (incluida la conversión RGB→BGR) se reparten entre los
+        hilos de self.writer y continúan en segundo plano hasta
+        self.writer.flush(). Sin writer propio se usa uno temporal y se espera
+        a que termine antes de volver.
+        """
         output_path = Path(output_dir)
         output_path.mkdir(exist_ok=True)
         
         # Guardar imágenes de canales
+        writer = self.writer if self.writer is not None else ResultWriter()
         for name, img in self.results.items():
             if name.startswith('histogram'):
                 continue  # Los histogramas se guardan por separado
-                
-            filename = f"{name}.png"
-            filepath = output_path / filename
-            
-            if len(img.shape) == 3:  # Imagen a color
-                # Convertir RGB a BGR para OpenCV
-                img_bgr = cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
-                cv2.imwrite(str(filepath), img_bgr)
-            else:  # Imagen en escala de grises
-                cv2.imwrite(str(filepath), img)
             
+            # Las imágenes a color se convierten de RGB a BGR para OpenCV
+            conversion = cv2.COLOR_RGB2BGR if len(img.shape) == 3 else None
+            filepath = writer.submit(output_path / name, img, conversion)
             print(f"✓ Guardado: {filepath}")
+        
+        if self.writer is None:
+            writer.close()
             
-    def run_complete_analysis(self, output_dir="../resultados"):
-        """Ejecuta el análisis completo"""
+    @profiled_stage
+    def save_results_container(self, path, compress=True):
+        """
+        Guarda todos los resultados en un único contenedor .npz con índice
+        
+        Alternativa a save_individual_results que evita un archivo por
+        resultado; ver ResultContainer para leer capas sueltas.
+        
+        Args:
+            path (str): Ruta del .npz de salida
+            compress (bool): Deflate por capa (False = capas mapeables en memoria)
+        """
+        container = ResultContainer.write(path, self.results, compress)
+        print(f"✓ Contenedor guardado: {path} ({len(container.index)} capas)")
+        return container
+        
+    def run_complete_analysis(self, output_dir="../resultados", headless=False, container=None):
+        """
+        Ejecuta el análisis completo
+        
+        Args:
+            output_dir (str): Directorio de resultados
+            headless (bool): Componer las figuras con OpenCV, sin matplotlib ni ventanas
+            container (str): 'deflate' o 'stored' para guardar un único
+                resultados.npz en lugar de un PNG por resultado (None = PNGs)
+        """
         print("Iniciando análisis de Imagen = Matriz...")
         print("="*50)
         
@@ -340,21 +994,34 @@ class ImagenMatriz:
         self.create_matrix_operations()
         
         # Crear visualizaciones
-        fig1 = self.create_comparison_visualization()
         comparison_path = Path(output_dir) / "comparison_matrix_operations.png"
-        fig1.savefig(str(comparison_path), dpi=300, bbox_inches='tight')
-        print(f"✓ Comparación guardada en: {comparison_path}")
-        plt.show()
-        
-        # Crear visualización de histogramas
-        fig2 = self.create_histogram_visualization()
         histogram_path = Path(output_dir) / "histograms_analysis.png"
-        fig2.savefig(str(histogram_path), dpi=300, bbox_inches='tight')
-        print(f"✓ Histogramas guardados en: {histogram_path}")
-        plt.show()
+        if headless:
+            comparison, histograms = self.create_headless_visualizations()
+            cv2.imwrite(str(comparison_path), comparison)
+            print(f"✓ Comparación guardada en: {comparison_path}")
+            cv2.imwrite(str(histogram_path), histograms)
+            print(f"✓ Histogramas guardados en: {histogram_path}")
+        else:
+            import matplotlib.pyplot as plt
+            
+            fig1 = self.create_comparison_visualization()
+            fig1.savefig(str(comparison_path), dpi=300, bbox_inches='tight')
+            print(f"✓ Comparación guardada en: {comparison_path}")
+            plt.show()
+            
+            # Crear visualización de histogramas
+            fig2 = self.create_histogram_visualization()
+            fig2.savefig(str(histogram_path), dpi=300, bbox_inches='tight')
+            print(f"✓ Histogramas guardados en: {histogram_path}")
+            plt.show()
         
-        # Guardar resultados individuales
-        self.save_individual_results(output_dir)
+        # Guardar resultados: un archivo por resultado o un único contenedor
+        if container:
+            self.save_results_container(Path(output_dir) / "resultados.npz",
+                                        compress=container == 'deflate')
+        else:
+            self.save_individual_results(output_dir)
         
         # Análisis
         self.analyze_matrix_operations()
@@ -362,10 +1029,34 @@ class ImagenMatriz:
         print("\n" + "="*50)
         print("✓ Análisis completo finalizado!")
 
+def parse_args():
+    """Lee los argumentos de línea de comandos"""
+    parser = argparse.ArgumentParser(description="Imagen = Matriz - Canales, Slicing, Histogramas")
+    parser.add_argument('--output', default="../resultados",
+                        help="Directorio de resultados")
+    parser.add_argument('--format', choices=ResultWriter.FORMATS, default='png',
+                        help="Formato de los resultados individuales")
+    parser.add_argument('--png-compression', type=int, choices=range(10), default=None,
+                        metavar='0-9', help="Nivel de compresión PNG (0-1 rápido, 9 compacto)")
+    parser.add_argument('--writer-threads', type=int, default=None,
+                        help="Hilos de escritura de resultados (por defecto, hasta 4)")
+    parser.add_argument('--container', nargs='?', const='deflate', choices=('deflate', 'stored'),
+                        help="Guarda todos los resultados en un único .npz con índice "
+                             "(deflate por capa o stored, mapeable en memoria)")
+    parser.add_argument('--headless', action='store_true',
+                        help="Compone las figuras con OpenCV (sin matplotlib ni ventanas)")
+    parser.add_argument('--profile', action='store_true',
+                        help="Mide tiempo y memoria de cada etapa e imprime el perfil")
+    parser.add_argument('--profile-output', metavar='JSON',
+                        help="Guarda el perfil por etapas en un archivo JSON")
+    return parser.parse_args()
+
 def main():
     """Función principal"""
+    args = parse_args()
+    
     # Crear directorio de resultados
-    output_dir = Path("../resultados")
+    output_dir = Path(args.output)
     output_dir.mkdir(exist_ok=True)
     
     # Ruta de imagen de ejemplo (se puede cambiar)
@@ -405,8 +1096,16 @@ def main():
         print(f"✓ Imagen de ejemplo creada: {image_path}")
     
     # Ejecutar análisis
-    matriz = ImagenMatriz(image_path)
-    matriz.run_complete_analysis(str(output_dir))
+    profiler = StageProfiler(track_allocations=True) if args.profile or args.profile_output else None
+    with ResultWriter(workers=args.writer_threads, fmt=args.format,
+                      png_compression=args.png_compression) as writer:
+        matriz = ImagenMatriz(image_path, profiler=profiler, writer=writer)
+        matriz.run_complete_analysis(str(output_dir), headless=args.headless, container=args.container)
+    
+    if profiler is not None:
+        profiler.print_report()
+        if args.profile_output:
+            profiler.save_report(args.profile_output)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,588 @@
+"""
+Utilidades compartidas por los ejercicios del Taller 2
+Taller: Computación Visual & 3D
+
+Pool de buffers, escritura asíncrona de resultados, contenedor .npz de un solo
+archivo, perfilado por etapas, compositor de figuras sin matplotlib, escritor
+de GIF en streaming y procesamiento por teselas fuera de memoria. Cada script de ejercicio añade
+este directorio a sys.path y las importa (y las reexporta) desde aquí.
+"""
+
+import cv2
+import numpy as np
+from pathlib import Path
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait
+import contextlib
+import functools
+import json
+import os
+import struct
+import threading
+import time
+import tracemalloc
+import unicodedata
+import zipfile
+
+class BufferPool:
+    """
+    Pool de buffers reutilizables indexado por (forma, dtype)
+    
+    Las operaciones de OpenCV toman su argumento dst= del pool con acquire() y,
+    cuando ningún consumidor necesita ya el resultado, el buffer vuelve al pool
+    con release() para reutilizarse en el siguiente frame o imagen. Un buffer
+    que ya está libre no se vuelve a encolar: si no, dos acquire() seguidos
+    devolverían el mismo arreglo.
+    """
+    
+    def __init__(self, max_bytes=None):
+        """
+        Args:
+            max_bytes (int): Máximo de bytes libres retenidos; los buffers que lo
+                excedan se descartan al liberarlos (None = sin límite)
+        """
+        self.max_bytes = max_bytes
+        self._free = defaultdict(list)
+        self._free_ids = set()
+        self.hits = 0
+        self.misses = 0
+        self.bytes_held = 0
+        self.peak_bytes_held = 0
+        
+    def acquire(self, shape, dtype=np.uint8):
+        """Devuelve un buffer sin inicializar de la forma y tipo pedidos"""
+        free = self._free.get((tuple(shape), np.dtype(dtype)))
+        if free:
+            self.hits += 1
+            buf = free.pop()
+            self._free_ids.discard(id(buf))
+            self.bytes_held -= buf.nbytes
+            return buf
+        self.misses += 1
+        return np.empty(shape, dtype=dtype)
+        
+    def release(self, buf):
+        """
+        Devuelve un buffer al pool
+        
+        Se ignoran vistas, arreglos no contiguos y buffers que ya están libres
+        (liberados dos veces).
+        """
+        if buf is None or buf.base is not None or not buf.flags['C_CONTIGUOUS']:
+            return
+        if id(buf) in self._free_ids:
+            return
+        if self.max_bytes is not None and self.bytes_held + buf.nbytes > self.max_bytes:
+            return
+        self._free[(buf.shape, buf.dtype)].append(buf)
+        self._free_ids.add(id(buf))
+        self.bytes_held += buf.nbytes
+        self.peak_bytes_held = max(self.peak_bytes_held, self.bytes_held)
+        
+    def metrics(self):
+        """Tasa de aciertos y memoria retenida por el pool"""
+        requests = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / requests if requests else 0.0,
+            'bytes_held': self.bytes_held,
+            'peak_bytes_held': self.peak_bytes_held,
+        }
+
+class ResultWriter:
+    """
+    Escritura asíncrona (write-behind) de imágenes con un pool de hilos
+    
+    cv2.imwrite libera el GIL mientras codifica, así que varios hilos
+    codifican y escriben en paralelo. Como mucho hay max_pending escrituras
+    en curso: submit() bloquea cuando la cola está llena (backpressure).
+    flush() espera a que terminen todas las escrituras enviadas.
+    """
+    
+    # Formatos admitidos: sin pérdida (png, bmp, tiff) y con pérdida (jpg, webp)
+    FORMATS = ('png', 'bmp', 'tiff', 'jpg', 'webp')
+    
+    def __init__(self, workers=None, max_pending=16, fmt='png', png_compression=None, quality=95):
+        """
+        Args:
+            workers (int): Hilos de escritura (por defecto, hasta 4)
+            max_pending (int): Escrituras en cola antes de bloquear submit()
+            fmt (str): Formato de salida, uno de FORMATS
+            png_compression (int): Nivel zlib 0-9 para PNG (None = el de OpenCV);
+                0-1 es lo más rápido, 9 lo más compacto
+            quality (int): Calidad 0-100 para jpg y webp
+        """
+        if fmt not in self.FORMATS:
+            raise ValueError(f"Formato no soportado: {fmt} (opciones: {', '.join(self.FORMATS)})")
+        
+        self.extension = f".{fmt}"
+        if fmt == 'png' and png_compression is not None:
+            self.params = [cv2.IMWRITE_PNG_COMPRESSION, int(png_compression)]
+        elif fmt == 'jpg':
+            self.params = [cv2.IMWRITE_JPEG_QUALITY, int(quality)]
+        elif fmt == 'webp':
+            self.params = [cv2.IMWRITE_WEBP_QUALITY, int(quality)]
+        else:
+            self.params = []
+        
+        workers = workers or min(4, os.cpu_count() or 1)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='result-writer')
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._pending = []
+        self.written = 0
+        
+    def submit(self, path, img, conversion=None):
+        """
+        Encola la escritura de img en path + extensión del formato
+        
+        El arreglo no se copia: no debe modificarse ni devolverse a un pool
+        hasta que flush() haya terminado.
+        
+        Args:
+            path (str): Ruta de salida sin extensión
+            img (ndarray): Imagen a escribir
+            conversion (int): Código cv2.COLOR_* a aplicar antes de escribir
+                (p. ej. cv2.COLOR_RGB2BGR); se ejecuta en el hilo de escritura
+        
+        Returns:
+            str: Ruta final del archivo
+        """
+        filepath = f"{path}{self.extension}"
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(self._write, filepath, img, conversion)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        with self._lock:
+            self._pending.append(future)
+        return filepath
+        
+    def _write(self, filepath, img, conversion):
+        """Convierte (si hace falta) y escribe una imagen; se ejecuta en un hilo del pool"""
+        if conversion is not None:
+            img = cv2.cvtColor(img, conversion)
+        if not cv2.imwrite(filepath, img, self.params):
+            raise OSError(f"No se pudo escribir: {filepath}")
+        return filepath
+        
+    def flush(self):
+        """
+        Espera a que terminen todas las escrituras enviadas
+        
+        Returns:
+            list: Rutas escritas, en orden de envío
+        
+        Raises:
+            OSError: La primera escritura fallida (tras esperar a todas las demás)
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+        wait(pending)
+        paths = [future.result() for future in pending]
+        self.written += len(paths)
+        return paths
+        
+    def close(self):
+        """Espera a las escrituras pendientes y libera los hilos"""
+        try:
+            self.flush()
+        finally:
+            self._executor.shutdown(wait=True)
+        
+    def __enter__(self):
+        return self
+        
+    def __exit__(self, *exc_info):
+        self.close()
+
+class ResultContainer:
+    """
+    Contenedor de un solo archivo con todos los resultados de una imagen
+    
+    Es un .npz (un .npy por capa, legible con np.load) con un index.json que
+    describe forma y dtype de cada capa. Cada capa se comprime por separado,
+    así que leer una no decodifica las demás; si se guardó sin compresión
+    (compress=False) la capa se mapea en memoria directamente desde el zip.
+    """
+    
+    INDEX = 'index.json'
+    
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Ruta del contenedor .npz existente
+        """
+        self.path = str(path)
+        with zipfile.ZipFile(self.path) as archive:
+            self.index = json.loads(archive.read(self.INDEX))
+            self._members = {name: archive.getinfo(f"{name}.npy") for name in self.index}
+        
+    @classmethod
+    def write(cls, path, results, compress=True):
+        """
+        Escribe un diccionario nombre -> arreglo como contenedor
+        
+        Args:
+            path (str): Ruta del .npz de salida
+            results (dict): Capas a guardar
+            compress (bool): Deflate por capa; False guarda las capas tal cual
+                para poder mapearlas en memoria al leerlas
+        
+        Returns:
+            ResultContainer: El contenedor recién escrito
+        """
+        compression = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+        index = {}
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with zipfile.ZipFile(str(path), 'w', compression=compression) as archive:
+            for name, arr in results.items():
+                arr = np.asarray(arr)
+                with archive.open(f"{name}.npy", 'w', force_zip64=True) as member:
+                    np.lib.format.write_array(member, arr, allow_pickle=False)
+                index[name] = {'shape': list(arr.shape), 'dtype': arr.dtype.str}
+            archive.writestr(cls.INDEX, json.dumps(index, indent=2))
+        return cls(path)
+        
+    def __contains__(self, name):
+        return name in self.index
+        
+    def names(self):
+        """Nombres de las capas, en el orden en que se guardaron"""
+        return list(self.index)
+        
+    def load(self, name, mmap=True):
+        """
+        Lee una sola capa del contenedor
+        
+        Args:
+            name (str): Nombre de la capa
+            mmap (bool): Mapear en memoria si la capa se guardó sin compresión
+        
+        Returns:
+            ndarray: La capa (np.memmap de solo lectura si se pudo mapear)
+        """
+        info = self._members[name]
+        if mmap and info.compress_type == zipfile.ZIP_STORED:
+            return self._memmap(info)
+        with zipfile.ZipFile(self.path) as archive, archive.open(info) as member:
+            return np.lib.format.read_array(member, allow_pickle=False)
+        
+    def _memmap(self, info):
+        """Mapea en memoria los datos de un .npy almacenado sin compresión dentro del zip"""
+        with open(self.path, 'rb') as fh:
+            # Cabecera local del zip: 30 bytes fijos + nombre + campo extra
+            fh.seek(info.header_offset)
+            name_length, extra_length = struct.unpack('<HH', fh.read(30)[26:30])
+            fh.seek(info.header_offset + 30 + name_length + extra_length)
+            version = np.lib.format.read_magic(fh)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(fh)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(fh)
+            offset = fh.tell()
+        return np.memmap(self.path, dtype=dtype, mode='r', offset=offset, shape=shape,
+                         order='F' if fortran_order else 'C')
+
+class StageProfiler:
+    """
+    Instrumentación por etapas: tiempo y, opcionalmente, memoria asignada
+    
+    Cada etapa decorada con @profiled_stage genera un registro
+    {'stage', 'seconds', 'depth'[, 'allocated_bytes', 'peak_bytes']} que se
+    guarda en self.records y se pasa a cada callback, p. ej. para enviarlo a un
+    sistema de métricas propio.
+    """
+    
+    def __init__(self, callbacks=None, track_allocations=False):
+        """
+        Args:
+            callbacks (list): Funciones callback(registro) llamadas al cerrar cada etapa
+            track_allocations (bool): Medir memoria con tracemalloc (más lento)
+        """
+        self.callbacks = list(callbacks or [])
+        self.track_allocations = track_allocations
+        self.records = []
+        self._stack = []
+        
+    def add_callback(self, callback):
+        """Registra un callback(registro) adicional"""
+        self.callbacks.append(callback)
+        
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Mide el bloque como una etapa (admite etapas anidadas)"""
+        frame = {'peak': 0, 'start_mem': 0}
+        if self.track_allocations:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            current, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                # El pico de la etapa padre hasta ahora, antes de reiniciarlo
+                self._stack[-1]['peak'] = max(self._stack[-1]['peak'], peak)
+            tracemalloc.reset_peak()
+            frame['start_mem'] = current
+        self._stack.append(frame)
+        
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._stack.pop()
+            record = {'stage': name, 'seconds': elapsed, 'depth': len(self._stack)}
+            if self.track_allocations:
+                current, peak = tracemalloc.get_traced_memory()
+                frame_peak = max(frame['peak'], peak)
+                record['allocated_bytes'] = current - frame['start_mem']
+                record['peak_bytes'] = frame_peak - frame['start_mem']
+                if self._stack:
+                    self._stack[-1]['peak'] = max(self._stack[-1]['peak'], frame_peak)
+            self.records.append(record)
+            for callback in self.callbacks:
+                callback(record)
+        
+    def report(self):
+        """Informe estructurado: registros en orden y resumen por etapa"""
+        summary = {}
+        for record in self.records:
+            entry = summary.setdefault(record['stage'], {'calls': 0, 'total_seconds': 0.0})
+            entry['calls'] += 1
+            entry['total_seconds'] += record['seconds']
+            if 'peak_bytes' in record:
+                entry['peak_bytes'] = max(entry.get('peak_bytes', 0), record['peak_bytes'])
+        top_level = sum(r['seconds'] for r in self.records if r['depth'] == 0)
+        return {'records': list(self.records), 'summary': summary, 'total_seconds': top_level}
+        
+    def print_report(self):
+        """Imprime el resumen por etapa"""
+        report = self.report()
+        print("\n" + "="*60)
+        print("PERFIL POR ETAPAS")
+        print("="*60)
+        for name, entry in report['summary'].items():
+            line = f"{name:32} {entry['calls']:3d}x {entry['total_seconds'] * 1000:10.2f} ms"
+            if 'peak_bytes' in entry:
+                line += f" | pico {entry['peak_bytes'] / 1e6:8.1f} MB"
+            print(line)
+        print(f"{'Total':32}      {report['total_seconds'] * 1000:10.2f} ms")
+        
+    def save_report(self, path):
+        """Guarda el informe como JSON"""
+        Path(path).write_text(json.dumps(self.report(), indent=2))
+
+def profiled_stage(method):
+    """Decora un método de etapa para medirlo con self.profiler (si no es None)"""
+    name = method.__name__
+    
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.profiler is None:
+            return method(self, *args, **kwargs)
+        with self.profiler.stage(name):
+            return method(self, *args, **kwargs)
+    return wrapper
+
+def _ascii_title(text):
+    """Las fuentes Hershey de cv2.putText solo dibujan ASCII: quita tildes y símbolos"""
+    text = text.replace('°', ' grados').replace('\n', ' - ')
+    return unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
+
+def compose_grid(panels, cols, title=None, cell_width=480):
+    """
+    Compone imágenes con título en un único lienzo BGR, sin matplotlib
+    
+    Las imágenes en escala de grises se reescalan a 0-255 (como imshow con
+    cmap='gray') y las de color se asumen RGB, igual que en las figuras.
+    
+    Args:
+        panels (list): Pares (imagen, título); imagen None deja la celda vacía
+        cols (int): Número de columnas
+        title (str): Título general del lienzo
+        cell_width (int): Ancho de cada celda en píxeles
+    
+    Returns:
+        ndarray: Lienzo BGR listo para cv2.imwrite
+    """
+    font = cv2.FONT_HERSHEY_SIMPLEX
+    reference = next(img for img, _ in panels if img is not None)
+    cell_height = int(round(cell_width * reference.shape[0] / reference.shape[1]))
+    band = 32
+    header = 48 if title else 0
+    rows = -(-len(panels) // cols)
+    
+    canvas = np.full((header + rows * (cell_height + band), cols * cell_width, 3), 255, np.uint8)
+    if title:
+        cv2.putText(canvas, _ascii_title(title), (12, 34), font, 0.9, (0, 0, 0), 2, cv2.LINE_AA)
+    
+    for i, (img, label) in enumerate(panels):
+        if img is None:
+            continue
+        row, col = divmod(i, cols)
+        y = header + row * (cell_height + band)
+        x = col * cell_width
+        cv2.putText(canvas, _ascii_title(label), (x + 8, y + 22), font, 0.6, (0, 0, 0), 1, cv2.LINE_AA)
+        
+        # Reducir primero y convertir después: las conversiones trabajan sobre la celda
+        height, width = img.shape[:2]
+        scale = min(cell_width / width, cell_height / height)
+        size = (max(int(width * scale), 1), max(int(height * scale), 1))
+        cell = cv2.resize(img, size, interpolation=cv2.INTER_AREA)
+        if cell.ndim == 2:
+            cell = cv2.normalize(cell, None, 0, 255, cv2.NORM_MINMAX, dtype=cv2.CV_8U)
+            cell = cv2.cvtColor(cell, cv2.COLOR_GRAY2BGR)
+        else:
+            cell = cv2.cvtColor(cell, cv2.COLOR_RGB2BGR)
+        
+        oy = y + band + (cell_height - size[1]) // 2
+        ox = x + (cell_width - size[0]) // 2
+        canvas[oy:oy + size[1], ox:ox + size[0]] = cell
+    
+    return canvas
+
+class GifStreamWriter:
+    """
+    Escritor de GIF animado en streaming
+    
+    Cada frame se cuantiza y se escribe en el archivo en cuanto llega (Pillow
+    genera la cabecera y los bloques LZW con GifImagePlugin.getheader/getdata),
+    así que la memoria no crece con el número de frames. Con paleta global la
+    paleta se calcula una sola vez (con palette_sample o con el primer frame)
+    y cada frame solo se mapea a ella, sin difuminado; con
+    global_palette=False cada frame lleva su propia paleta local.
+    """
+    
+    def __init__(self, path, fps=10.0, loop=0, palette_sample=None, colors=256,
+                 reserved_colors=(), global_palette=True):
+        """
+        Args:
+            path (str): Archivo .gif de salida
+            fps (float): Frames por segundo (el GIF guarda centésimas de segundo)
+            loop (int): Repeticiones (0 = infinitas)
+            palette_sample (ndarray): Imagen RGB de la que sacar la paleta global
+                (None = el primer frame)
+            colors (int): Tamaño de la paleta (hasta 256)
+            reserved_colors (list): Colores RGB que siempre entran en la paleta
+                global (p. ej. los de anotaciones que no están en la muestra)
+            global_palette (bool): Una paleta para todos los frames en lugar de una por frame
+        """
+        self.path = str(path)
+        self.duration = 1000 / fps
+        self.loop = loop
+        self.colors = colors
+        self.reserved_colors = [tuple(int(v) for v in color) for color in reserved_colors]
+        self.global_palette = global_palette
+        self.frames = 0
+        self._palette = None
+        self._file = None
+        if global_palette and palette_sample is not None:
+            self.set_palette(palette_sample)
+        
+    def set_palette(self, sample):
+        """Calcula la paleta global (median cut) con los colores reservados al final"""
+        from PIL import Image  # Import diferido: solo el GIF lo necesita
+        
+        colors = self.colors - len(self.reserved_colors)
+        palette = Image.fromarray(np.ascontiguousarray(sample)).quantize(colors).getpalette()[:3 * colors]
+        palette += [v for color in self.reserved_colors for v in color]
+        self._palette = Image.new('P', (1, 1))
+        self._palette.putpalette(palette)
+        
+    def _quantize(self, frame):
+        """Frame indexado (imagen P de Pillow) con la paleta global o una propia"""
+        from PIL import Image
+        
+        image = Image.fromarray(np.ascontiguousarray(frame))
+        if self._palette is not None:
+            return image.quantize(palette=self._palette, dither=Image.Dither.NONE)
+        return image.quantize(self.colors)
+        
+    def add_frame(self, frame):
+        """
+        Cuantiza un frame RGB (uint8, alto × ancho × 3) y lo escribe en el archivo
+        
+        El frame no se conserva: el llamador puede reutilizar su buffer.
+        """
+        from PIL import GifImagePlugin
+        
+        if self.global_palette and self._palette is None:
+            self.set_palette(frame)
+        indexed = self._quantize(frame)
+        if self._file is None:
+            # Cabecera con el tamaño y la paleta del primer frame (la global, si la hay)
+            header, _ = GifImagePlugin.getheader(indexed, info={'loop': self.loop,
+                                                                'duration': self.duration})
+            self._file = open(self.path, 'wb')
+            for chunk in header:
+                self._file.write(chunk)
+        # Extensión de control (retardo), descriptor, paleta local si hace falta y datos LZW
+        for chunk in GifImagePlugin.getdata(indexed, duration=self.duration,
+                                            include_color_table=not self.global_palette):
+            self._file.write(chunk)
+        self.frames += 1
+        
+    def close(self):
+        """Escribe el terminador del GIF y cierra el archivo"""
+        if self._file is not None:
+            self._file.write(b'\x3b')
+            self._file.close()
+            self._file = None
+        
+    def __enter__(self):
+        return self
+        
+    def __exit__(self, *exc_info):
+        self.close()
+
+def open_image_memmap(path, shape=None, dtype=np.uint8):
+    """
+    Abre una imagen sin comprimir como memmap de solo lectura (no la carga en RAM)
+    
+    Args:
+        path (str): Archivo .npy o volcado crudo (raw) de píxeles
+        shape (tuple): (alto, ancho) o (alto, ancho, canales); obligatorio para raw
+        dtype: Tipo de los píxeles del archivo raw
+    """
+    if Path(path).suffix.lower() == '.npy':
+        return np.load(path, mmap_mode='r')
+    if shape is None:
+        raise ValueError(f"Se necesita la forma (alto, ancho[, canales]) del archivo raw: {path}")
+    return np.memmap(path, dtype=dtype, mode='r', shape=tuple(shape))
+
+def process_tiled(src, func, halo, outputs, tile_size=1024):
+    """
+    Aplica func por teselas con solapamiento (halo) y las cose en outputs
+    
+    Cada tesela se lee con `halo` píxeles extra por lado, de modo que el núcleo
+    escrito en la salida no depende del borde de la tesela y no quedan costuras.
+    En los bordes reales de la imagen no hay halo y el filtro extrapola igual que
+    sobre la imagen completa.
+    
+    Args:
+        src (ndarray): Imagen de entrada (puede ser un memmap)
+        func (callable): tesela -> dict nombre -> resultado del mismo alto/ancho
+        halo (int): Radio máximo de los filtros aplicados por func
+        outputs (dict): nombre -> arreglo de salida (H, W), p. ej. memmaps
+        tile_size (int): Lado del núcleo de cada tesela
+    """
+    height, width = src.shape[:2]
+    for y in range(0, height, tile_size):
+        for x in range(0, width, tile_size):
+            y0, x0 = max(y - halo, 0), max(x - halo, 0)
+            y1 = min(y + tile_size + halo, height)
+            x1 = min(x + tile_size + halo, width)
+            h = min(tile_size, height - y)
+            w = min(tile_size, width - x)
+            
+            results = func(np.ascontiguousarray(src[y0:y1, x0:x1]))
+            for name, result in results.items():
+                outputs[name][y:y + h, x:x + w] = result[y - y0:y - y0 + h, x - x0:x - x0 + w]
+        
+        # Volcar a disco la franja terminada para acotar la memoria residente
+        for out in outputs.values():
+            if isinstance(out, np.memmap):
+                out.flush()
+    return outputs
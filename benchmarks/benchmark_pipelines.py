@@ -0,0 +1,298 @@
+"""
+Benchmark de los pipelines de Computación Visual
+Taller 0 (TransformacionesBasicas) y Taller 2 (OjosDigitales, SegmentacionContornos, ImagenMatriz)
+
+Mide cada operación sobre imágenes sintéticas de 256x256 hasta 8K: latencia
+mediana y p95, throughput y memoria pico. Escribe los resultados en JSON y
+puede compararlos contra una línea base guardada; si alguna operación se
+vuelve más lenta que la tolerancia, el script termina con código 1.
+"""
+
+import argparse
+import collections
+import contextlib
+import io
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import matplotlib
+matplotlib.use('Agg')  # Sin ventanas: las figuras solo se crean en memoria
+
+import cv2
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+MODULE_DIRS = [
+    ROOT / '2025-09-10_taller_0_transformaciones' / 'python',
+    ROOT / '2025-10-01_taller_2_cv_3d' / 'ejercicios' / '02_ojos_digitales_opencv' / 'python',
+    ROOT / '2025-10-01_taller_2_cv_3d' / 'ejercicios' / '03_segmentacion_umbral_contornos' / 'python',
+    ROOT / '2025-10-01_taller_2_cv_3d' / 'ejercicios' / '04_imagen_matriz_pixeles' / 'python',
+]
+for module_dir in MODULE_DIRS:
+    sys.path.insert(0, str(module_dir))
+
+from transformaciones_2d import GrafoEscena, TransformacionesBasicas
+from ojos_digitales import OjosDigitales
+from segmentacion_contornos import SegmentacionContornos
+from imagen_matriz import ImagenMatriz
+
+# Tamaños (ancho, alto) de las imágenes sintéticas
+SIZES = {
+    '256': (256, 256),
+    '512': (512, 512),
+    '1k': (1024, 1024),
+    '1080p': (1920, 1080),
+    '4k': (3840, 2160),
+    '8k': (7680, 4320),
+}
+
+# TransformacionesBasicas trabaja con puntos: un punto por bloque de 8x8 píxeles
+POINTS_PER_PIXEL = 1 / 64
+
+DEFAULT_TOLERANCE = 0.25  # 25 % más lento que la línea base = regresión
+MIN_REGRESSION_MS = 1.0   # Diferencias menores se consideran ruido
+
+def make_synthetic_image(width, height, seed=0):
+    """Imagen BGR determinista con textura suave y formas (para tener contornos)"""
+    rng = np.random.default_rng(seed)
+    low = rng.integers(0, 256, size=(max(height // 32, 2), max(width // 32, 2), 3), dtype=np.uint8)
+    image = cv2.resize(low, (width, height), interpolation=cv2.INTER_CUBIC)
+
+    for _ in range(12):
+        x, y = int(rng.integers(0, width)), int(rng.integers(0, height))
+        size = int(rng.integers(min(width, height) // 20 + 1, min(width, height) // 6 + 2))
+        color = tuple(int(c) for c in rng.integers(0, 256, size=3))
+        if rng.random() < 0.5:
+            cv2.rectangle(image, (x, y), (x + size, y + size), color, -1)
+        else:
+            cv2.circle(image, (x, y), size // 2, color, -1)
+    return image
+
+def measure(func, repeat):
+    """Ejecuta func una vez con tracemalloc (memoria pico) y repeat veces cronometradas"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        tracemalloc.start()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            times.append(time.perf_counter() - start)
+
+    ms = np.asarray(times) * 1000.0
+    return {
+        'median_ms': float(np.median(ms)),
+        'p95_ms': float(np.percentile(ms, 95)),
+        'peak_mb': peak / 1e6,
+    }
+
+def ojos_operations(image_path, output_dir):
+    """Operaciones de OjosDigitales en el orden del pipeline"""
+    ojos = OjosDigitales(str(image_path), verbose=False)
+    ojos.load_image()
+    ojos.convert_to_grayscale()
+    return [
+        ('load_image', ojos.load_image),
+        ('convert_to_grayscale', ojos.convert_to_grayscale),
+        ('apply_blur_filters', ojos.apply_blur_filters),
+        ('apply_sharpen_filters', ojos.apply_sharpen_filters),
+        ('apply_edge_detection', ojos.apply_edge_detection),
+        ('save_individual_results', lambda: ojos.save_individual_results(output_dir)),
+    ]
+
+def segmentacion_operations(image_path, output_dir):
+    """Operaciones de SegmentacionContornos (sin la caché de contornos)"""
+    seg = SegmentacionContornos(str(image_path))
+    with contextlib.redirect_stdout(io.StringIO()):
+        seg.load_image()
+        seg.convert_to_grayscale()
+        seg.apply_thresholding()
+        contours = seg.find_contours(seg.results['thresh_otsu'])
+        properties = seg.calculate_contour_properties(contours)
+    thresh = seg.results['thresh_otsu']
+    return [
+        ('load_image', seg.load_image),
+        ('convert_to_grayscale', seg.convert_to_grayscale),
+        ('apply_thresholding', seg.apply_thresholding),
+        # 3 bloques × 4 valores de C desde el motor memorizado de seg.thresholds
+        ('threshold_sweep', lambda: collections.deque(
+            seg.thresholds.sweep((11, 21, 31), (0, 2, 4, 6), inverse=True), maxlen=0)),
+        ('find_contours', lambda: seg.find_contours(thresh)),
+        ('calculate_contour_properties', lambda: seg.calculate_contour_properties(contours)),
+        ('draw_contours_and_properties', lambda: seg.draw_contours_and_properties(thresh, properties)),
+        ('save_individual_results', lambda: seg.save_individual_results(output_dir)),
+    ]
+
+def matriz_operations(image_path, output_dir):
+    """Operaciones de ImagenMatriz en el orden del pipeline"""
+    matriz = ImagenMatriz(str(image_path))
+    with contextlib.redirect_stdout(io.StringIO()):
+        matriz.load_image()
+    return [
+        ('load_image', matriz.load_image),
+        ('separate_channels', matriz.separate_channels),
+        ('create_region_operations', matriz.create_region_operations),
+        ('create_histograms', matriz.create_histograms),
+        ('apply_brightness_contrast', matriz.apply_brightness_contrast),
+        ('create_matrix_operations', matriz.create_matrix_operations),
+        ('save_individual_results', lambda: matriz.save_individual_results(output_dir)),
+    ]
+
+def transformaciones_operations(n_points):
+    """Operaciones de TransformacionesBasicas sobre una figura de n_points puntos"""
+    transformaciones = TransformacionesBasicas()
+    angles = np.linspace(0, 2 * np.pi, n_points, endpoint=False)
+    figura = np.vstack([np.cos(angles), np.sin(angles)])
+    compuesta = (transformaciones.matriz_traslacion(0.5, 0.2)
+                 @ transformaciones.matriz_rotacion(np.pi / 4)
+                 @ transformaciones.matriz_escala(1.5, 0.8))
+    pila = np.repeat(compuesta[None], 100, axis=0)  # 100 pasos de tiempo
+    registrada = transformaciones.registrar_figura(figura, np.float32)
+
+    # Escena jerárquica: un triángulo por nodo bajo 16 grupos, n_points vértices en total
+    escena = GrafoEscena()
+    raiz = escena.agregar_nodo()
+    grupos = [escena.agregar_nodo(padre=raiz, tx=i / 16) for i in range(16)]
+    for i in range(max(n_points // 4, 1)):
+        escena.agregar_nodo(transformaciones.figura_original, padre=grupos[i % 16], angulo=i)
+    hoja = escena.nodos - 1
+    return transformaciones, [
+        ('matrices_trs', lambda: (transformaciones.matriz_traslacion(0.5, 0.2),
+                                  transformaciones.matriz_rotacion(np.pi / 4),
+                                  transformaciones.matriz_escala(1.5, 0.8))),
+        ('matrices_animacion_x1000', lambda: transformaciones.matrices_animacion(1000)),
+        ('aplicar_transformacion', lambda: transformaciones.aplicar_transformacion(figura, compuesta)),
+        ('aplicar_transformaciones_x100', lambda: transformaciones.aplicar_transformaciones(
+            registrada, pila, np.float32)),
+        ('escena_raiz_sucia', lambda: (escena.fijar_trs(raiz, angulo=0.1), escena.transformar())),
+        ('escena_hoja_sucia', lambda: (escena.fijar_trs(hoja, angulo=0.1), escena.transformar())),
+    ]
+
+def run_benchmarks(sizes, repeat):
+    """Ejecuta todas las operaciones para cada tamaño y devuelve la lista de resultados"""
+    results = []
+
+    def record(module, operation, size_name, units, func):
+        stats = measure(func, repeat)
+        stats.update({
+            'module': module,
+            'operation': operation,
+            'size': size_name,
+            'throughput': units / (stats['median_ms'] / 1000.0) if stats['median_ms'] > 0 else 0.0,
+        })
+        results.append(stats)
+        print(f"{module:22} {operation:30} {size_name:>6} | mediana {stats['median_ms']:9.2f} ms "
+              f"| p95 {stats['p95_ms']:9.2f} ms | pico {stats['peak_mb']:8.1f} MB")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_path = Path(tmp)
+        for size_name in sizes:
+            width, height = SIZES[size_name]
+            pixels = width * height
+            image_path = tmp_path / f"synthetic_{size_name}.png"
+            cv2.imwrite(str(image_path), make_synthetic_image(width, height))
+            output_dir = tmp_path / f"out_{size_name}"
+            output_dir.mkdir()
+
+            suites = [
+                ('OjosDigitales', ojos_operations),
+                ('SegmentacionContornos', segmentacion_operations),
+                ('ImagenMatriz', matriz_operations),
+            ]
+            for module, build in suites:
+                for operation, func in build(image_path, output_dir):
+                    try:
+                        record(module, operation, size_name, pixels, func)
+                    except (ValueError, cv2.error) as e:
+                        # p. ej. regiones fijas de ImagenMatriz que no caben en 256x256
+                        print(f"{module:22} {operation:30} {size_name:>6} | omitida: {e}")
+
+            n_points = max(int(pixels * POINTS_PER_PIXEL), 4)
+            transformaciones, operations = transformaciones_operations(n_points)
+            for operation, func in operations:
+                record('TransformacionesBasicas', operation, size_name, n_points, func)
+
+        # El frame de animación no depende del tamaño de imagen: se mide una vez
+        record('TransformacionesBasicas', 'animacion_frame', 'n/a', 1,
+               lambda: transformaciones.animacion_frame(50))
+
+    return results
+
+def compare_with_baseline(results, baseline, tolerance):
+    """Devuelve las operaciones cuya mediana empeoró más que la tolerancia"""
+    reference = {(r['module'], r['operation'], r['size']): r for r in baseline['results']}
+    regressions = []
+    for result in results:
+        base = reference.get((result['module'], result['operation'], result['size']))
+        if base is None:
+            continue
+        limit = base['median_ms'] * (1.0 + tolerance)
+        if result['median_ms'] > limit and result['median_ms'] - base['median_ms'] > MIN_REGRESSION_MS:
+            regressions.append((result, base))
+    return regressions
+
+def parse_args():
+    """Lee los argumentos de línea de comandos"""
+    parser = argparse.ArgumentParser(description="Benchmark de los pipelines de visión y transformaciones")
+    parser.add_argument('--sizes', default=','.join(SIZES),
+                        help=f"Tamaños a medir, separados por comas ({', '.join(SIZES)})")
+    parser.add_argument('--repeat', type=int, default=5,
+                        help="Repeticiones cronometradas por operación")
+    parser.add_argument('--output', default='benchmark_results.json',
+                        help="Archivo JSON de resultados")
+    parser.add_argument('--baseline', help="JSON de línea base contra el que comparar")
+    parser.add_argument('--save-baseline', metavar='ARCHIVO',
+                        help="Guarda además los resultados como nueva línea base")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="Empeoramiento relativo de la mediana admitido (0.25 = 25 %%)")
+    return parser.parse_args()
+
+def main():
+    """Función principal"""
+    args = parse_args()
+    sizes = args.sizes.split(',')
+    unknown = [s for s in sizes if s not in SIZES]
+    if unknown:
+        raise SystemExit(f"Tamaños desconocidos: {', '.join(unknown)}")
+
+    print("=== Benchmark de pipelines ===")
+    results = run_benchmarks(sizes, args.repeat)
+
+    report = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'opencv': cv2.__version__,
+        'numpy': np.__version__,
+        'repeat': args.repeat,
+        'results': results,
+    }
+    Path(args.output).write_text(json.dumps(report, indent=2))
+    print(f"\n✓ Resultados guardados en: {args.output}")
+
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(json.dumps(report, indent=2))
+        print(f"✓ Línea base guardada en: {args.save_baseline}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        regressions = compare_with_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n✗ {len(regressions)} REGRESIONES (tolerancia {args.tolerance:.0%}):")
+            for result, base in regressions:
+                print(f"   • {result['module']}.{result['operation']} [{result['size']}]: "
+                      f"{base['median_ms']:.2f} ms -> {result['median_ms']:.2f} ms "
+                      f"(x{result['median_ms'] / base['median_ms']:.2f})")
+            sys.exit(1)
+        print(f"\n✓ Sin regresiones respecto a {args.baseline}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark de arranque de los scripts de Computación Visual
+Taller 2 (ojos_digitales.py, segmentacion_contornos.py, imagen_matriz.py)
+
+Mide el tiempo de arranque en modo solo procesamiento (`script.py --help`:
+intérprete + imports + argparse) en procesos nuevos, como los lanza un
+planificador de trabajos, y lo compara con el de importar solo cv2 y NumPy.
+Comprueba además que importar cada módulo no carga matplotlib ni imageio.
+Si algún script supera el presupuesto, el script termina con código 1.
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+EXERCISES = ROOT / '2025-10-01_taller_2_cv_3d' / 'ejercicios'
+SCRIPTS = [
+    EXERCISES / '02_ojos_digitales_opencv' / 'python' / 'ojos_digitales.py',
+    EXERCISES / '03_segmentacion_umbral_contornos' / 'python' / 'segmentacion_contornos.py',
+    EXERCISES / '04_imagen_matriz_pixeles' / 'python' / 'imagen_matriz.py',
+]
+
+# Dependencias de visualización que no deben cargarse al arrancar
+HEAVY_MODULES = ('matplotlib', 'imageio', 'PIL')
+
+# Presupuesto: ms de arranque por encima de `python -c "import cv2, numpy"`
+DEFAULT_BUDGET_MS = 150.0
+
+def time_command(command, cwd, repeat):
+    """Mediana y p95 (ms) del tiempo de pared de un comando en procesos nuevos"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=cwd, check=True, stdout=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    ms = np.asarray(times) * 1000.0
+    return float(np.median(ms)), float(np.percentile(ms, 95))
+
+def heavy_modules_loaded(script):
+    """Dependencias pesadas presentes en sys.modules tras importar el módulo del script"""
+    code = (f"import sys; sys.path.insert(0, {str(script.parent)!r}); import {script.stem}; "
+            f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    output = subprocess.run([sys.executable, '-c', code], cwd=script.parent, check=True,
+                            capture_output=True, text=True).stdout.strip()
+    return [m for m in output.split(',') if m]
+
+def parse_args():
+    """Lee los argumentos de línea de comandos"""
+    parser = argparse.ArgumentParser(description="Benchmark de arranque de los scripts del Taller 2")
+    parser.add_argument('--repeat', type=int, default=10,
+                        help="Arranques cronometrados por script")
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS,
+                        help="Máximo de ms por encima de importar cv2 y NumPy")
+    parser.add_argument('--output', default='startup_results.json',
+                        help="Archivo JSON de resultados")
+    return parser.parse_args()
+
+def main():
+    """Función principal"""
+    args = parse_args()
+    print("=== Benchmark de arranque ===")
+
+    reference_ms, _ = time_command([sys.executable, '-c', 'import cv2, numpy'], ROOT, args.repeat)
+    print(f"{'referencia (cv2 + numpy)':28} | mediana {reference_ms:8.1f} ms")
+
+    results = []
+    failures = []
+    for script in SCRIPTS:
+        median_ms, p95_ms = time_command([sys.executable, script.name, '--help'], script.parent, args.repeat)
+        heavy = heavy_modules_loaded(script)
+        overhead = median_ms - reference_ms
+        ok = overhead <= args.budget_ms and not heavy
+        results.append({
+            'script': script.name,
+            'median_ms': median_ms,
+            'p95_ms': p95_ms,
+            'overhead_ms': overhead,
+            'heavy_modules': heavy,
+            'ok': ok,
+        })
+        print(f"{script.name:28} | mediana {median_ms:8.1f} ms | p95 {p95_ms:8.1f} ms "
+              f"| +{overhead:6.1f} ms | {'✓' if ok else '✗'}"
+              + (f" (importa {', '.join(heavy)})" if heavy else ""))
+        if not ok:
+            failures.append(script.name)
+
+    report = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'repeat': args.repeat,
+        'budget_ms': args.budget_ms,
+        'reference_ms': reference_ms,
+        'results': results,
+    }
+    Path(args.output).write_text(json.dumps(report, indent=2))
+    print(f"\n✓ Resultados guardados en: {args.output}")
+
+    if failures:
+        print(f"\n✗ Fuera de presupuesto (+{args.budget_ms:.0f} ms): {', '.join(failures)}")
+        sys.exit(1)
+    print(f"\n✓ Todos los scripts arrancan dentro del presupuesto (+{args.budget_ms:.0f} ms)")
+
+if __name__ == "__main__":
+    main()
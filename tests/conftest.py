@@ -0,0 +1,53 @@
+"""
+Configuración común de las pruebas
+
+Los scripts de los talleres no son un paquete instalable: igual que en
+benchmarks/, se añaden sus directorios a sys.path para importarlos.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+EJERCICIOS = ROOT / '2025-10-01_taller_2_cv_3d' / 'ejercicios'
+MODULE_DIRS = [
+    ROOT / '2025-09-10_taller_0_transformaciones' / 'python',
+    EJERCICIOS / 'comun',
+    EJERCICIOS / '02_ojos_digitales_opencv' / 'python',
+    EJERCICIOS / '03_segmentacion_umbral_contornos' / 'python',
+    EJERCICIOS / '04_imagen_matriz_pixeles' / 'python',
+]
+for module_dir in MODULE_DIRS:
+    sys.path.insert(0, str(module_dir))
+
+# Las figuras de matplotlib del Taller 0 se crean sin ventanas
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+
+def synthetic_image(width=320, height=240, seed=0):
+    """Imagen BGR sintética: degradado, figuras y ruido (determinista)"""
+    rng = np.random.default_rng(seed)
+    ramp = np.linspace(0, 255, width, dtype=np.float32)
+    img = np.empty((height, width, 3), dtype=np.uint8)
+    img[:] = np.stack([ramp, ramp[::-1], np.full_like(ramp, 96)], axis=-1).astype(np.uint8)
+    cv2.rectangle(img, (20, 20), (110, 90), (255, 255, 255), -1)
+    cv2.circle(img, (width * 2 // 3, height // 2), 45, (0, 0, 0), -1)
+    triangle = np.array([[40, height - 20], [120, height - 20], [80, height - 90]], np.int32)
+    cv2.fillPoly(img, [triangle], (30, 200, 30))
+    noise = rng.integers(-20, 21, img.shape, dtype=np.int16)
+    return np.clip(img.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+
+
+@pytest.fixture
+def image():
+    return synthetic_image()
+
+
+@pytest.fixture
+def gray(image):
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
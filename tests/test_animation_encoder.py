@@ -0,0 +1,78 @@
+"""Pruebas de AnimationEncoder: el GIF se escribe frame a frame, sin acumular frames"""
+
+import os
+
+import cv2
+import numpy as np
+import pytest
+from PIL import Image, ImageSequence
+
+from segmentacion_contornos import AnimationEncoder
+
+FRAMES = 12
+COLORS = [(0, 0, 0), (255, 255, 255), (200, 30, 30), (30, 200, 30)]
+ANNOTATION = (0, 0, 255)
+
+
+def frame(i, size=(240, 320)):
+    """Frame RGB con pocos colores (la paleta los representa sin pérdida)"""
+    rng = np.random.default_rng(i)
+    img = np.array(COLORS, np.uint8)[rng.integers(0, len(COLORS), (size[0] // 8, size[1] // 8))]
+    img = cv2.resize(img, (size[1], size[0]), interpolation=cv2.INTER_NEAREST)
+    cv2.circle(img, (20 + 10 * i, size[0] // 2), 12, ANNOTATION, -1)
+    return img
+
+
+def assert_no_per_frame_state(obj, frames):
+    for name, value in vars(obj).items():
+        if isinstance(value, (list, tuple, dict)):
+            assert len(value) < frames, name
+
+
+def test_gif_frames_are_written_as_they_arrive(tmp_path):
+    path = tmp_path / 'animacion.gif'
+    sizes = []
+    with AnimationEncoder(path, fps=10, palette_sample=frame(0),
+                          reserved_colors=[ANNOTATION]) as encoder:
+        for i in range(FRAMES):
+            encoder.add_frame(frame(i))
+            encoder._gif._file.flush()
+            sizes.append(os.path.getsize(path))
+            assert_no_per_frame_state(encoder, FRAMES)
+            assert_no_per_frame_state(encoder._gif, FRAMES)
+    
+    assert all(b > a for a, b in zip(sizes, sizes[1:]))
+    assert encoder.frames == FRAMES
+
+
+def test_gif_round_trips_with_global_palette(tmp_path):
+    path = tmp_path / 'animacion.gif'
+    frames = [frame(i) for i in range(FRAMES)]
+    with AnimationEncoder(path, fps=20, palette_sample=frames[0],
+                          reserved_colors=[ANNOTATION]) as encoder:
+        for img in frames:
+            encoder.add_frame(img)
+    
+    with Image.open(path) as gif:
+        assert gif.n_frames == FRAMES
+        assert gif.info['loop'] == 0
+        assert gif.info['duration'] == 50
+        decoded = [np.asarray(f.convert('RGB')) for f in ImageSequence.Iterator(gif)]
+    for expected, actual in zip(frames, decoded):
+        np.testing.assert_array_equal(actual, expected)
+
+
+def test_gif_with_local_palettes_and_scale(tmp_path):
+    path = tmp_path / 'animacion.gif'
+    with AnimationEncoder(path, scale=0.5, reuse_palette=False) as encoder:
+        for i in range(3):
+            encoder.add_frame(frame(i))
+    
+    with Image.open(path) as gif:
+        assert gif.n_frames == 3
+        assert gif.size == (160, 120)
+
+
+def test_unsupported_extension_raises(tmp_path):
+    with pytest.raises(ValueError):
+        AnimationEncoder(tmp_path / 'animacion.png')
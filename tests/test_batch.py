@@ -0,0 +1,67 @@
+"""Pruebas del modo lote: rutas de salida relativas y resultados por imagen"""
+
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+from conftest import synthetic_image
+from ojos_digitales import batch_targets, find_images, run_batch
+from pipeline_comun import ResultContainer
+
+
+@pytest.fixture
+def frames(tmp_path):
+    """Imágenes con el mismo nombre en subdirectorios distintos"""
+    paths = [tmp_path / 'frames' / 'a' / '0.png', tmp_path / 'frames' / 'b' / '0.png',
+             tmp_path / 'frames' / 'b' / 'c' / '1.png', tmp_path / 'frames' / 'a' / '1.png']
+    for seed, path in enumerate(paths):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        cv2.imwrite(str(path), synthetic_image(64, 48, seed=seed))
+    return paths
+
+
+def test_targets_keep_paths_relative_to_common_parent(tmp_path, frames):
+    output = tmp_path / 'salida'
+    targets = batch_targets(frames, output)
+    
+    assert [image for image, _ in targets] == frames
+    assert [target.relative_to(output).as_posix() for _, target in targets] == \
+        ['a/0', 'b/0', 'b/c/1', 'a/1']
+
+
+def test_single_directory_maps_to_output_root(tmp_path, frames):
+    images = [frames[0], frames[3]]
+    targets = batch_targets(images, tmp_path / 'salida')
+    
+    assert [target for _, target in targets] == [tmp_path / 'salida' / '0', tmp_path / 'salida' / '1']
+
+
+def test_relative_and_absolute_inputs_give_the_same_targets(tmp_path, frames, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    relative = [Path(p).relative_to(tmp_path) for p in frames]
+    
+    assert [t for _, t in batch_targets(relative, 'salida')] == \
+        [t for _, t in batch_targets(frames, 'salida')]
+
+
+def test_same_stem_with_different_extension_is_rejected(tmp_path, frames):
+    duplicate = frames[0].with_suffix('.jpg')
+    cv2.imwrite(str(duplicate), synthetic_image(64, 48))
+    
+    with pytest.raises(ValueError, match='Destino duplicado'):
+        batch_targets([frames[0], duplicate], tmp_path / 'salida')
+
+
+def test_run_batch_writes_one_container_per_image_without_collisions(tmp_path, frames):
+    output = tmp_path / 'salida'
+    stats = run_batch(str(tmp_path / 'frames' / '**' / '*.png'), str(output), workers=1,
+                      outputs=['canny'], container='stored')
+    
+    assert stats['images'] == len(frames) and stats['errors'] == []
+    assert find_images(str(tmp_path / 'frames' / '**' / '*.png')) == sorted(frames)
+    for image, target in batch_targets(frames, output):
+        container = ResultContainer(f"{target}.npz")
+        gray = cv2.cvtColor(cv2.imread(str(image)), cv2.COLOR_BGR2GRAY)
+        np.testing.assert_array_equal(container.load('canny'), cv2.Canny(gray, 50, 150))
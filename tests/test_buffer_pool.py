@@ -0,0 +1,70 @@
+"""Pruebas de BufferPool: reutilización sin aliasing"""
+
+import numpy as np
+
+from pipeline_comun import BufferPool
+
+
+def test_released_buffer_is_reused():
+    pool = BufferPool()
+    buf = pool.acquire((4, 5))
+    pool.release(buf)
+    
+    assert pool.acquire((4, 5)) is buf
+    assert pool.metrics()['hits'] == 1 and pool.metrics()['misses'] == 1
+
+
+def test_buffers_are_keyed_by_shape_and_dtype():
+    pool = BufferPool()
+    buf = pool.acquire((4, 5))
+    pool.release(buf)
+    
+    assert pool.acquire((5, 4)) is not buf
+    assert pool.acquire((4, 5), np.int16) is not buf
+    assert pool.acquire((4, 5)) is buf
+
+
+def test_double_release_does_not_alias():
+    pool = BufferPool()
+    buf = pool.acquire((8, 8))
+    pool.release(buf)
+    pool.release(buf)
+    
+    first = pool.acquire((8, 8))
+    second = pool.acquire((8, 8))
+    assert first is buf
+    assert second is not first
+    assert not np.shares_memory(first, second)
+    assert pool.metrics()['bytes_held'] == 0
+
+
+def test_release_after_reacquire_is_accepted():
+    pool = BufferPool()
+    buf = pool.acquire((8, 8))
+    pool.release(buf)
+    assert pool.acquire((8, 8)) is buf
+    pool.release(buf)
+    
+    assert pool.acquire((8, 8)) is buf
+
+
+def test_views_and_non_contiguous_arrays_are_rejected():
+    pool = BufferPool()
+    base = pool.acquire((8, 8))
+    pool.release(base[2:6])
+    pool.release(np.empty((8, 8))[:, ::2])
+    
+    assert pool.metrics()['bytes_held'] == 0
+    assert pool.acquire((4, 8)) is not None
+    assert pool.metrics()['hits'] == 0
+
+
+def test_max_bytes_discards_extra_buffers():
+    pool = BufferPool(max_bytes=100)
+    a, b = pool.acquire((10, 10)), pool.acquire((10, 10))
+    pool.release(a)
+    pool.release(b)
+    
+    assert pool.metrics()['bytes_held'] == 100
+    assert pool.acquire((10, 10)) is a
+    assert pool.acquire((10, 10)) is not b
@@ -0,0 +1,63 @@
+"""Pruebas de los canales como vistas y del buffer HSV de ImagenMatriz"""
+
+import cv2
+import numpy as np
+import pytest
+
+from conftest import synthetic_image
+from imagen_matriz import CHANNEL_VIEWS, ImagenMatriz
+
+
+@pytest.fixture
+def paths(tmp_path):
+    paths = []
+    for seed in range(3):
+        path = tmp_path / f'imagen_{seed}.png'
+        cv2.imwrite(str(path), synthetic_image(seed=seed))
+        paths.append(path)
+    return paths
+
+
+def test_channels_are_views_with_bgr_labels(image, tmp_path):
+    path = tmp_path / 'imagen.png'
+    cv2.imwrite(str(path), image)
+    matriz = ImagenMatriz(str(path))
+    matriz.load_image()
+    matriz.separate_channels()
+    hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+    
+    for name, (source, index) in CHANNEL_VIEWS.items():
+        expected = (image if source == 'bgr' else hsv)[..., index]
+        np.testing.assert_array_equal(matriz.results[name], expected, err_msg=name)
+        assert matriz.results[name].base is not None
+    assert matriz.channel('red', contiguous=True).flags['C_CONTIGUOUS']
+
+
+def test_reload_returns_hsv_buffer_and_drops_stale_views(paths):
+    matriz = ImagenMatriz(str(paths[0]))
+    for path in paths:
+        matriz.image_path = str(path)
+        matriz.load_image()
+        matriz.separate_channels()
+    
+    # Un único buffer HSV en uso: los anteriores volvieron al pool y se reutilizaron
+    metrics = matriz.pool.metrics()
+    assert metrics['misses'] == 1 and metrics['hits'] == len(paths) - 1
+    
+    matriz.image_path = str(paths[0])
+    matriz.load_image()
+    assert not {'hue', 'saturation', 'value'} & set(matriz.results)
+    assert matriz.pool.metrics()['bytes_held'] == matriz.original.nbytes
+    
+    hsv = cv2.cvtColor(matriz.original, cv2.COLOR_BGR2HSV)
+    np.testing.assert_array_equal(matriz.channel('value'), hsv[..., 2])
+
+
+def test_release_results_returns_hsv_buffer(paths):
+    matriz = ImagenMatriz(str(paths[0]))
+    matriz.load_image()
+    matriz.separate_channels()
+    matriz.release_results()
+    
+    assert matriz.results == {}
+    assert matriz.pool.metrics()['bytes_held'] == matriz.original.nbytes
@@ -0,0 +1,73 @@
+"""Pruebas de compose_grid: geometría del lienzo, colores y celdas vacías"""
+
+import cv2
+import numpy as np
+import pytest
+
+from pipeline_comun import _ascii_title, compose_grid
+
+CELL = 100
+BAND = 32
+HEADER = 48
+
+
+def cell_center(row, col, header=HEADER, cell_height=CELL // 2):
+    """Centro (y, x) de la imagen de una celda"""
+    y = header + row * (cell_height + BAND) + BAND + cell_height // 2
+    return y, col * CELL + CELL // 2
+
+
+@pytest.fixture
+def red():
+    rgb = np.zeros((60, 120, 3), np.uint8)
+    rgb[..., 0] = 255
+    return rgb
+
+
+@pytest.fixture
+def ramp():
+    return np.tile(np.linspace(40, 90, 120, dtype=np.float32), (60, 1))
+
+
+def test_canvas_size_follows_first_panel_aspect(red, ramp):
+    canvas = compose_grid([(red, 'a'), (ramp, 'b'), (red, 'c')], cols=2, title='T', cell_width=CELL)
+    
+    assert canvas.dtype == np.uint8
+    assert canvas.shape == (HEADER + 2 * (CELL // 2 + BAND), 2 * CELL, 3)
+    assert compose_grid([(red, 'a')], cols=1, cell_width=CELL).shape == (CELL // 2 + BAND, CELL, 3)
+
+
+def test_rgb_panels_are_written_as_bgr(red):
+    canvas = compose_grid([(red, 'rojo')], cols=1, title='T', cell_width=CELL)
+    
+    np.testing.assert_array_equal(canvas[cell_center(0, 0)], (0, 0, 255))
+
+
+def test_gray_panels_are_stretched_to_full_range(red, ramp):
+    canvas = compose_grid([(red, 'a'), (ramp, 'rampa')], cols=2, title='T', cell_width=CELL)
+    
+    y, _ = cell_center(0, 1)
+    row = canvas[y, CELL:2 * CELL]
+    assert row.min() == 0 and row.max() == 255
+    assert np.all(row[..., 0] == row[..., 2])  # gris: los tres canales iguales
+    assert np.all(np.diff(row[:, 0].astype(int)) >= 0)
+
+
+def test_empty_cells_stay_white_and_panels_are_letterboxed(red):
+    tall = np.zeros((120, 30, 3), np.uint8)
+    canvas = compose_grid([(red, 'a'), (tall, 'alto'), (None, 'vacio')], cols=2, cell_width=CELL)
+    
+    # Celda (1, 0) sin imagen (ni título) y celda (1, 1) sobrante: solo fondo blanco
+    assert np.all(canvas[CELL // 2 + BAND:] == 255)
+    
+    # Imagen alta centrada en horizontal: los márgenes de su celda quedan blancos
+    y, x = cell_center(0, 1, header=0)
+    assert np.all(canvas[y, CELL + 1:CELL + 5] == 255)
+    assert np.all(canvas[y, x] == 0)
+
+
+def test_titles_are_reduced_to_ascii():
+    assert _ascii_title('Rotación 45°\nEscala') == 'Rotacion 45 grados - Escala'
+    canvas = compose_grid([(np.zeros((10, 10), np.uint8), 'Ángulo θ')], cols=1,
+                          title='Comparación', cell_width=CELL)
+    assert canvas.shape == (HEADER + CELL + BAND, CELL, 3)
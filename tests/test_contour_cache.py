@@ -0,0 +1,75 @@
+"""Pruebas de la memorización de análisis de contornos de SegmentacionContornos"""
+
+import cv2
+import numpy as np
+import pytest
+
+from segmentacion_contornos import SegmentacionContornos
+
+
+@pytest.fixture
+def seg(image, tmp_path, monkeypatch):
+    path = tmp_path / 'imagen.png'
+    cv2.imwrite(str(path), image)
+    seg = SegmentacionContornos(str(path))
+    seg.load_image()
+    seg.convert_to_grayscale()
+    seg.apply_thresholding()
+    
+    seg.searches = 0
+    find_contours = seg.find_contours
+    
+    def counting_find_contours(*args, **kwargs):
+        seg.searches += 1
+        return find_contours(*args, **kwargs)
+    
+    monkeypatch.setattr(seg, 'find_contours', counting_find_contours)
+    return seg
+
+
+def test_hit_restores_hierarchy_and_prints_summary(seg, capsys):
+    contours, properties = seg.analyze_contours('thresh_otsu', min_area=50)
+    hierarchy = seg.hierarchy
+    first = capsys.readouterr().out
+    seg.analyze_contours('thresh_fixed', min_area=50)
+    assert seg.hierarchy is not hierarchy
+    capsys.readouterr()
+    
+    cached = seg.analyze_contours('thresh_otsu', min_area=50)
+    
+    assert seg.searches == 2
+    assert cached[0] is contours and cached[1] is properties
+    assert seg.contours is contours
+    assert seg.hierarchy is hierarchy
+    assert capsys.readouterr().out == first
+
+
+def test_rethresholding_misses_the_cache(seg):
+    seg.analyze_contours('thresh_otsu', min_area=50)
+    seg.apply_thresholding()
+    seg.analyze_contours('thresh_otsu', min_area=50)
+    
+    assert seg.searches == 2
+
+
+def test_in_place_change_is_seen_after_invalidation(seg):
+    contours, _ = seg.analyze_contours('thresh_fixed', min_area=50)
+    seg.results['thresh_fixed'][:] = 0
+    cv2.rectangle(seg.results['thresh_fixed'], (10, 10), (60, 60), 255, -1)
+    seg.invalidate_contour_cache()
+    
+    contours, properties = seg.analyze_contours('thresh_fixed', min_area=50)
+    
+    assert seg.searches == 2
+    assert len(contours) == 1
+    assert properties['area'][0] == pytest.approx(50 * 50)
+
+
+def test_cache_is_bounded(seg):
+    seg.contour_cache_size = 2
+    for min_area in (10, 20, 30):
+        seg.analyze_contours('thresh_otsu', min_area=min_area)
+    seg.analyze_contours('thresh_otsu', min_area=10)
+    
+    assert seg.searches == 4
+    assert len(seg._contour_cache) == 2
@@ -0,0 +1,66 @@
+"""Pruebas de ContourTable frente a las funciones de contornos de OpenCV"""
+
+import cv2
+import numpy as np
+import pytest
+
+from segmentacion_contornos import ContourTable
+
+
+@pytest.fixture(params=[cv2.CHAIN_APPROX_SIMPLE, cv2.CHAIN_APPROX_NONE])
+def contours(request, gray):
+    binary = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_MEAN_C,
+                                   cv2.THRESH_BINARY_INV, 11, 2)
+    found, _ = cv2.findContours(binary, cv2.RETR_LIST, request.param)
+    assert len(found) > 10
+    return found
+
+
+def test_area_and_perimeter_match_opencv(contours):
+    table = ContourTable.from_contours(contours)
+    
+    np.testing.assert_allclose(table['area'], [cv2.contourArea(c) for c in contours], atol=1e-6)
+    # cv2.arcLength acumula en float32; la tabla, en float64
+    np.testing.assert_allclose(table['perimeter'], [cv2.arcLength(c, True) for c in contours],
+                               rtol=1e-6)
+
+
+def test_centroid_matches_moments(contours):
+    table = ContourTable.from_contours(contours)
+    
+    for i, contour in enumerate(contours):
+        m = cv2.moments(contour)
+        if m['m00'] != 0:
+            expected = (int(m['m10'] / m['m00']), int(m['m01'] / m['m00']))
+        else:
+            expected = (0, 0)
+        assert (table['cx'][i], table['cy'][i]) == expected
+
+
+def test_bounding_box_matches_bounding_rect(contours):
+    table = ContourTable.from_contours(contours)
+    
+    boxes = np.array([cv2.boundingRect(c) for c in contours])
+    np.testing.assert_array_equal(np.stack([table[k] for k in 'xywh'], axis=1), boxes)
+
+
+def test_vertices_match_approx_poly(contours):
+    table = ContourTable.from_contours(contours, epsilon_factor=0.02)
+    
+    expected = [len(cv2.approxPolyDP(c, 0.02 * cv2.arcLength(c, True), True)) for c in contours]
+    np.testing.assert_array_equal(table['vertices'], expected)
+
+
+def test_contour_views_round_trip(contours):
+    table = ContourTable.from_contours(contours)
+    
+    assert len(table) == len(contours)
+    for original, view in zip(contours, table.contours()):
+        np.testing.assert_array_equal(view, original)
+
+
+def test_empty_table():
+    table = ContourTable.from_contours([])
+    
+    assert len(table) == 0
+    assert table.contours() == []
@@ -0,0 +1,119 @@
+"""Pruebas de FilterGraph: cálculo perezoso y liberación temprana de intermedios"""
+
+import cv2
+import numpy as np
+import pytest
+
+from ojos_digitales import FILTER_GRAPH, SHARPEN_KERNEL, FilterGraph
+from pipeline_comun import BufferPool
+
+
+class RecordingPool(BufferPool):
+    """BufferPool que anota en events cada buffer devuelto"""
+    
+    def __init__(self, events=None):
+        super().__init__()
+        self.events = [] if events is None else events
+        self.released = []
+    
+    def release(self, buf):
+        self.events.append(('release', id(buf)))
+        self.released.append(id(buf))
+        super().release(buf)
+
+
+def counting_graph(events):
+    """Cadena original -> a -> b -> salida más una rama independiente"""
+    def node(name, func):
+        def run(*args, dst=None):
+            np.copyto(dst, func(*args))
+            events.append((name, id(dst)))
+            return dst
+        return run
+    
+    return {
+        'a': (('original',), node('a', lambda x: x + 1), True),
+        'b': (('a',), node('b', lambda a: a * 2), True),
+        'salida': (('b',), node('salida', lambda b: b - 3), True),
+        'rama': (('original',), node('rama', lambda x: 255 - x), True),
+    }
+
+
+def test_intermediates_are_released_as_soon_as_their_last_consumer_ran(gray):
+    events = []
+    pool = RecordingPool(events)
+    graph = FilterGraph(counting_graph(events), pool=pool)
+    
+    outputs = graph.iter_outputs({'original': gray}, ['salida', 'rama'])
+    name, salida = next(outputs)
+    assert name == 'salida'
+    # 'a' vuelve al pool en cuanto 'b' termina, y 'salida' reutiliza su buffer;
+    # 'b' vuelve al pool antes de calcular la rama independiente
+    (_, a), (_, b), released_a, (_, salida_id), released_b = events
+    assert [event[0] for event in events] == ['a', 'b', 'release', 'salida', 'release']
+    assert released_a == ('release', a) and salida_id == a == id(salida)
+    assert released_b == ('release', b)
+    
+    name, rama = next(outputs)
+    assert name == 'rama' and events[-1] == ('rama', b)
+    assert pool.hits == 2 and pool.misses == 2
+    np.testing.assert_array_equal(salida, (gray + 1) * 2 - 3)
+    np.testing.assert_array_equal(rama, 255 - gray)
+    
+    # Ni las salidas pedidas ni la entrada vuelven al pool después de entregarse
+    assert pool.released == [a, b] and id(gray) not in pool.released
+    with pytest.raises(StopIteration):
+        next(outputs)
+    assert pool.released == [a, b]
+
+
+def test_only_ancestors_are_computed_once(gray):
+    events = []
+    graph = FilterGraph(counting_graph(events), pool=BufferPool())
+    
+    results = graph.evaluate({'original': gray}, ['b', 'salida', 'b'])
+    
+    assert [name for name, _ in events] == ['a', 'b', 'salida']
+    assert list(results) == ['b', 'salida']
+    np.testing.assert_array_equal(results['b'], (gray + 1) * 2)
+
+
+def test_available_values_are_not_recomputed(gray):
+    events = []
+    graph = FilterGraph(counting_graph(events), pool=BufferPool())
+    a = gray + 1
+    
+    results = graph.evaluate({'original': gray, 'a': a}, ['a', 'b'])
+    
+    assert [name for name, _ in events] == ['b']
+    assert results['a'] is a
+
+
+def test_default_graph_matches_opencv(image):
+    pool = RecordingPool()
+    results = FilterGraph(pool=pool).evaluate({'original': image},
+                                              ['unsharp_masking', 'sharpen', 'sobel_combined'])
+    
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    sobel_x = cv2.convertScaleAbs(cv2.Sobel(gray, cv2.CV_16S, 1, 0))
+    sobel_y = cv2.convertScaleAbs(cv2.Sobel(gray, cv2.CV_16S, 0, 1))
+    expected = {
+        'unsharp_masking': cv2.addWeighted(gray, 1.5, cv2.GaussianBlur(gray, (0, 0), 2.0), -0.5, 0),
+        'sharpen': cv2.filter2D(gray, -1, SHARPEN_KERNEL),
+        'sobel_combined': cv2.addWeighted(sobel_x, 0.5, sobel_y, 0.5, 0),
+    }
+    for name, img in expected.items():
+        np.testing.assert_array_equal(results[name], img, err_msg=name)
+    
+    # grayscale, unsharp_gaussian, sobel_x y sobel_y son intermedios; 'gradients'
+    # no viene del pool (CV_16S) y no se devuelve
+    assert len(pool.released) == 4
+
+
+def test_unknown_node_and_cycles_are_rejected(gray):
+    with pytest.raises(KeyError):
+        FilterGraph(FILTER_GRAPH).plan(['no_existe'])
+    
+    ciclo = {'x': (('y',), None, False), 'y': (('x',), None, False)}
+    with pytest.raises(ValueError):
+        FilterGraph(ciclo).plan(['x'])
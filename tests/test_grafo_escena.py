@@ -0,0 +1,92 @@
+"""Pruebas de GrafoEscena frente a productos de matrices explícitos"""
+
+import numpy as np
+import pytest
+
+from transformaciones_2d import GrafoEscena
+
+
+def trs(tx, ty, angulo, sx, sy):
+    """Matriz T · R · S de referencia"""
+    c, s = np.cos(angulo), np.sin(angulo)
+    return np.array([[sx * c, -sy * s, tx],
+                     [sx * s, sy * c, ty],
+                     [0, 0, 1]])
+
+
+def aplicar(matriz, puntos):
+    return (matriz @ np.vstack([puntos, np.ones(puntos.shape[1])]))[:2]
+
+
+@pytest.fixture
+def cuadrado():
+    return np.array([[-1, 1, 1, -1], [-1, -1, 1, 1]], dtype=float)
+
+
+@pytest.fixture
+def triangulo():
+    return np.array([[0, 1, 0], [0, 0, 1]], dtype=float)
+
+
+def test_parent_transform_moves_children(cuadrado, triangulo):
+    escena = GrafoEscena()
+    raiz = escena.agregar_nodo(cuadrado, tx=5, angulo=0.3)
+    hijo = escena.agregar_nodo(triangulo, padre=raiz, tx=2, sx=0.5)
+    nieto = escena.agregar_nodo(cuadrado, padre=hijo, ty=-1, angulo=1.1)
+    escena.transformar()
+    
+    escena.fijar_trs(raiz, tx=-3, ty=4, angulo=0.9)
+    cuadrado_raiz, triangulo_hijo, cuadrado_nieto = [p.copy() for p in escena.poligonos()]
+    
+    m_raiz = trs(-3, 4, 0.9, 1, 1)
+    m_hijo = m_raiz @ trs(2, 0, 0, 0.5, 0.5)
+    m_nieto = m_hijo @ trs(0, -1, 1.1, 1, 1)
+    np.testing.assert_allclose(cuadrado_raiz, aplicar(m_raiz, cuadrado))
+    np.testing.assert_allclose(triangulo_hijo, aplicar(m_hijo, triangulo))
+    np.testing.assert_allclose(cuadrado_nieto, aplicar(m_nieto, cuadrado))
+    assert escena.recalculados == 6
+
+
+def test_only_dirty_subtree_is_recalculated(cuadrado):
+    escena = GrafoEscena()
+    a = escena.agregar_nodo(cuadrado)
+    b = escena.agregar_nodo(cuadrado, padre=a)
+    escena.agregar_nodo(cuadrado, padre=b)
+    escena.agregar_nodo(cuadrado)
+    escena.transformar()
+    
+    escena.fijar_trs(b, angulo=0.5)
+    assert escena.actualizar() == 2
+    assert escena.actualizar() == 0
+
+
+def test_mixed_sizes_and_group_nodes_match_per_node_reference(cuadrado, triangulo):
+    rng = np.random.default_rng(0)
+    escena = GrafoEscena(capacidad=2)
+    geometrias = [cuadrado, cuadrado, None, triangulo, cuadrado, None, None,
+                  triangulo, triangulo, rng.normal(size=(2, 7)), cuadrado]
+    for i, vertices in enumerate(geometrias):
+        padre = None if i == 0 else int(rng.integers(0, i))
+        escena.agregar_nodo(vertices, padre=padre, tx=rng.normal(), ty=rng.normal(),
+                            angulo=rng.normal(), sx=rng.uniform(0.5, 2), sy=rng.uniform(0.5, 2))
+    
+    for _ in range(3):
+        mundo = []
+        for i in range(escena.nodos):
+            local = trs(*escena.trs[i])
+            mundo.append(local if escena.padre[i] < 0 else mundo[escena.padre[i]] @ local)
+        
+        poligonos = escena.poligonos()
+        referencia = [aplicar(mundo[i], v) for i, v in enumerate(geometrias) if v is not None]
+        assert len(poligonos) == len(referencia)
+        for poligono, esperado in zip(poligonos, referencia):
+            np.testing.assert_allclose(poligono, esperado)
+        
+        escena.fijar_trs(rng.integers(0, escena.nodos, 3), angulo=rng.normal(size=3))
+
+
+def test_unchanged_scene_reuses_output(cuadrado):
+    escena = GrafoEscena()
+    escena.agregar_nodo(cuadrado, tx=1)
+    primera = escena.transformar()
+    assert escena.transformar() is primera
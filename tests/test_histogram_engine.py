@@ -0,0 +1,89 @@
+"""Pruebas de HistogramEngine frente a cv2.calcHist por canal"""
+
+import cv2
+import numpy as np
+import pytest
+
+from conftest import synthetic_image
+from imagen_matriz import HistogramEngine
+
+
+def reference(image):
+    """Histogramas 1-D de cada canal con una llamada a cv2.calcHist por canal (BGR)"""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+    planes = {'gray': (gray, 0), 'b': (image, 0), 'g': (image, 1), 'r': (image, 2),
+              'h': (hsv, 0), 's': (hsv, 1), 'v': (hsv, 2)}
+    return {name: cv2.calcHist([img], [index], None, [HistogramEngine.CHANNELS[name]],
+                               [0, HistogramEngine.CHANNELS[name]]).ravel()
+            for name, (img, index) in planes.items()}
+
+
+@pytest.fixture
+def images():
+    return [synthetic_image(160 + 16 * seed, 120, seed=seed) for seed in range(4)]
+
+
+@pytest.mark.parametrize('band_rows', [7, 128, 1000])
+def test_single_image_matches_calchist(image, band_rows):
+    engine = HistogramEngine(band_rows=band_rows).accumulate(image)
+    
+    for name, expected in reference(image).items():
+        np.testing.assert_array_equal(engine.histogram(name).ravel(), expected, err_msg=name)
+    assert engine.images == 1 and engine.pixels == image.shape[0] * image.shape[1]
+
+
+def test_rgb_input_gives_the_same_histograms(image):
+    bgr = HistogramEngine().accumulate(image)
+    rgb = HistogramEngine().accumulate(cv2.cvtColor(image, cv2.COLOR_BGR2RGB), rgb=True)
+    
+    for name in HistogramEngine.CHANNELS:
+        np.testing.assert_array_equal(rgb.counts[name], bgr.counts[name], err_msg=name)
+
+
+def test_merge_equals_sum_of_separate_histograms(images):
+    engines = [HistogramEngine().accumulate(img) for img in images]
+    merged = HistogramEngine()
+    for engine in engines:
+        merged.merge(engine)
+    
+    references = [reference(img) for img in images]
+    for name in HistogramEngine.CHANNELS:
+        expected = sum(ref[name] for ref in references)
+        np.testing.assert_array_equal(merged.counts[name], expected, err_msg=name)
+    assert merged.images == len(images)
+    assert merged.pixels == sum(img.shape[0] * img.shape[1] for img in images)
+
+
+@pytest.mark.parametrize('workers', [None, 3])
+def test_accumulate_many_equals_merge(images, workers):
+    merged = HistogramEngine(['gray', 'h'])
+    for img in images:
+        merged.merge(HistogramEngine(['gray', 'h']).accumulate(img))
+    
+    batched = HistogramEngine(['gray', 'h']).accumulate_many(images, workers=workers)
+    
+    for name in ('gray', 'h'):
+        np.testing.assert_array_equal(batched.counts[name], merged.counts[name])
+    assert batched.images == merged.images and batched.pixels == merged.pixels
+
+
+def test_stats_are_invalidated_by_merge(images):
+    engine = HistogramEngine(['gray']).accumulate(images[0])
+    before = engine.stats('gray')
+    engine.merge(HistogramEngine(['gray']).accumulate(images[1]))
+    after = engine.stats('gray')
+    
+    gray = np.concatenate([cv2.cvtColor(img, cv2.COLOR_BGR2GRAY).ravel() for img in images[:2]])
+    assert after is not before
+    assert after['count'] == gray.size
+    assert after['mean'] == pytest.approx(gray.mean())
+    assert after['std'] == pytest.approx(gray.std())
+    assert after['percentiles'][50] == int(np.percentile(gray, 50, method='inverted_cdf'))
+
+
+def test_merge_rejects_different_channels(image):
+    with pytest.raises(ValueError):
+        HistogramEngine(['gray']).merge(HistogramEngine(['gray', 'r']).accumulate(image))
+    with pytest.raises(ValueError):
+        HistogramEngine(['gray', 'r']).accumulate(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY))
@@ -0,0 +1,113 @@
+"""Pruebas de RegionEngine frente a las mismas operaciones sobre la imagen completa"""
+
+import cv2
+import numpy as np
+import pytest
+
+from imagen_matriz import RegionEngine
+
+
+@pytest.fixture
+def rgb(image):
+    return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+
+def full_mask(roi, shape):
+    """Máscara bool de la ROI dibujada sobre toda la imagen (referencia)"""
+    mask = np.zeros(shape[:2], dtype=np.uint8)
+    kind, *params = roi
+    if kind == 'rect':
+        x, y, w, h = params
+        cv2.rectangle(mask, (x, y), (x + w - 1, y + h - 1), 255, -1)
+    elif kind == 'circle':
+        cv2.circle(mask, tuple(params[:2]), params[2], 255, -1)
+    else:
+        cv2.fillPoly(mask, [np.asarray(params[0], np.int32)], 255)
+    return mask.astype(bool)
+
+
+ROIS = [
+    ('rect', 40, 30, 60, 50),
+    ('rect', -10, -5, 40, 30),
+    ('circle', 160, 120, 50),
+    ('circle', 5, 230, 30),
+    ('polygon', [(10, 10), (120, 40), (60, 150)]),
+]
+
+
+@pytest.mark.parametrize('roi', ROIS)
+def test_fill_and_mask_match_full_image_masks(rgb, roi):
+    engine = RegionEngine()
+    expected = rgb.copy()
+    expected[full_mask(roi, rgb.shape)] = (255, 0, 0)
+    
+    result = rgb.copy()
+    mask = engine.apply(result, [(roi, ('fill', (255, 0, 0))), (roi, ('mask',))])
+    
+    np.testing.assert_array_equal(result, expected)
+    np.testing.assert_array_equal(mask > 0, full_mask(roi, rgb.shape))
+
+
+@pytest.mark.parametrize('roi', [('rect', 200, 100, 80, 60), ('circle', 10, 10, 40)])
+def test_blur_matches_full_image_blur(rgb, roi):
+    expected = rgb.copy()
+    region = full_mask(roi, rgb.shape)
+    expected[region] = cv2.GaussianBlur(rgb, (15, 15), 0)[region]
+    
+    result = rgb.copy()
+    RegionEngine().apply(result, [(roi, ('blur', 15))])
+    np.testing.assert_array_equal(result, expected)
+
+
+def test_copy_moves_rect(rgb):
+    result = rgb.copy()
+    RegionEngine().apply(result, [(('rect', 50, 50, 40, 30), ('copy', (200, 150)))])
+    
+    np.testing.assert_array_equal(result[150:180, 200:240], rgb[50:80, 50:90])
+    result[150:180, 200:240] = rgb[150:180, 200:240]
+    np.testing.assert_array_equal(result, rgb)
+
+
+def test_copy_of_edge_clipped_rect_keeps_offset(rgb):
+    # La fuente pierde 3 columnas por la izquierda: el píxel x=0 debe ir a x=23
+    result = rgb.copy()
+    RegionEngine().apply(result, [(('rect', -3, 0, 8, 5), ('copy', (20, 20)))])
+    
+    np.testing.assert_array_equal(result[20:25, 23:28], rgb[0:5, 0:5])
+    np.testing.assert_array_equal(result[20:25, 20:23], rgb[20:25, 20:23])
+
+
+def test_copy_of_edge_clipped_circle_keeps_shape(rgb):
+    roi = ('circle', 5, 8, 20)
+    result = rgb.copy()
+    RegionEngine().apply(result, [(roi, ('copy', (100, 100)))])
+    
+    # Referencia: la ROI completa desplazada de su caja (-15, -12) a (100, 100)
+    source = full_mask(roi, rgb.shape)
+    ys, xs = np.nonzero(source)
+    expected = rgb.copy()
+    expected[ys + 112, xs + 115] = rgb[ys, xs]
+    np.testing.assert_array_equal(result, expected)
+
+
+def test_overlapping_copy_reads_source_before_writing(rgb):
+    result = rgb.copy()
+    RegionEngine().apply(result, [(('rect', 10, 10, 50, 50), ('copy', (30, 30)))])
+    
+    np.testing.assert_array_equal(result[30:80, 30:80], rgb[10:60, 10:60])
+
+
+def test_roi_outside_image_is_ignored(rgb):
+    result = rgb.copy()
+    mask = RegionEngine().apply(result, [(('rect', 400, 300, 10, 10), ('fill', (0, 0, 0)))])
+    
+    assert mask is None
+    np.testing.assert_array_equal(result, rgb)
+
+
+def test_unknown_roi_and_operation_raise(rgb):
+    engine = RegionEngine()
+    with pytest.raises(ValueError):
+        engine.apply(rgb.copy(), [(('ellipse', 1, 2, 3), ('fill', (0, 0, 0)))])
+    with pytest.raises(ValueError):
+        engine.apply(rgb.copy(), [(('rect', 0, 0, 5, 5), ('invert',))])
@@ -0,0 +1,85 @@
+"""Pruebas de ResultContainer: ida y vuelta, capas mapeadas en memoria e índice"""
+
+import json
+import zipfile
+
+import numpy as np
+import pytest
+
+from pipeline_comun import ResultContainer
+
+
+@pytest.fixture
+def results(image, gray):
+    rng = np.random.default_rng(1)
+    return {
+        'original': image,
+        'grayscale': gray,
+        'magnitude': rng.normal(size=gray.shape).astype(np.float32),
+        'labels': rng.integers(0, 1000, size=(17, 5), dtype=np.int32),
+        'transposed': np.asfortranarray(gray[:50, :30]),
+        'histogram': np.arange(256, dtype=np.int64),
+    }
+
+
+@pytest.mark.parametrize('compress', [True, False])
+def test_round_trip_preserves_every_layer(tmp_path, results, compress):
+    path = tmp_path / 'resultados.npz'
+    ResultContainer.write(path, results, compress=compress)
+    
+    container = ResultContainer(path)
+    assert container.names() == list(results)
+    for name, arr in results.items():
+        assert name in container
+        for mmap in (True, False):
+            loaded = container.load(name, mmap=mmap)
+            assert loaded.dtype == arr.dtype and loaded.shape == arr.shape
+            np.testing.assert_array_equal(loaded, arr, err_msg=name)
+    assert 'no_existe' not in container
+
+
+def test_stored_layers_are_read_only_memmaps(tmp_path, results):
+    container = ResultContainer.write(tmp_path / 'resultados.npz', results, compress=False)
+    
+    for name in results:
+        layer = container.load(name)
+        assert isinstance(layer, np.memmap), name
+        assert not layer.flags.writeable
+    assert np.isfortran(container.load('transposed'))
+    
+    # Con mmap=False la capa se lee a memoria y es modificable
+    copy = container.load('grayscale', mmap=False)
+    assert not isinstance(copy, np.memmap)
+    copy[0, 0] ^= 1
+
+
+def test_compressed_layers_are_deflated_and_not_mapped(tmp_path, results):
+    path = tmp_path / 'resultados.npz'
+    container = ResultContainer.write(path, results, compress=True)
+    
+    with zipfile.ZipFile(path) as archive:
+        assert {info.compress_type for info in archive.infolist()
+                if info.filename != ResultContainer.INDEX} == {zipfile.ZIP_DEFLATED}
+    assert not isinstance(container.load('grayscale'), np.memmap)
+
+
+def test_index_describes_layers_and_npz_stays_readable(tmp_path, results):
+    path = tmp_path / 'resultados.npz'
+    ResultContainer.write(path, results, compress=False)
+    
+    with zipfile.ZipFile(path) as archive:
+        index = json.loads(archive.read(ResultContainer.INDEX))
+    assert list(index) == list(results)
+    for name, arr in results.items():
+        assert index[name] == {'shape': list(arr.shape), 'dtype': arr.dtype.str}
+    
+    with np.load(path) as npz:
+        np.testing.assert_array_equal(npz['magnitude'], results['magnitude'])
+
+
+def test_write_creates_parent_directories(tmp_path, gray):
+    path = tmp_path / 'a' / 'b' / 'resultados.npz'
+    container = ResultContainer.write(path, {'grayscale': gray})
+    
+    assert path.is_file()
+    np.testing.assert_array_equal(container.load('grayscale'), gray)
@@ -0,0 +1,106 @@
+"""Pruebas de StageProfiler: registros anidados, callbacks, memoria e informe"""
+
+import json
+import tracemalloc
+
+import cv2
+import numpy as np
+import pytest
+
+from ojos_digitales import OjosDigitales
+from pipeline_comun import StageProfiler, profiled_stage
+
+
+class Pipeline:
+    """Clase mínima con etapas decoradas, como las de los ejercicios"""
+    
+    def __init__(self, profiler=None):
+        self.profiler = profiler
+    
+    @profiled_stage
+    def outer(self, size):
+        return self.inner(size) + 1
+    
+    @profiled_stage
+    def inner(self, size):
+        self.buffer = np.ones(size, np.uint8)
+        return int(self.buffer.sum())
+
+
+def test_nested_stages_record_depth_in_closing_order():
+    profiler = StageProfiler()
+    seen = []
+    profiler.add_callback(seen.append)
+    
+    assert Pipeline(profiler).outer(10) == 11
+    
+    assert [(r['stage'], r['depth']) for r in profiler.records] == [('inner', 1), ('outer', 0)]
+    assert seen == profiler.records
+    inner, outer = profiler.records
+    assert 0 <= inner['seconds'] <= outer['seconds']
+    assert 'peak_bytes' not in outer
+
+
+def test_disabled_profiler_is_a_plain_call():
+    pipeline = Pipeline()
+    assert pipeline.outer(3) == 4
+    assert Pipeline.outer.__name__ == 'outer'
+
+
+def test_stage_is_recorded_even_if_it_raises():
+    profiler = StageProfiler()
+    with pytest.raises(RuntimeError):
+        with profiler.stage('falla'):
+            raise RuntimeError
+    assert [r['stage'] for r in profiler.records] == ['falla']
+
+
+@pytest.fixture
+def no_tracing():
+    """Detiene tracemalloc al terminar si la prueba lo activó"""
+    tracing = tracemalloc.is_tracing()
+    yield
+    if not tracing:
+        tracemalloc.stop()
+
+
+def test_allocations_are_attributed_to_each_stage(no_tracing):
+    profiler = StageProfiler(track_allocations=True)
+    size = 4_000_000
+    
+    Pipeline(profiler).outer(size)
+    
+    inner, outer = profiler.records
+    assert inner['allocated_bytes'] >= size and inner['peak_bytes'] >= size
+    # El pico de la etapa hija cuenta en la del padre
+    assert outer['peak_bytes'] >= inner['peak_bytes']
+
+
+def test_report_summarises_calls_and_top_level_time(tmp_path):
+    profiler = StageProfiler()
+    pipeline = Pipeline(profiler)
+    for _ in range(3):
+        pipeline.outer(5)
+    pipeline.inner(5)
+    
+    report = profiler.report()
+    assert report['summary']['outer']['calls'] == 3
+    assert report['summary']['inner']['calls'] == 4
+    top_level = sum(r['seconds'] for r in profiler.records if r['depth'] == 0)
+    assert report['total_seconds'] == pytest.approx(top_level)
+    
+    path = tmp_path / 'perfil.json'
+    profiler.save_report(path)
+    assert json.loads(path.read_text())['summary'] == report['summary']
+
+
+def test_pipeline_stages_are_profiled(tmp_path, image):
+    path = tmp_path / 'entrada.png'
+    cv2.imwrite(str(path), image)
+    profiler = StageProfiler()
+    
+    OjosDigitales(str(path), verbose=False, profiler=profiler).run_processing()
+    
+    assert [r['stage'] for r in profiler.records] == [
+        'load_image', 'convert_to_grayscale', 'apply_blur_filters',
+        'apply_sharpen_filters', 'apply_edge_detection']
@@ -0,0 +1,55 @@
+"""Pruebas de run_stream: frames procesados y llamadas a sink"""
+
+import cv2
+import pytest
+
+from conftest import synthetic_image
+from ojos_digitales import run_stream
+
+FRAMES = 12
+
+
+@pytest.fixture
+def video(tmp_path):
+    path = tmp_path / 'entrada.mp4'
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'mp4v'), 10.0, (160, 120))
+    if not writer.isOpened():
+        pytest.skip("cv2.VideoWriter no soporta mp4v en este entorno")
+    for i in range(FRAMES):
+        writer.write(synthetic_image(160, 120, seed=i))
+    writer.release()
+    return path
+
+
+def count_frames(path):
+    capture = cv2.VideoCapture(str(path))
+    count = 0
+    while capture.read()[0]:
+        count += 1
+    capture.release()
+    return count
+
+
+def test_every_frame_is_processed_and_sunk_once(video, tmp_path):
+    calls = []
+    output = tmp_path / 'salida.mp4'
+    stats = run_stream(str(video), output_path=str(output),
+                       sink=lambda index, results: calls.append((index, results['canny'].shape)))
+    
+    assert stats['frames'] == FRAMES
+    assert [index for index, _ in calls] == list(range(FRAMES))
+    assert all(shape == (120, 160) for _, shape in calls)
+    assert count_frames(output) == FRAMES
+
+
+def test_max_frames_limits_frames_and_sink_calls(video):
+    calls = []
+    stats = run_stream(str(video), sink=lambda index, results: calls.append(index), max_frames=5)
+    
+    assert stats['frames'] == 5
+    assert calls == list(range(5))
+
+
+def test_unreadable_source_raises(tmp_path):
+    with pytest.raises(ValueError):
+        run_stream(str(tmp_path / 'no_existe.mp4'))
@@ -0,0 +1,85 @@
+"""Pruebas de ThresholdEngine frente a cv2.threshold y cv2.adaptiveThreshold"""
+
+import cv2
+import numpy as np
+import pytest
+
+from segmentacion_contornos import SegmentacionContornos, ThresholdEngine
+
+ADAPTIVE = {'mean': cv2.ADAPTIVE_THRESH_MEAN_C, 'gaussian': cv2.ADAPTIVE_THRESH_GAUSSIAN_C}
+
+
+def reference(gray, block_size, c, method, inverse):
+    mode = cv2.THRESH_BINARY_INV if inverse else cv2.THRESH_BINARY
+    return cv2.adaptiveThreshold(gray, 255, ADAPTIVE[method], mode, block_size, c)
+
+
+@pytest.mark.parametrize('method', sorted(ADAPTIVE))
+@pytest.mark.parametrize('inverse', [False, True])
+@pytest.mark.parametrize('block_size', [3, 11, 25, 51])
+@pytest.mark.parametrize('c', [0, 2, -3, 2.5])
+def test_adaptive_matches_opencv(gray, method, inverse, block_size, c):
+    engine = ThresholdEngine(gray)
+    
+    np.testing.assert_array_equal(engine.adaptive(block_size, c, method, inverse),
+                                  reference(gray, block_size, c, method, inverse))
+
+
+def test_otsu_and_fixed_match_opencv(gray):
+    engine = ThresholdEngine(gray)
+    thresh, otsu = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    
+    assert engine.otsu() == thresh
+    np.testing.assert_array_equal(engine.fixed(engine.otsu()), otsu)
+    np.testing.assert_array_equal(engine.fixed(127, inverse=True),
+                                  cv2.threshold(gray, 127, 255, cv2.THRESH_BINARY_INV)[1])
+
+
+def test_sweep_matches_opencv_and_reuses_means(gray):
+    engine = ThresholdEngine(gray)
+    
+    results = list(engine.sweep((11, 21), (0, 2, 4), inverse=True))
+    assert [(b, c) for b, c, _ in results] == [(b, c) for b in (11, 21) for c in (0, 2, 4)]
+    for block_size, c, binary in results:
+        np.testing.assert_array_equal(binary, reference(gray, block_size, c, 'mean', True))
+    assert len(engine._local) == 2
+
+
+def test_wide_image_integral_strips_do_not_overflow():
+    # Imagen blanca y ancha: la integral se parte en franjas int32
+    gray = np.full((300, 40000), 255, dtype=np.uint8)
+    gray[::7, ::5] = 0
+    engine = ThresholdEngine(gray)
+    
+    assert len(engine.integral) > 1
+    assert all(integral.dtype == np.int32 for _, _, integral in engine.integral)
+    for block_size in (3, 51):
+        np.testing.assert_array_equal(engine.adaptive(block_size, 2, 'mean', True),
+                                      reference(gray, block_size, 2, 'mean', True))
+
+
+def test_invalid_block_size_raises(gray):
+    engine = ThresholdEngine(gray)
+    
+    for block_size in (1, 10, 53):
+        with pytest.raises(ValueError):
+            engine.local_mean(block_size)
+    with pytest.raises(ValueError):
+        engine.adaptive(11, 2, method='median')
+
+
+def test_pipeline_otsu_uses_existing_engine_histogram(image, tmp_path):
+    path = tmp_path / 'imagen.png'
+    cv2.imwrite(str(path), image)
+    seg = SegmentacionContornos(str(path))
+    seg.load_image()
+    seg.convert_to_grayscale()
+    seg.apply_thresholding()
+    expected = {key: img.copy() for key, img in seg.results.items()}
+    
+    hist = seg.thresholds.hist
+    seg.apply_thresholding()
+    
+    assert seg.thresholds.hist is hist
+    for key, img in expected.items():
+        np.testing.assert_array_equal(seg.results[key], img, err_msg=key)
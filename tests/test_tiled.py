@@ -0,0 +1,60 @@
+"""Pruebas de los modos por teselas: mismo resultado que la imagen completa"""
+
+import cv2
+import numpy as np
+import pytest
+
+from ojos_digitales import TILED_OUTPUTS, FilterGraph, run_tiled
+from segmentacion_contornos import run_tiled_thresholds
+
+# Teselas pequeñas frente a la imagen de 320x240: muchas costuras y teselas de borde
+TILE_SIZES = [48, 100, 1024]
+
+
+@pytest.mark.parametrize('tile_size', TILE_SIZES)
+def test_filter_graph_tiles_match_whole_image(image, tmp_path, tile_size):
+    source = tmp_path / 'entrada.npy'
+    np.save(source, image)
+    
+    tiled = run_tiled(str(source), tmp_path / 'teselas', tile_size=tile_size)
+    whole = FilterGraph().evaluate({'original': image}, TILED_OUTPUTS)
+    
+    assert set(tiled) == set(TILED_OUTPUTS)
+    for name in TILED_OUTPUTS:
+        np.testing.assert_array_equal(tiled[name], whole[name], err_msg=name)
+
+
+def test_filter_graph_tiles_from_raw_grayscale(gray, tmp_path):
+    source = tmp_path / 'entrada.raw'
+    gray.tofile(source)
+    outputs = [name for name in TILED_OUTPUTS if name != 'grayscale']
+    
+    tiled = run_tiled(str(source), tmp_path / 'teselas', outputs=outputs, tile_size=64,
+                      shape=gray.shape)
+    whole = FilterGraph().evaluate({'grayscale': gray}, outputs)
+    
+    for name in outputs:
+        np.testing.assert_array_equal(tiled[name], whole[name], err_msg=name)
+
+
+@pytest.mark.parametrize('tile_size', TILE_SIZES)
+@pytest.mark.parametrize('block_size, c', [(11, 2), (31, 5)])
+def test_threshold_tiles_match_whole_image(image, gray, tmp_path, tile_size, block_size, c):
+    source = tmp_path / 'entrada.npy'
+    np.save(source, image)
+    
+    tiled = run_tiled_thresholds(str(source), tmp_path / 'teselas', tile_size=tile_size,
+                                 block_size=block_size, c=c)
+    otsu = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
+    whole = {
+        'thresh_fixed': cv2.threshold(gray, 127, 255, cv2.THRESH_BINARY)[1],
+        'thresh_adaptive_mean': cv2.adaptiveThreshold(
+            gray, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV, block_size, c),
+        'thresh_adaptive_gaussian': cv2.adaptiveThreshold(
+            gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY_INV, block_size, c),
+        'thresh_otsu': otsu,
+    }
+    
+    assert set(tiled) == set(whole)
+    for name, expected in whole.items():
+        np.testing.assert_array_equal(tiled[name], expected, err_msg=name)
@@ -0,0 +1,82 @@
+"""Pruebas de ToneMapper frente a cv2.equalizeHist y cv2.convertScaleAbs"""
+
+import cv2
+import numpy as np
+import pytest
+
+from imagen_matriz import ImagenMatriz, ToneMapper
+
+
+def gray_hist(gray):
+    return cv2.calcHist([gray], [0], None, [256], [0, 256])
+
+
+@pytest.fixture(params=['sintetica', 'bajo_contraste', 'sin_extremos'])
+def gray_case(request, gray):
+    if request.param == 'bajo_contraste':
+        return (gray // 4 + 100).astype(np.uint8)
+    if request.param == 'sin_extremos':
+        return np.clip(gray, 30, 200)
+    return gray
+
+
+def test_equalize_lut_matches_equalize_hist(gray_case):
+    lut = ToneMapper.equalize_lut(gray_hist(gray_case))
+    
+    np.testing.assert_array_equal(cv2.LUT(gray_case, lut), cv2.equalizeHist(gray_case))
+
+
+def test_equalize_chain_matches_equalize_hist(gray_case):
+    tone = ToneMapper()
+    
+    equalized = tone.apply(gray_case, [('equalize',)], hist=gray_hist(gray_case))
+    np.testing.assert_array_equal(equalized, cv2.equalizeHist(gray_case))
+
+
+def test_single_level_image_is_unchanged():
+    flat = np.full((16, 16), 77, dtype=np.uint8)
+    
+    np.testing.assert_array_equal(cv2.LUT(flat, ToneMapper.equalize_lut(gray_hist(flat))), flat)
+
+
+@pytest.mark.parametrize('alpha, beta', [(1.5, 50), (0.7, 20), (1.0, 0)])
+def test_linear_lut_matches_convert_scale_abs(image, alpha, beta):
+    # Sin valores negativos: ahí linear_lut satura a 0 y convertScaleAbs toma el valor absoluto
+    tone = ToneMapper()
+    
+    np.testing.assert_array_equal(tone.apply(image, [('linear', alpha, beta)]),
+                                  cv2.convertScaleAbs(image, alpha=alpha, beta=beta))
+
+
+def test_truncated_linear_lut_matches_float_to_uint8():
+    expected = np.clip(1.5 * np.arange(256) + 50.7, 0, 255).astype(np.uint8)
+    
+    np.testing.assert_array_equal(ToneMapper.linear_lut(1.5, 50.7, 'trunc'), expected)
+    with pytest.raises(ValueError):
+        ToneMapper.linear_lut(1.5, 50, 'floor')
+
+
+def test_chain_is_composed_and_cached(image):
+    tone = ToneMapper()
+    chain = [('linear', 1.2, 10), ('gamma', 0.8)]
+    
+    expected = ToneMapper.gamma_lut(0.8)[ToneMapper.linear_lut(1.2, 10)]
+    np.testing.assert_array_equal(tone.lut(chain), expected)
+    tone.lut(chain)
+    assert tone.metrics()['hits'] == 1 and tone.metrics()['misses'] == 1
+
+
+def test_pipeline_keeps_enhanced_and_adds_tone_curve(image, tmp_path):
+    path = tmp_path / 'entrada.png'
+    cv2.imwrite(str(path), image)
+    matriz = ImagenMatriz(str(path))
+    matriz.load_image()
+    matriz.apply_brightness_contrast()
+    rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    
+    # 'enhanced' conserva la LUT truncada original y 'bright_contrast' el redondeo de convertScaleAbs
+    truncated = np.clip(1.5 * np.arange(256) + 50, 0, 255).astype(np.uint8)
+    np.testing.assert_array_equal(matriz.results['enhanced'], cv2.LUT(rgb, truncated))
+    np.testing.assert_array_equal(matriz.results['bright_contrast'],
+                                  cv2.convertScaleAbs(rgb, alpha=1.5, beta=50))
+    assert matriz.results['tone_curve'].shape == rgb.shape
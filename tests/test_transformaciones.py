@@ -0,0 +1,60 @@
+"""Pruebas de las transformaciones por lotes y de las figuras registradas"""
+
+import numpy as np
+import pytest
+
+from transformaciones_2d import FiguraHomogenea, TransformacionesBasicas
+
+
+@pytest.fixture(scope='module')
+def transformaciones():
+    return TransformacionesBasicas()
+
+
+@pytest.fixture
+def matrices(transformaciones):
+    t = np.linspace(0, 1, 7)
+    return transformaciones.matriz_trs(t, -t, 3 * t, 1 + t, 2 - t)
+
+
+def test_registered_figure_matches_plain_figure(transformaciones, matrices):
+    figura = transformaciones.figura_original
+    registrada = transformaciones.registrar_figura(figura)
+    
+    for matriz in matrices:
+        np.testing.assert_array_equal(transformaciones.aplicar_transformacion(registrada, matriz),
+                                      transformaciones.aplicar_transformacion(figura, matriz))
+
+
+def test_batched_transform_matches_one_by_one(transformaciones, matrices):
+    figuras = np.stack([transformaciones.figura_original, 2 * transformaciones.figura_original])
+    registradas = transformaciones.registrar_figura(figuras)
+    
+    lote = transformaciones.aplicar_transformaciones(registradas, matrices)
+    assert lote.shape == (len(matrices), 2, 2, 4)
+    for n, matriz in enumerate(matrices):
+        for m, figura in enumerate(figuras):
+            np.testing.assert_allclose(lote[n, m], transformaciones.aplicar_transformacion(figura, matriz))
+    np.testing.assert_allclose(transformaciones.aplicar_transformaciones(figuras, matrices), lote)
+
+
+def test_registered_figure_is_a_read_only_copy(transformaciones):
+    figura = np.array([[0.0, 1.0, 0.0], [0.0, 0.0, 1.0]])
+    registrada = FiguraHomogenea(figura, np.float32)
+    figura[0, 1] = 5.0
+    
+    assert registrada.homogenea.dtype == np.float32
+    np.testing.assert_array_equal(registrada.homogenea, [[0, 1, 0], [0, 0, 1], [1, 1, 1]])
+    assert not registrada.homogenea.flags.writeable
+    assert transformaciones.coordenadas_homogeneas(registrada) is registrada.homogenea
+
+
+def test_timeline_matches_per_frame_transforms(transformaciones):
+    vertices = transformaciones.linea_de_tiempo(frames=5)
+    matrices = transformaciones.matrices_animacion(frames=5)
+    
+    for i, (clave, *_) in enumerate(TransformacionesBasicas.FIGURAS_ANIMADAS):
+        for frame in range(5):
+            esperado = transformaciones.aplicar_transformacion(transformaciones.figura_original,
+                                                               matrices[clave][frame])
+            np.testing.assert_allclose(vertices[frame, i], esperado.T, atol=1e-12)